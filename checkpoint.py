@@ -0,0 +1,106 @@
+"""
+Periodic checkpoints for long line scans (`LocalSchemaExtractor.build_type_dict` / `generate_schema_edge`).
+
+Every `env::CHECKPOINT_INTERVAL` seconds, `ScanCheckpoint.lines` pickles
+`{files done, current file, byte offset of the next line, partial state}` into its path
+(written to a `.tmp` file and `os.replace`-d, so a kill mid-write keeps the previous checkpoint).
+On restart, `load` hands the partial state back and `lines` continues from that offset.
+
+A checkpoint is ignored if any scanned file changed (size / mtime) since it was written,
+and should be `remove`-d once the stage's outputs are written.
+"""
+
+from typing import Any, Callable, Iterator, Optional
+from tqdm.asyncio import tqdm_asyncio
+from env import CHECKPOINT_INTERVAL
+import os, pickle, time
+
+CHECK_EVERY_LINES = 1 << 16
+""" lines between two clock reads """
+
+
+def file_version(file: str) -> tuple[int, int]:
+    stat = os.stat(file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ScanCheckpoint:
+    def __init__(self, path: str, interval: int = CHECKPOINT_INTERVAL) -> None:
+        self.path = path
+        self.interval = interval
+        self.files_done = list[str]()
+        self.file: Optional[str] = None
+        self.offset = 0
+
+    def load(self) -> Optional[Any]:
+        """
+        The partial state of a valid checkpoint at `path`, if any.
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            checkpoint = pickle.load(f)
+        for file, version in checkpoint["versions"].items():
+            if not os.path.exists(file) or file_version(file) != version:
+                print(f"`{file}` changed since `{self.path}`, ignoring the checkpoint")
+                return None
+        self.files_done = checkpoint["files_done"]
+        self.file, self.offset = checkpoint["file"], checkpoint["offset"]
+        print(
+            f"Resuming from `{self.path}`: {len(self.files_done)} file(s) done, `{self.file}` at byte {self.offset}"
+        )
+        return checkpoint["state"]
+
+    def save(self, state: Any):
+        scanned = self.files_done + ([self.file] if self.file else [])
+        checkpoint = {
+            "files_done": self.files_done,
+            "file": self.file,
+            "offset": self.offset,
+            "versions": {file: file_version(file) for file in scanned},
+            "state": state,
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def lines(
+        self, files: list[str], desc: str, state: Callable[[], Any]
+    ) -> Iterator[bytes]:
+        """
+        Lines of `files` not covered by the loaded checkpoint; `state()` must reflect every line
+        yielded so far whenever the generator is resumed, since that is when checkpoints are saved.
+        """
+        last_saved = time.monotonic()
+        for cnt, file in enumerate(files):
+            if file in self.files_done:
+                continue
+            offset = self.offset if file == self.file else 0
+            self.file, self.offset = file, offset
+            with tqdm_asyncio(
+                total=os.path.getsize(file),
+                initial=offset,
+                unit="B",
+                unit_scale=True,
+                desc=f"{desc} from `{file}` ({cnt + 1}/{len(files)})",
+            ) as bar:
+                with open(file, "rb") as f:
+                    f.seek(offset)
+                    for num_of_lines, line in enumerate(f, 1):
+                        yield line
+                        self.offset += len(line)
+                        bar.update(len(line))
+                        if (
+                            num_of_lines % CHECK_EVERY_LINES == 0
+                            and self.interval > 0
+                            and time.monotonic() - last_saved >= self.interval
+                        ):
+                            self.save(state())
+                            last_saved = time.monotonic()
+            self.files_done.append(file)
+            self.file, self.offset = None, 0
@@ -0,0 +1,205 @@
+"""
+# Columnar export
+
+Enabled by `COLUMNAR_EXPORT` in `options::OPTIONS` (or `env::OUTPUT_FORMAT`), requires `pyarrow` (optional dependency).
+
+Writes the type / instance nodes, `ii` / `it` relationships and schema edges built by
+`schema_to_csv` and `instance_to_csv` as Parquet (or Arrow IPC, see `COLUMNAR_FORMAT`) files into `out/columnar/`,
+in record batches of `io_pipeline::BATCH_SIZE` rows:
+- ids are `int64` columns, resolved with batched id map lookups
+- predicates are dictionary-encoded against one dictionary shared by every batch
+"""
+
+from local_schema_extractor import OUT_PATH, SCHEMA_EDGE_SUPPORT_FILE
+from pipeline_session import PipelineSession
+from edge_dedup import iter_spooled_edges
+from io_pipeline import batched
+from options import hasOption
+from typing import Iterator, Optional
+from tqdm.auto import tqdm
+from env import OUTPUT_FORMAT
+import pyarrow as pa, pyarrow.parquet as pq
+import numpy as np
+import instance_to_csv, os
+
+COLUMNAR_PATH = f"{OUT_PATH}/columnar"
+COLUMNAR_FORMAT = OUTPUT_FORMAT if OUTPUT_FORMAT in ["parquet", "arrow"] else "parquet"
+""" `parquet` | `arrow` (IPC file format), see `env::OUTPUT_FORMAT` """
+
+ID = pa.int64()
+PREDICATE = pa.dictionary(pa.int32(), pa.string())
+
+Batch = dict[str, pa.Array]
+
+
+class TableWriter:
+    def __init__(self, name: str, schema: pa.Schema) -> None:
+        os.makedirs(COLUMNAR_PATH, exist_ok=True)
+        self.schema = schema
+        self.path = f"{COLUMNAR_PATH}/{name}.{COLUMNAR_FORMAT}"
+        if COLUMNAR_FORMAT == "parquet":
+            self.writer = pq.ParquetWriter(self.path, schema)
+        else:
+            self.writer = pa.ipc.new_file(self.path, schema)
+        self.num_of_rows = 0
+
+    def write(self, batch: Batch):
+        record_batch = pa.record_batch(
+            [batch[field.name] for field in self.schema], schema=self.schema
+        )
+        self.writer.write_batch(record_batch)
+        self.num_of_rows += record_batch.num_rows
+
+    def close(self):
+        self.writer.close()
+        print(f"See `{self.path}` ({self.num_of_rows} rows)")
+
+
+def write_table(name: str, schema: pa.Schema, batches: Iterator[Batch]):
+    writer = TableWriter(name, schema)
+    for batch in tqdm(batches, desc=f"Writing `{name}` record batches"):
+        writer.write(batch)
+    writer.close()
+
+
+def predicate_column(indices: list[int], dictionary: pa.Array) -> pa.Array:
+    return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), dictionary)
+
+
+def node_batches(names: Iterator[str], id_map) -> Iterator[Batch]:
+    for chunk in batched(names):
+        yield {
+            "id": pa.array(np.asarray(id_map.lookup_batch(chunk), dtype=np.int64)),
+            "name": pa.array(chunk, pa.string()),
+        }
+
+
+def ii_batches(dictionary: pa.Array) -> Iterator[Batch]:
+    sampled_type_dict = instance_to_csv.sampled_type_dict
+    predicate_ids = {p: id for id, p in enumerate(dictionary.to_pylist())}
+    triples = (
+        (s, predicate_ids[p], o)
+        for s, p, o in iter_spooled_edges(instance_to_csv.spo_edges_file)
+        if not hasOption("PICK_SAMPLED_INST_ONLY") or s in sampled_type_dict
+    )
+    id_map = instance_to_csv.instance_node_name_id_dict
+    for chunk in batched(triples):
+        s_names, p_ids, o_names = zip(*chunk)
+        yield {
+            "start_id": pa.array(np.asarray(id_map.lookup_batch(s_names), np.int64)),
+            "end_id": pa.array(np.asarray(id_map.lookup_batch(o_names), np.int64)),
+            "predicate": predicate_column(p_ids, dictionary),
+        }
+
+
+def it_batches() -> Iterator[Batch]:
+    pairs = (
+        (inst, t)
+        for inst, types in instance_to_csv.sampled_type_dict.items()
+        for t in types
+    )
+    for chunk in batched(pairs):
+        instances, types = zip(*chunk)
+        i_ids = instance_to_csv.instance_node_name_id_dict.lookup_batch(instances)
+        t_ids = instance_to_csv.type_node_name_id_dict.lookup_batch(types)
+        yield {
+            "start_id": pa.array(np.asarray(i_ids, np.int64)),
+            "end_id": pa.array(np.asarray(t_ids, np.int64)),
+        }
+
+
+def schema_edge_support(session: PipelineSession) -> dict[tuple[str, str, str], int]:
+    if session.extractor.schema_edge_support:
+        return session.extractor.schema_edge_support
+    support = dict[tuple[str, str, str], int]()
+    if os.path.exists(SCHEMA_EDGE_SUPPORT_FILE):
+        with open(SCHEMA_EDGE_SUPPORT_FILE, "r") as f:
+            for line in f:
+                s_type, p, o_type, count = line.split()
+                support[(s_type, p, o_type)] = int(count)
+    return support
+
+
+def schema_edge_batches(
+    session: PipelineSession, dictionary: pa.Array
+) -> Iterator[Batch]:
+    support = schema_edge_support(session)
+    predicate_ids = {p: id for id, p in enumerate(dictionary.to_pylist())}
+    id_map = instance_to_csv.type_node_name_id_dict
+    for chunk in batched(session.iter_schema_edges()):
+        s_types, predicates, o_types = zip(*chunk)
+        yield {
+            "start_id": pa.array(np.asarray(id_map.lookup_batch(s_types), np.int64)),
+            "end_id": pa.array(np.asarray(id_map.lookup_batch(o_types), np.int64)),
+            "predicate": predicate_column(
+                [predicate_ids[p] for p in predicates], dictionary
+            ),
+            "support": pa.array([support.get(edge) for edge in chunk], ID),
+        }
+
+
+def load_instance_to_csv_state(session: PipelineSession):
+    """
+    Reuse what `instance_to_csv.exec` left in memory, otherwise load it from its dumps / id maps.
+    """
+    if not instance_to_csv.inst_set:
+        instance_to_csv.build_spo_edges_and_inst_set()
+        instance_to_csv.sample_the_type_dict(session)
+    if not hasattr(instance_to_csv, "type_node_name_id_dict"):
+        instance_to_csv.load_type_node_name_id_dict(session)
+    if not hasattr(instance_to_csv, "instance_node_name_id_dict"):
+        instance_to_csv.build_instance_node_name_id_dict()
+
+
+def exec(session: Optional[PipelineSession] = None):
+    if not hasOption("COLUMNAR_EXPORT") and OUTPUT_FORMAT == "csv":
+        print("COLUMNAR_EXPORT is not set to True, skipping columnar export ...")
+        return
+
+    session = session if session else PipelineSession()
+    load_instance_to_csv_state(session)
+
+    write_table(
+        "type_nodes",
+        pa.schema([("id", ID), ("name", pa.string())]),
+        node_batches(
+            iter(sorted(session.schema_vertex)), instance_to_csv.type_node_name_id_dict
+        ),
+    )
+    schema_predicates = sorted(set(p for _, p, _ in session.iter_schema_edges()))
+    write_table(
+        "schema_edges",
+        pa.schema(
+            [
+                ("start_id", ID),
+                ("end_id", ID),
+                ("predicate", PREDICATE),
+                ("support", ID),
+            ]
+        ),
+        schema_edge_batches(session, pa.array(schema_predicates, pa.string())),
+    )
+    write_table(
+        "instance_nodes",
+        pa.schema([("id", ID), ("name", pa.string())]),
+        node_batches(
+            iter(instance_to_csv.inst_set), instance_to_csv.instance_node_name_id_dict
+        ),
+    )
+    instance_predicates = sorted(
+        set(p for _, p, _ in iter_spooled_edges(instance_to_csv.spo_edges_file))
+    )
+    write_table(
+        "instance_instance_relationships",
+        pa.schema([("start_id", ID), ("end_id", ID), ("predicate", PREDICATE)]),
+        ii_batches(pa.array(instance_predicates, pa.string())),
+    )
+    write_table(
+        "instance_type_relationships",
+        pa.schema([("start_id", ID), ("end_id", ID)]),
+        it_batches(),
+    )
+
+
+if __name__ == "__main__":
+    exec()
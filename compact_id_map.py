@@ -0,0 +1,256 @@
+"""
+Compact, `mmap`-backed `name -> id` map, built from an append-only `*_node_name_id_map.txt`.
+
+Layout of `{name_id_map}.idx` (little endian):
+- header: `MAGIC`, `num_of_keys`, `block_size`, `num_of_blocks`, `max_id`,
+  `keys_offset`, `block_offsets_offset`, `ids_offset`, `src_size`, `src_mtime_ns`
+- keys: sorted keys, front coded (`varint shared`, `varint suffix_len`, `suffix`),
+  the first key of each block is stored in full (`shared = 0`)
+- block_offsets: `uint64[num_of_blocks]`, relative to `keys_offset`
+- ids: `int64[num_of_keys]`, in sorted key order
+"""
+
+import mmap, os, struct
+from utils import external_sort
+import numpy as np
+from typing import Iterable, Optional
+from tqdm.auto import tqdm
+
+MAGIC = b"IDMAP001"
+HEADER = struct.Struct("<8s3Qq5Q")
+BLOCK_SIZE = 16
+
+
+def _write_varint(buf: bytearray, value: int):
+    while value >= 0x80:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(data, pos: int) -> tuple[int, int]:
+    value, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def index_path(name_id_map: str) -> str:
+    return os.path.splitext(name_id_map)[0] + ".idx"
+
+
+def is_fresh(name_id_map: str) -> bool:
+    idx = index_path(name_id_map)
+    if not os.path.exists(idx):
+        return False
+    stat = os.stat(name_id_map)
+    with open(idx, "rb") as f:
+        header = HEADER.unpack(f.read(HEADER.size))
+    return header[0] == MAGIC and header[-2:] == (stat.st_size, stat.st_mtime_ns)
+
+
+def build_compact_id_map(name_id_map: str):
+    """
+    Externally sort `name_id_map` (`sort`, bytewise) and front code it into `{name_id_map}.idx`.
+    """
+    sorted_file = f"{name_id_map}.sorted"
+    external_sort(name_id_map, sorted_file, "-k1,1")
+    stat = os.stat(name_id_map)
+    keys, block_offsets, ids = bytearray(), list[int](), list[int]()
+    prev = b""
+    with open(sorted_file, "rb") as f:
+        with tqdm(desc=f"Building `{index_path(name_id_map)}`") as bar:
+            for cnt, line in enumerate(f):
+                name, id = line.split()
+                shared = 0
+                if cnt % BLOCK_SIZE == 0:
+                    block_offsets.append(len(keys))
+                else:
+                    limit = min(len(prev), len(name))
+                    while shared < limit and prev[shared] == name[shared]:
+                        shared += 1
+                _write_varint(keys, shared)
+                _write_varint(keys, len(name) - shared)
+                keys += name[shared:]
+                ids.append(int(id))
+                prev = name
+                bar.update(1)
+    os.remove(sorted_file)
+
+    keys_offset = HEADER.size
+    block_offsets_offset = keys_offset + len(keys)
+    block_offsets_offset += -block_offsets_offset % 8  # align for `np.frombuffer`
+    ids_offset = block_offsets_offset + 8 * len(block_offsets)
+    with open(index_path(name_id_map), "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC,
+                len(ids),
+                BLOCK_SIZE,
+                len(block_offsets),
+                max(ids, default=-1),
+                keys_offset,
+                block_offsets_offset,
+                ids_offset,
+                stat.st_size,
+                stat.st_mtime_ns,
+            )
+        )
+        f.write(keys)
+        f.write(b"\0" * (block_offsets_offset - keys_offset - len(keys)))
+        f.write(np.asarray(block_offsets, dtype="<u8").tobytes())
+        f.write(np.asarray(ids, dtype="<i8").tobytes())
+
+
+class CompactIdMap:
+    """
+    Read-only `name -> id` lookups over `{name_id_map}.idx`, without building a `dict`.
+    """
+
+    def __init__(self, name_id_map: str) -> None:
+        self.file = open(index_path(name_id_map), "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            _,
+            self.num_of_keys,
+            self.block_size,
+            self.num_of_blocks,
+            self.max_id,
+            self.keys_offset,
+            block_offsets_offset,
+            ids_offset,
+            _,
+            _,
+        ) = HEADER.unpack_from(self.mm, 0)
+        self.block_offsets = np.frombuffer(
+            self.mm, dtype="<u8", count=self.num_of_blocks, offset=block_offsets_offset
+        )
+        self.ids = np.frombuffer(
+            self.mm, dtype="<i8", count=self.num_of_keys, offset=ids_offset
+        )
+
+    def close(self):
+        del self.block_offsets, self.ids
+        self.mm.close()
+        self.file.close()
+
+    def _first_key(self, block: int) -> bytes:
+        pos = self.keys_offset + int(self.block_offsets[block])
+        _, pos = _read_varint(self.mm, pos)  # `shared` is always 0
+        length, pos = _read_varint(self.mm, pos)
+        return self.mm[pos : pos + length]
+
+    def _find_block(self, key: bytes) -> int:
+        """
+        Last block whose first key `<= key` (`-1` if none).
+        """
+        lo, hi = 0, self.num_of_blocks
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._first_key(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def _decode_block(self, block: int) -> list[bytes]:
+        pos = self.keys_offset + int(self.block_offsets[block])
+        count = min(self.block_size, self.num_of_keys - block * self.block_size)
+        keys, prev = list[bytes](), b""
+        for _ in range(count):
+            shared, pos = _read_varint(self.mm, pos)
+            length, pos = _read_varint(self.mm, pos)
+            prev = prev[:shared] + self.mm[pos : pos + length]
+            pos += length
+            keys.append(prev)
+        return keys
+
+    def _position(self, key: bytes) -> int:
+        block = self._find_block(key)
+        if block >= 0:
+            for i, k in enumerate(self._decode_block(block)):
+                if k == key:
+                    return block * self.block_size + i
+        return -1
+
+    def __len__(self) -> int:
+        return self.num_of_keys
+
+    def __contains__(self, name: str) -> bool:
+        return self._position(name.encode()) >= 0
+
+    def __getitem__(self, name: str) -> int:
+        position = self._position(name.encode())
+        if position < 0:
+            raise KeyError(name)
+        return int(self.ids[position])
+
+    def lookup_batch(
+        self, names: Iterable[str], default: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Resolve `names` at once: queries are sorted, each needed block is decoded once,
+        and ids are gathered in one vectorized step.
+
+        A missing name raises `KeyError` (like `__getitem__`), unless a `default` id is given for misses.
+        """
+        keys = [name.encode() for name in names]
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        block, block_keys, block_end = -2, dict[bytes, int](), b""
+        for i in sorted(range(len(keys)), key=keys.__getitem__):
+            key = keys[i]
+            if block == -2 or (block_end and key >= block_end):
+                block = self._find_block(key)
+                block_keys = (
+                    {k: j for j, k in enumerate(self._decode_block(block))}
+                    if block >= 0
+                    else {}
+                )
+                block_end = (
+                    self._first_key(block + 1)
+                    if block + 1 < self.num_of_blocks
+                    else b""
+                )
+            if key in block_keys:
+                positions[i] = block * self.block_size + block_keys[key]
+        found = positions >= 0
+        if default is None and not found.all():
+            raise KeyError(keys[int(np.argmin(found))].decode())
+        ids = np.full(len(keys), -1 if default is None else default, dtype=np.int64)
+        ids[found] = self.ids[positions[found]]
+        return ids
+
+
+def open_compact_id_map(
+    name_id_map: str, names: Iterable[str] = ()
+) -> tuple[CompactIdMap, list[str]]:
+    """
+    Append `names` missing in `name_id_map` (with fresh ids), (re)build its `.idx` if stale, and open it.
+
+    Returns `(id_map, newly assigned names)`.
+    """
+    if not os.path.exists(name_id_map):
+        open(name_id_map, "w").close()
+    if not is_fresh(name_id_map):
+        build_compact_id_map(name_id_map)
+    id_map = CompactIdMap(name_id_map)
+
+    names = list(set(names))
+    if not names:
+        return id_map, []
+    missing = id_map.lookup_batch(names, default=-1) < 0
+    new_names = sorted(name for name, m in zip(names, missing) if m)
+    if not new_names:
+        return id_map, []
+
+    next_id = id_map.max_id + 1
+    id_map.close()
+    with open(name_id_map, "a") as f:
+        for cnt, name in enumerate(new_names):
+            f.write(f"{name} {next_id + cnt}\n")
+    build_compact_id_map(name_id_map)
+    return CompactIdMap(name_id_map), new_names
@@ -0,0 +1,48 @@
+"""
+Compressed sparse row (CSR) adjacency arrays, saved as `.npy` so they can be `np.load(..., mmap_mode="r")`-ed.
+
+`{prefix}offsets.npy` (`num_of_nodes + 1`), `{prefix}targets.npy`, `{prefix}predicates.npy`:
+edges leaving node `i` are `targets[offsets[i] : offsets[i + 1]]`, with `predicates[...]` as their predicate ids.
+"""
+
+import numpy as np
+
+CSR = tuple[np.ndarray, np.ndarray, np.ndarray]
+""" `(offsets, targets, predicates)` """
+
+
+def save_csr(
+    path: str,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    predicates: np.ndarray,
+    num_of_nodes: int,
+    prefix: str = "",
+):
+    order = np.argsort(sources, kind="stable")
+    offsets = np.zeros(num_of_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=num_of_nodes), out=offsets[1:])
+    np.save(f"{path}/{prefix}offsets.npy", offsets)
+    np.save(f"{path}/{prefix}targets.npy", targets[order])
+    np.save(f"{path}/{prefix}predicates.npy", predicates[order])
+
+
+def load_csr(path: str, prefix: str = "") -> CSR:
+    return tuple(
+        np.load(f"{path}/{prefix}{name}.npy", mmap_mode="r")
+        for name in ["offsets", "targets", "predicates"]
+    )
+
+
+def save_predicates(path: str, predicate_ids: dict[str, int]):
+    """
+    `predicates.txt`, line number = predicate id.
+    """
+    with open(f"{path}/predicates.txt", "w") as f:
+        for p in sorted(predicate_ids, key=predicate_ids.__getitem__):
+            f.write(f"{p}\n")
+
+
+def load_predicates(path: str) -> list[str]:
+    with open(f"{path}/predicates.txt", "r") as f:
+        return [line.rstrip("\n") for line in f]
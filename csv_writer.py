@@ -0,0 +1,74 @@
+"""
+Bulk csv writer shared by the exporters.
+
+- `quoted`: always-quoted field, embedded `"` doubled (RFC 4180), for names / IRIs / literals
+- `escaped`: bare field, quoted only when it contains `,`, `"` or a line break (e.g. `:TYPE`, `:LABEL`)
+- `CsvWriter`: rows are joined per batch of `BATCH_SIZE` rows and handed to `io_pipeline::BatchWriter`,
+  which writes each batch with a single `write`; the progress bar is updated once per batch
+"""
+
+from io_pipeline import BatchWriter, BATCH_SIZE
+from typing import Iterable, Optional
+from tqdm.auto import tqdm
+import re
+
+NEEDS_QUOTING = re.compile(r'[,"\r\n]')
+
+
+def quoted(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def escaped(value: str) -> str:
+    return quoted(value) if NEEDS_QUOTING.search(value) else value
+
+
+class CsvWriter:
+    """
+    `with CsvWriter(path, headers, total, desc) as writer: writer.write_row([...])`,
+    fields already formatted (see `quoted` / `escaped`).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        headers: list[str],
+        total: Optional[int] = None,
+        desc: Optional[str] = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self.writer = BatchWriter(path, ",".join(headers))
+        self.bar = tqdm(total=total, desc=desc)
+        self.batch_size = batch_size
+        self.rows = list[str]()
+        self.num_of_rows = 0
+
+    def write_row(self, fields: list[str]):
+        self.rows.append(",".join(fields))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[list[str]]):
+        for fields in rows:
+            self.write_row(fields)
+
+    def flush(self):
+        if not self.rows:
+            return
+        self.writer.write_rows(self.rows)
+        self.bar.update(len(self.rows))
+        self.num_of_rows += len(self.rows)
+        self.rows = list[str]()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.writer.close()
+            self.bar.close()
+
+    def __enter__(self) -> "CsvWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
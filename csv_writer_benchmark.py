@@ -0,0 +1,91 @@
+"""
+`python csv_writer_benchmark.py [--subjects 200000] [--repeat 3]`
+
+Rows/sec of the per-row exporter loop (one `write` + one `bar.update(1)` per row, the way
+`instance_to_csv::ii_relationships` used to build rows) against `csv_writer::CsvWriter`,
+on a synthetic `spo_table`. Progress bars go to stderr, redirect it to keep the report readable.
+"""
+
+from csv_writer import CsvWriter, quoted, escaped
+from instance_to_csv import II_RELATION_TYPE, ii_headers
+from options import hasOption
+from tqdm.auto import tqdm
+import argparse, os, tempfile, time
+
+SPOTable = dict[str, dict[str, set[str]]]
+""" `{subject(inst): {predicate: {object(inst)}}}` """
+
+
+def synthetic_spo_table(num_of_subjects: int) -> SPOTable:
+    """
+    0 ~ 4 predicates per subject, 2 objects per predicate, every 1000th object containing `"`.
+    """
+    return {
+        f"dbr:S_{i}": {
+            f"dbo:p{j}": {
+                f'dbr:O_"{i}_{j}_{k}"' if i % 1000 == 0 else f"dbr:O_{i}_{j}_{k}"
+                for k in range(2)
+            }
+            for j in range(i % 5)
+        }
+        for i in range(num_of_subjects)
+    }
+
+
+def per_row_loop(path: str, spo_table: SPOTable, num_of_rows: int):
+    with tqdm(total=num_of_rows, desc="per-row loop") as bar:
+        with open(path, "w") as f:
+            f.write(",".join(ii_headers()) + "\n")
+            for s_id, s in enumerate(spo_table):
+                s_inst = f'"{s}"'
+                for p in spo_table[s]:
+                    pred = f'"{p}"'
+                    TYPE = p if hasOption("USE_PRED_TYPE") else II_RELATION_TYPE
+                    for o_id, o in enumerate(spo_table[s][p]):
+                        o_inst = f'"{o}"'
+                        row = [str(s_id), str(o_id), TYPE, s_inst, o_inst]
+                        row += [] if hasOption("USE_PRED_TYPE") else [pred]
+                        f.write(",".join(row) + "\n")
+                        bar.update(1)
+
+
+def csv_writer(path: str, spo_table: SPOTable, num_of_rows: int):
+    use_pred_type = hasOption("USE_PRED_TYPE")
+    with CsvWriter(path, ii_headers(), total=num_of_rows, desc="CsvWriter") as writer:
+        for s_id, s in enumerate(spo_table):
+            s_inst = quoted(s)
+            for p in spo_table[s]:
+                TYPE = escaped(p) if use_pred_type else II_RELATION_TYPE
+                pred = [] if use_pred_type else [quoted(p)]
+                for o_id, o in enumerate(spo_table[s][p]):
+                    writer.write_row(
+                        [str(s_id), str(o_id), TYPE, s_inst, quoted(o)] + pred
+                    )
+
+
+def benchmark(num_of_subjects: int, repeat: int) -> dict[str, float]:
+    spo_table = synthetic_spo_table(num_of_subjects)
+    num_of_rows = sum(
+        len(objects) for p_dict in spo_table.values() for objects in p_dict.values()
+    )
+    rows_per_sec = dict[str, float]()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, write in [("per-row loop", per_row_loop), ("CsvWriter", csv_writer)]:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                write(os.path.join(tmp, "bench.csv"), spo_table, num_of_rows)
+                best = min(best, time.perf_counter() - start)
+            rows_per_sec[name] = num_of_rows / best
+    return rows_per_sec
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark `CsvWriter`")
+    parser.add_argument("--subjects", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    results = benchmark(args.subjects, args.repeat)
+    for name, speed in results.items():
+        print(f"{name:>14}: {speed:,.0f} rows/sec")
+    print(f"{'speedup':>14}: {results['CsvWriter'] / results['per-row loop']:.2f}x")
@@ -0,0 +1,71 @@
+"""
+CURIE prefix compression, enabled by `COMPACT_IRI` in `options::OPTIONS`.
+
+IRIs are compacted (`http://dbpedia.org/ontology/Person` -> `dbo:Person`) right where triples are parsed,
+so `type_dict`, `schema_edge`, `spo_edges`, the dumps, the id maps and every exported csv hold CURIEs.
+IRIs outside of `PREFIXES` are kept as is. The mapping is written to `out/prefixes.csv` by the csv stages (`dump_prefixes`).
+
+Dumps and id maps are built with the setting active at the time, remove them after toggling `COMPACT_IRI`.
+"""
+
+from options import hasOption
+from csv_writer import CsvWriter, escaped, quoted
+
+PREFIXES = {
+    "dbr": "http://dbpedia.org/resource/",
+    "dbo": "http://dbpedia.org/ontology/",
+    "dbp": "http://dbpedia.org/property/",
+    "yago": "http://dbpedia.org/class/yago/",
+    "owl": "http://www.w3.org/2002/07/owl#",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+    "geo": "http://www.w3.org/2003/01/geo/wgs84_pos#",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+    "dct": "http://purl.org/dc/terms/",
+    "schema": "http://schema.org/",
+    "wikidata": "http://www.wikidata.org/entity/",
+    "dul": "http://www.ontologydesignpatterns.org/ont/dul/DUL.owl#",
+    "umbel-rc": "http://umbel.org/umbel/rc/",
+}
+
+COMPACT_IRI = hasOption("COMPACT_IRI")
+
+PREFIX_TABLES = [
+    (length, {ns: prefix for prefix, ns in PREFIXES.items() if len(ns) == length})
+    for length in sorted(set(map(len, PREFIXES.values())), reverse=True)
+]
+""" `[(namespace length, {namespace: prefix})]`, longest first """
+
+
+def compact_iri(iri: str) -> str:
+    for length, table in PREFIX_TABLES:
+        prefix = table.get(iri[:length])
+        if prefix:
+            return f"{prefix}:{iri[length:]}"
+    return iri
+
+
+def expand_curie(curie: str) -> str:
+    prefix, sep, local = curie.partition(":")
+    ns = PREFIXES.get(prefix) if sep else None
+    return ns + local if ns else curie
+
+
+def compact(iri: str) -> str:
+    return compact_iri(iri) if COMPACT_IRI else iri
+
+
+def expand(curie: str) -> str:
+    return expand_curie(curie) if COMPACT_IRI else curie
+
+
+def dump_prefixes(path: str):
+    if not COMPACT_IRI:
+        return
+    with CsvWriter(
+        path, ["prefix", "namespace"], total=len(PREFIXES), desc=f"Writing `{path}`"
+    ) as writer:
+        for prefix, ns in PREFIXES.items():
+            writer.write_row([escaped(prefix), quoted(ns)])
@@ -0,0 +1,332 @@
+"""
+# Delta extraction
+
+Apply the difference between two DBpedia releases (`PREV_DATASET` -> `DATASET`)
+to the outputs of a previous `LocalSchemaExtractor.exec()`, instead of re-extracting.
+
+1. Both releases' files are sorted (`sort`, bytewise, duplicates kept) and diffed in one streaming merge.
+2. Type changes are applied to `type_dict`, per-edge support counts (`schema_edge_support.txt`)
+   are decremented for removed triples (with old types) and incremented for added ones (with new types).
+   Unchanged triples touching an instance whose types changed are re-counted.
+3. Only schema edges / vertices whose support crossed `0` are emitted (`*.added.*` / `*.removed.*`),
+   together with the changed `type_type` and (sampled) `instance_instance` relationships.
+"""
+
+from local_schema_extractor import (
+    pre_check,
+    TypeDict,
+    DUMP_PATH,
+    TYPE_DICT_SERIALIZED,
+    dump_exists,
+    dump_type_dict,
+    load_type_dict,
+    resource_pool_files,
+    SPECIFIC_TYPE_FILE,
+    TRANSITIVE_TYPE_FILE,
+    SCHEMA_EDGE_SUPPORT_FILE,
+)
+from schema_to_csv_base import SCHEMA_EDGES_GENERAL, SCHEMA_VERTICES_GENERAL
+from compact_id_map import open_compact_id_map
+from env import DATASET, PREV_DATASET
+from options import hasOption
+from typing import Iterator
+from curie import compact
+from triple_filter import TRIPLE_FILTER
+from tqdm.auto import tqdm
+from utils import external_sort
+from csv_writer import CsvWriter, quoted, escaped
+import schema_to_csv, instance_to_csv, os
+
+DELTA_PATH = f"{DUMP_PATH}/delta"
+
+SchemaEdge = tuple[str, str, str]
+
+
+def sorted_copy(file: str) -> str:
+    """
+    `sort` (bytewise) `file` into `DELTA_PATH`, reused while `file` is unchanged.
+    """
+    stat = os.stat(file)
+    output = f"{DELTA_PATH}/{os.path.basename(file)}.{stat.st_size}-{stat.st_mtime_ns}.sorted"
+    if not os.path.exists(output):
+        print(f"Sorting `{file}` ... ", end="")
+        external_sort(file, output)
+        print("Done!")
+    return output
+
+
+def diff_sorted(prev_file: str, new_file: str) -> Iterator[tuple[str, str]]:
+    """
+    Merge two sorted files, yields `("-" | "+" | "=", line)`.
+    """
+    with open(prev_file, "rb") as prev, open(new_file, "rb") as new:
+        a, b = prev.readline(), new.readline()
+        while a or b:
+            if a and (not b or a < b):
+                yield "-", a.decode()
+                a = prev.readline()
+            elif b and (not a or b < a):
+                yield "+", b.decode()
+                b = new.readline()
+            else:
+                yield "=", a.decode()
+                a, b = prev.readline(), new.readline()
+
+
+def accepted_type(line: str) -> bool:
+    """
+    `triple_filter::TRIPLE_FILTER.accept_type` of a raw type file line.
+    """
+    if not TRIPLE_FILTER:
+        return True
+    s, _, o = line.split()[0:3]
+    return TRIPLE_FILTER.accept_type(s.encode(), o.encode())
+
+
+def accepted_triple(line: str) -> bool:
+    """
+    `triple_filter::TRIPLE_FILTER.accept_triple` of a raw `(s)-[p]->(o)` line.
+    """
+    if not TRIPLE_FILTER:
+        return True
+    return TRIPLE_FILTER.accept_triple(*(field.encode() for field in line.split()[0:3]))
+
+
+def is_type_triple(line: str) -> bool:
+    """
+    `rdf:type`-like predicate (`...#type`), checked on the raw IRI like `LocalSchemaExtractor.build_type_dict`,
+    since `compact` turns it into `rdf:type` under `COMPACT_IRI`.
+    """
+    return line.split()[1][1:-1].split("#")[-1] == "type"
+
+
+def parse_triple(line: str) -> tuple[str, str, str]:
+    s, p, o = line.split()[0:3]
+    return compact(s[1:-1]), compact(p[1:-1]), compact(o[1:-1])  # remove `<` and `>`
+
+
+class DeltaSchemaExtractor:
+    def __init__(self, prev_dataset: str = PREV_DATASET, new_dataset: str = DATASET):
+        pre_check()
+        os.makedirs(DELTA_PATH, exist_ok=True)
+        self.prev_dataset, self.new_dataset = prev_dataset, new_dataset
+        self.type_dict = TypeDict()
+        self.old_types = TypeDict()
+        """ `{changed_inst: {type in previous release}}` """
+        self.support = dict[SchemaEdge, int]()
+        self.changed_support = dict[SchemaEdge, int]()
+        """ `{schema_edge: support in previous release}`, for touched edges only """
+        self.sampled_instances = set[str]()
+        self.added_ii = list[tuple[str, str, str]]()
+        self.removed_ii = list[tuple[str, str, str]]()
+
+    def release_pair(self, file: str) -> tuple[str, str]:
+        name = os.path.basename(file)
+        return f"{self.prev_dataset}/{name}", f"{self.new_dataset}/{name}"
+
+    def load_previous_state(self):
+        for path in [TYPE_DICT_SERIALIZED, SCHEMA_EDGE_SUPPORT_FILE]:
+            if not dump_exists(path):
+                raise FileNotFoundError(
+                    f"File `{path}` does not exist, please run `LocalSchemaExtractor.exec()` on the previous release first."
+                )
+
+        print(f"Loading type_dict from `{TYPE_DICT_SERIALIZED}`(dumped) ... ", end="")
+        self.type_dict = load_type_dict(TYPE_DICT_SERIALIZED)
+        print("Done!")
+
+        with open(SCHEMA_EDGE_SUPPORT_FILE, "r") as f:
+            for line in tqdm(f, desc=f"Loading `{SCHEMA_EDGE_SUPPORT_FILE}`"):
+                s_type, p, o_type, support = line.split()
+                self.support[(s_type, p, o_type)] = int(support)
+
+        sampled_instances = instance_to_csv.SAMPLED_INSTANCES
+        if os.path.exists(sampled_instances):
+            with open(sampled_instances, "r") as f:
+                self.sampled_instances = set(line.strip() for line in f)
+
+        return self
+
+    def apply_type_delta(self):
+        type_files = [SPECIFIC_TYPE_FILE, TRANSITIVE_TYPE_FILE]
+        sorted_pairs = list[tuple[str, str]]()
+        changed = set[str]()
+        for type_file in type_files:
+            prev_file, new_file = self.release_pair(type_file)
+            sorted_pair = sorted_copy(prev_file), sorted_copy(new_file)
+            sorted_pairs.append(sorted_pair)
+            for status, line in tqdm(
+                diff_sorted(*sorted_pair), desc=f"Diffing `{type_file}`"
+            ):
+                if status == "=" or not accepted_type(line):
+                    continue
+                if is_type_triple(line):
+                    changed.add(parse_triple(line)[0])
+
+        for inst in changed:
+            self.old_types[inst] = self.type_dict.pop(inst, set[str]())
+
+        # an instance may keep a type through another type file, so re-collect them
+        for _, new_file in sorted_pairs:
+            with open(new_file, "r") as f:
+                for line in tqdm(f, desc=f"Re-collecting types from `{new_file}`"):
+                    if not accepted_type(line) or not is_type_triple(line):
+                        continue
+                    s, _, o = parse_triple(line)
+                    if s in changed:
+                        self.type_dict.setdefault(s, set[str]()).add(o)
+
+        print(f"Detected `{len(changed)}` instances with changed types")
+        return self
+
+    def count(self, s_types: set[str], p: str, o_types: set[str], delta: int):
+        for s_type in s_types:
+            for o_type in o_types:
+                key = (s_type, p, o_type)
+                support = self.support.get(key, 0)
+                self.changed_support.setdefault(key, support)
+                self.support[key] = support + delta
+
+    def apply_triple_delta(self):
+        def types_of(inst: str, prev: bool) -> set[str]:
+            if prev and inst in self.old_types:
+                return self.old_types[inst]
+            return self.type_dict.get(inst, set[str]())
+
+        for file in resource_pool_files():
+            prev_file, new_file = self.release_pair(file)
+            sorted_pair = sorted_copy(prev_file), sorted_copy(new_file)
+            for status, line in tqdm(
+                diff_sorted(*sorted_pair), desc=f"Diffing `{file}`"
+            ):
+                if not accepted_triple(line):
+                    continue
+                s, p, o = parse_triple(line)
+                if status == "=":
+                    if s not in self.old_types and o not in self.old_types:
+                        continue
+                    self.count(types_of(s, True), p, types_of(o, True), -1)
+                    self.count(types_of(s, False), p, types_of(o, False), +1)
+                    continue
+                if status == "-":
+                    self.count(types_of(s, True), p, types_of(o, True), -1)
+                else:
+                    self.count(types_of(s, False), p, types_of(o, False), +1)
+                if s in self.sampled_instances:
+                    (self.removed_ii if status == "-" else self.added_ii).append(
+                        (s, p, o)
+                    )
+
+        return self
+
+    def export_schema(self):
+        added_edges = list[SchemaEdge]()
+        removed_edges = set[SchemaEdge]()
+        for key, prev_support in self.changed_support.items():
+            support = self.support[key]
+            if support <= 0:
+                del self.support[key]
+            if prev_support <= 0 < support:
+                added_edges.append(key)
+            elif support <= 0 < prev_support:
+                removed_edges.add(key)
+
+        print(f"Serializing `{SCHEMA_EDGE_SUPPORT_FILE}` ... ", end="")
+        with open(SCHEMA_EDGE_SUPPORT_FILE, "w") as f:
+            for (s_type, p, o_type), support in self.support.items():
+                f.write(f"{s_type} {p} {o_type} {support}\n")
+        print("Done!")
+
+        print(f"Serializing type_dict to ndjson ... ", end="")
+        dump_type_dict(self.type_dict, TYPE_DICT_SERIALIZED)
+        print("Done!")
+
+        # keep the order of existing lines, so unchanged edges stay where they were
+        with open(f"{SCHEMA_EDGES_GENERAL}.txt", "r") as f:
+            edges = [tuple(line.split()[0:3]) for line in f]
+        edges = [e for e in edges if e not in removed_edges] + added_edges
+        with open(f"{SCHEMA_VERTICES_GENERAL}.txt", "r") as f:
+            prev_vertices = [line.strip() for line in f]
+        appeared = set(t for s_type, _, o_type in edges for t in (s_type, o_type))
+        prev_vertex_set = set(prev_vertices)
+        added_vertices = sorted(appeared - prev_vertex_set)
+        removed_vertices = sorted(prev_vertex_set - appeared)
+
+        for path, lines in [
+            (f"{SCHEMA_EDGES_GENERAL}.txt", [" ".join(e) for e in edges]),
+            (f"{SCHEMA_EDGES_GENERAL}.added.txt", [" ".join(e) for e in added_edges]),
+            (
+                f"{SCHEMA_EDGES_GENERAL}.removed.txt",
+                [" ".join(e) for e in sorted(removed_edges)],
+            ),
+            (
+                f"{SCHEMA_VERTICES_GENERAL}.txt",
+                [v for v in prev_vertices if v in appeared] + added_vertices,
+            ),
+            (f"{SCHEMA_VERTICES_GENERAL}.added.txt", added_vertices),
+            (f"{SCHEMA_VERTICES_GENERAL}.removed.txt", removed_vertices),
+        ]:
+            with open(path, "w") as f:
+                for line in lines:
+                    f.write(f"{line}\n")
+
+        print(
+            f"Schema delta: +{len(added_edges)}/-{len(removed_edges)} edges, +{len(added_vertices)}/-{len(removed_vertices)} vertices"
+        )
+        return self
+
+    def export_relationships(self):
+        # ids are append-only, so removed types / instances keep theirs
+        schema_to_csv.build_type_node_name_id_dict()
+        schema_to_csv.type_nodes(
+            f"{SCHEMA_VERTICES_GENERAL}.added.txt", f"{schema_to_csv.NODES}.added.csv"
+        )
+        for tag in ["added", "removed"]:
+            schema_to_csv.tt_relationships(
+                f"{SCHEMA_EDGES_GENERAL}.{tag}.txt",
+                f"{schema_to_csv.RELATIONSHIP}.{tag}.csv",
+            )
+
+        names = set(t for s, _, o in self.added_ii for t in (s, o))
+        id_map, new_names = open_compact_id_map(
+            instance_to_csv.INSTANCE_ID_SERIALIZED, names
+        )
+        with CsvWriter(
+            f"{instance_to_csv.I_NODES_CSV_FILE[:-4]}.added.csv",
+            [f":ID({instance_to_csv.NAMESPACE})", "Name", ":LABEL"],
+        ) as writer:
+            for name, id in zip(new_names, id_map.lookup_batch(new_names)):
+                writer.write_row([str(id), quoted(name), "Instance"])
+
+        for tag, triples in [("added", self.added_ii), ("removed", self.removed_ii)]:
+            output = f"{instance_to_csv.II_RELATIONSHIPS_CSV_FILE[:-4]}.{tag}.csv"
+            s_ids = id_map.lookup_batch([s for s, _, _ in triples], default=-1)
+            o_ids = id_map.lookup_batch([o for _, _, o in triples], default=-1)
+            with CsvWriter(
+                output, instance_to_csv.ii_headers(), total=len(triples), desc=output
+            ) as writer:
+                for (s, p, o), s_id, o_id in zip(triples, s_ids, o_ids):
+                    if s_id < 0 or o_id < 0:
+                        continue  # never exported
+                    TYPE = (
+                        escaped(p)
+                        if hasOption("USE_PRED_TYPE")
+                        else instance_to_csv.II_RELATION_TYPE
+                    )
+                    row = [str(s_id), str(o_id), TYPE, quoted(s), quoted(o)]
+                    row += [] if hasOption("USE_PRED_TYPE") else [quoted(p)]
+                    writer.write_row(row)
+
+        return self
+
+    def exec(self):
+        self.load_previous_state()
+        self.apply_type_delta()
+        self.apply_triple_delta()
+        self.export_schema()
+        self.export_relationships()
+        print("Successfully applied the release delta ...")
+
+
+if __name__ == "__main__":
+    DeltaSchemaExtractor().exec()
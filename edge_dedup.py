@@ -0,0 +1,171 @@
+"""
+Instance edge deduplication on `64-bit` fingerprints (`sketches::fingerprint64`) instead of IRI strings.
+
+- `FingerprintSet`: growable set of `uint64` fingerprints, kept as sorted NumPy runs of doubling sizes
+  (merged like an LSM tree), so a whole batch is looked up with one `searchsorted` per run;
+  optionally maps every fingerprint to an `int64` value
+- `EdgeDeduplicator`: appends `(s, p, o)` edges to a tab-separated spool file unless already seen,
+  exactly within a batch and by fingerprint across batches, under `env::COLLISION_POLICY` (`DBPEDIA_COLLISION_POLICY`):
+  - `trust`: a seen fingerprint is a duplicate, so distinct edges sharing one are dropped
+    (about `n / 2^65` of `n` edges, see `expected_false_dedups`)
+  - `verify`: every fingerprint also keeps the spool offset of its edge and each hit is compared
+    against the spooled edge, so nothing is dropped by mistake (8 more bytes per edge, one spool read per hit)
+"""
+
+from sketches import fingerprint64
+from typing import BinaryIO, Iterator, Optional
+from env import COLLISION_POLICY
+import numpy as np
+
+COLLISION_POLICIES = ["trust", "verify"]
+
+Edge = tuple[str, str, str]
+
+
+class FingerprintSet:
+    def __init__(self, with_values: bool = False) -> None:
+        self.runs = list[tuple[np.ndarray, Optional[np.ndarray]]]()
+        """ `[(sorted fingerprints, values)]`, sizes decreasing """
+        self.with_values = with_values
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys, _ in self.runs)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            keys.nbytes + (values.nbytes if values is not None else 0)
+            for keys, values in self.runs
+        )
+
+    def find(self, fingerprints: np.ndarray) -> np.ndarray:
+        """
+        Value (`0` without values) of every fingerprint, `-1` for the ones not in the set.
+        """
+        found = np.full(len(fingerprints), -1, dtype=np.int64)
+        for keys, values in self.runs:
+            positions = np.minimum(np.searchsorted(keys, fingerprints), len(keys) - 1)
+            hits = (keys[positions] == fingerprints) & (found < 0)
+            found[hits] = values[positions[hits]] if values is not None else 0
+        return found
+
+    def add(self, fingerprints: np.ndarray, values: Optional[np.ndarray] = None):
+        keys = fingerprints.astype(np.uint64)
+        values = values.astype(np.int64) if self.with_values else None
+        while self.runs and len(self.runs[-1][0]) <= len(keys):
+            run_keys, run_values = self.runs.pop()
+            keys = np.concatenate([run_keys, keys])
+            if self.with_values:
+                values = np.concatenate([run_values, values])
+        order = np.argsort(keys, kind="stable")
+        self.runs.append((keys[order], values[order] if self.with_values else None))
+
+
+def fingerprints_of(lines: list[str]) -> np.ndarray:
+    return np.fromiter(map(fingerprint64, lines), dtype=np.uint64, count=len(lines))
+
+
+class EdgeDeduplicator:
+    """
+    `find_new(batch)` marks the edges of `batch` not seen so far (nothing is recorded yet),
+    `append(edges)` spools and records the ones actually kept.
+    """
+
+    def __init__(self, spool_path: str, policy: str = COLLISION_POLICY) -> None:
+        if policy not in COLLISION_POLICIES:
+            raise ValueError(f"Unknown collision policy `{policy}`")
+        self.policy = policy
+        self.spool_path = spool_path
+        self.spool = open(spool_path, "wb")
+        self.reader: Optional[BinaryIO] = None
+        self.offset = 0
+        self.fingerprints = FingerprintSet(with_values=policy == "verify")
+        self.num_of_edges = 0
+        self.collided = set[Edge]()
+        """ `verify` only: kept edges whose fingerprint was already taken by another edge """
+
+    def spooled_edge(self, offset: int) -> Edge:
+        if self.reader is None:
+            self.reader = open(self.spool_path, "rb")
+        self.reader.seek(offset)
+        s, p, o = self.reader.readline().decode().rstrip("\n").split("\t")
+        return s, p, o
+
+    def find_new(self, batch: list[Edge]) -> list[bool]:
+        lines = ["\t".join(edge) for edge in batch]
+        found = self.fingerprints.find(fingerprints_of(lines)).tolist()
+        if self.policy == "verify" and any(offset >= 0 for offset in found):
+            self.spool.flush()
+        seen = set[Edge]()
+        new = list[bool]()
+        for edge, offset in zip(batch, found):
+            if edge in seen:
+                new.append(False)
+                continue
+            seen.add(edge)
+            if offset < 0:
+                new.append(True)
+            elif self.policy == "trust":
+                new.append(False)
+            else:
+                new.append(
+                    self.spooled_edge(offset) != edge and edge not in self.collided
+                )
+        return new
+
+    def append(self, edges: list[Edge]):
+        if not edges:
+            return
+        lines = ["\t".join(edge) for edge in edges]
+        fingerprints = fingerprints_of(lines)
+        offsets = np.zeros(len(lines), dtype=np.int64)
+        if self.policy == "verify":
+            taken = set(
+                fingerprints[self.fingerprints.find(fingerprints) >= 0].tolist()
+            )
+            for edge, fingerprint in zip(edges, fingerprints.tolist()):
+                if fingerprint in taken:
+                    self.collided.add(edge)
+                taken.add(fingerprint)
+        for i, line in enumerate(lines):
+            data = (line + "\n").encode()
+            offsets[i] = self.offset
+            self.spool.write(data)
+            self.offset += len(data)
+        self.fingerprints.add(fingerprints, offsets)
+        self.num_of_edges += len(edges)
+
+    def close(self):
+        self.spool.close()
+        if self.reader is not None:
+            self.reader.close()
+
+    def expected_false_dedups(self) -> float:
+        """
+        Expected number of distinct edges dropped under `trust` (`n (n - 1) / 2^65`).
+        """
+        n = self.num_of_edges
+        return n * (n - 1) / 2.0**65
+
+    def report(self) -> str:
+        n = self.num_of_edges
+        report = (
+            f"{n} edges, {self.fingerprints.nbytes / 2**20:.1f} MiB of fingerprints"
+        )
+        if self.policy == "trust":
+            rate = self.expected_false_dedups() / n if n else 0.0
+            return f"{report}, estimated false-dedup rate {rate:.2e} ({self.expected_false_dedups():.2e} edges)"
+        return f"{report}, {len(self.collided)} verified fingerprint collisions"
+
+
+def iter_spooled_edges(path: str) -> Iterator[Edge]:
+    with open(path, "r") as f:
+        for line in f:
+            s, p, o = line.rstrip("\n").split("\t")
+            yield s, p, o
+
+
+def dump_spooled_edges(edges: Iterator[Edge], path: str):
+    with open(path, "w") as f:
+        for edge in edges:
+            f.write("\t".join(edge) + "\n")
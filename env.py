@@ -1,4 +1,27 @@
 import os
 
+
+def env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
 ENV = os.path.expanduser("~")
-DATASET = f"{ENV}/dbpedia_dataset"
+DATASET = os.environ.get("DBPEDIA_DATASET", f"{ENV}/dbpedia_dataset")
+PREV_DATASET = os.environ.get("DBPEDIA_PREV_DATASET", f"{ENV}/dbpedia_dataset_prev")
+
+"""
+Performance knobs, read from environment variables (also set by `main.py`'s flags):
+- `DBPEDIA_WORKERS`: worker processes for parallel scans
+- `DBPEDIA_CHUNK_SIZE`: rows per batch / record batch / chunk
+- `DBPEDIA_MEMORY_BUDGET`: buffer size of external sorts (`sort -S`, e.g. `2G`, `50%`)
+- `DBPEDIA_OUTPUT_FORMAT`: `csv`, or `parquet` / `arrow` to also write the columnar export
+- `DBPEDIA_CHECKPOINT_INTERVAL`: seconds between scan checkpoints (`0` disables them, see `checkpoint`)
+- `DBPEDIA_COLLISION_POLICY`: `trust` or `verify` fingerprint collisions when deduplicating instance edges (see `edge_dedup`)
+"""
+NUM_OF_WORKERS = env_int("DBPEDIA_WORKERS", os.cpu_count() or 1)
+CHUNK_SIZE = env_int("DBPEDIA_CHUNK_SIZE", 1 << 16)
+MEMORY_BUDGET = os.environ.get("DBPEDIA_MEMORY_BUDGET", "")
+OUTPUT_FORMAT = os.environ.get("DBPEDIA_OUTPUT_FORMAT", "csv")
+CHECKPOINT_INTERVAL = env_int("DBPEDIA_CHECKPOINT_INTERVAL", 600)
+COLLISION_POLICY = os.environ.get("DBPEDIA_COLLISION_POLICY", "trust")
@@ -0,0 +1,54 @@
+"""
+Append-only `name -> id` maps (`{name} {id}` per line).
+
+Existing names always keep their ids, new names are appended in sorted order,
+so ids are deterministic across runs and processes.
+"""
+
+import os
+import numpy as np
+from typing import Iterable, Optional
+from tqdm.auto import tqdm
+
+
+class DictIdMap(dict[str, int]):
+    """
+    In-memory `name -> id` map, with the same `lookup_batch` as `compact_id_map.CompactIdMap`.
+    """
+
+    def lookup_batch(
+        self, names: Iterable[str], default: Optional[int] = None
+    ) -> np.ndarray:
+        if default is None:
+            return np.fromiter((self[name] for name in names), dtype=np.int64)
+        return np.fromiter((self.get(name, default) for name in names), dtype=np.int64)
+
+
+def load_id_map(path: str, id_map: dict[str, int]) -> dict[str, int]:
+    if not os.path.exists(path):
+        return id_map
+    with open(path, "r") as f:
+        lines = f.readlines()
+    with tqdm(total=len(lines), desc=f"Loading id_map from `{path}`") as bar:
+        for line in lines:
+            name, id = line.strip().split()
+            id_map[name] = int(id)
+            bar.update(1)
+    return id_map
+
+
+def extend_id_map(path: str, id_map: dict[str, int], names: Iterable[str]) -> list[str]:
+    """
+    Assign ids to `names` missing in `id_map` and append them to `path`.
+
+    Returns the newly assigned names.
+    """
+    new_names = sorted(set(name for name in names if name not in id_map))
+    next_id = max(id_map.values(), default=-1) + 1
+    with open(path, "a") as f:
+        with tqdm(total=len(new_names), desc=f"Appending new ids to `{path}`") as bar:
+            for cnt, name in enumerate(new_names):
+                id_map[name] = next_id + cnt
+                f.write(f"{name} {next_id + cnt}\n")
+                bar.update(1)
+    return new_names
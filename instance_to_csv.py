@@ -15,32 +15,41 @@ By adding `INST_LITERAL_PROPERTY` in `options::OPTIONS`, we will also consider `
 from local_schema_extractor import (
     pre_check,
     TypeDict,
-    LPVTableDecoder,
-    LPVTableEncoder,
-    TypeDictDecoder,
-    TypeDictEncoder,
     OUT_PATH,
     DUMP_PATH,
+    TYPE_DICT_SERIALIZED,
+    PREFIXES_FILE,
+    dump_exists,
+    load_lpv_table,
+    dump_type_dict,
+    load_type_dict,
 )
 from tqdm.auto import tqdm
 from env import DATASET
-from main import all_satisfied
+from utils import all_satisfied
 from options import hasOption
-import schema_to_csv, json, os, subprocess
-
-SPOTable = dict[str, dict[str, set[str]]]
-""" `{subject(inst): {predicate: {object(inst)}}}` """
-SPOEncoder = LPVTableEncoder
-""" `SPOTableEncoder (toJson)` """
-SPODecoder = LPVTableDecoder
-""" `SPOTableDecoder (fromJson)` """
+from triple_filter import TRIPLE_FILTER
+from curie import compact, dump_prefixes
+from compact_id_map import CompactIdMap, open_compact_id_map
+from csr import save_csr, save_predicates
+from csv_writer import CsvWriter, quoted, escaped
+from edge_dedup import EdgeDeduplicator, iter_spooled_edges, dump_spooled_edges
+from io_pipeline import batched
+from line_index import count_lines
+from id_map import DictIdMap
+from pipeline_session import PipelineSession
+from typing import Optional
+import numpy as np
+import schema_to_csv, literal_to_csv, os
 
 INST_SRC = f"{DATASET}/mappingbased-objects_lang=en.ttl"
-TYPE_DICT_SRC = f"{DUMP_PATH}/type_dict.json"
+TYPE_DICT_SRC = TYPE_DICT_SERIALIZED
 
-SPO_TABLE_SERIALIZED = f"{DUMP_PATH}/spo_table.json"
+SPO_EDGES_SERIALIZED = f"{DUMP_PATH}/spo_edges.tsv"
+""" deduplicated `s\tp\to` lines, in input order """
+LEGACY_SPO_TABLE_SERIALIZED = f"{DUMP_PATH}/spo_table.ndjson"
 SAMPLED_INSTANCES = f"{DUMP_PATH}/sampled_instances.txt"
-SAMPLED_TYPE_DICT_SERIALIZED = f"{DUMP_PATH}/sampled_type_dict.json"
+SAMPLED_TYPE_DICT_SERIALIZED = f"{DUMP_PATH}/sampled_type_dict.ndjson"
 
 TYPE_ID_SERIALIZED = f"{OUT_PATH}/type_node_name_id_map.txt"
 INSTANCE_ID_SERIALIZED = f"{OUT_PATH}/instance_node_name_id_map.txt"
@@ -50,16 +59,18 @@ IT_NODES_CSV_FILE = f"{OUT_PATH}/instance_type_nodes.csv"
 MIN_I_NODES_CSV_FILE = f"{OUT_PATH}/minimum_instance_nodes.csv"
 II_RELATIONSHIPS_CSV_FILE = f"{OUT_PATH}/instance_instance_relationships.csv"
 IT_RELATIONSHIPS_CSV_FILE = f"{OUT_PATH}/instance_type_relationships.csv"
+INSTANCE_CSR_PATH = f"{OUT_PATH}/instance_csr"
 
 NAMESPACE = "Instance"
 UPPER_LIMIT = int(1e5)
 
-spo_table = SPOTable()
+spo_edges_file = SPO_EDGES_SERIALIZED
+""" edges exported by `ii_relationships` (`subgraph_extractor` points it to its own spool) """
 inst_set = set[str]()
 original_type_dict = TypeDict()
 sampled_type_dict = TypeDict()
-type_node_name_id_dict = dict[str, int]()
-instance_node_name_id_dict = dict[str, int]()
+type_node_name_id_dict: CompactIdMap | DictIdMap
+instance_node_name_id_dict: CompactIdMap
 
 num_of_ii_relationships = 0
 num_of_it_relationships = 0
@@ -69,27 +80,67 @@ finished_task_name_list = [
 ]
 
 
-def build_spo_table_and_inst_set():
+def use_output_path(out_path: str):
+    """
+    Write the instance csvs / CSR and keep `INSTANCE_ID_SERIALIZED` under `out_path` instead of `OUT_PATH`
+    (e.g. `subgraph_extractor`'s export), so the main export and its id map are left untouched.
+    `TYPE_ID_SERIALIZED` is kept, type ids belong to the schema export.
+    """
+    global INSTANCE_ID_SERIALIZED, I_NODES_CSV_FILE, IT_NODES_CSV_FILE, MIN_I_NODES_CSV_FILE
+    global II_RELATIONSHIPS_CSV_FILE, IT_RELATIONSHIPS_CSV_FILE, INSTANCE_CSR_PATH
+    os.makedirs(out_path, exist_ok=True)
+    INSTANCE_ID_SERIALIZED = f"{out_path}/instance_node_name_id_map.txt"
+    I_NODES_CSV_FILE = f"{out_path}/instance_nodes.csv"
+    IT_NODES_CSV_FILE = f"{out_path}/instance_type_nodes.csv"
+    MIN_I_NODES_CSV_FILE = f"{out_path}/minimum_instance_nodes.csv"
+    II_RELATIONSHIPS_CSV_FILE = f"{out_path}/instance_instance_relationships.csv"
+    IT_RELATIONSHIPS_CSV_FILE = f"{out_path}/instance_type_relationships.csv"
+    INSTANCE_CSR_PATH = f"{out_path}/instance_csr"
+
+
+def convert_legacy_spo_table():
     """
+    `spo_table.ndjson` (`{s: {p: {o}}}`) of earlier runs -> `SPO_EDGES_SERIALIZED`.
+    """
+    print(f"Converting legacy `spo_table` to `{SPO_EDGES_SERIALIZED}` ... ", end="")
+    spo_table = load_lpv_table(LEGACY_SPO_TABLE_SERIALIZED)
+    dump_spooled_edges(
+        (
+            (s, p, o)
+            for s, p_dict in spo_table.items()
+            for p, objects in p_dict.items()
+            for o in objects
+        ),
+        SPO_EDGES_SERIALIZED,
+    )
+    print("Done!")
+
+
+def build_spo_edges_and_inst_set():
+    """
+    Deduplicated `(s: Instance)-[p]->(o: Instance)` edges are spooled into `SPO_EDGES_SERIALIZED`,
+    only their `64-bit` fingerprints are held in memory (see `edge_dedup`).
+
     BUG: May lose properties of instances `iff` appeared num of instances arrived the `UPPER_LIMIT`.
     """
 
-    global spo_table, inst_set, num_of_ii_relationships
+    global inst_set, num_of_ii_relationships
+
+    if (
+        not os.path.exists(SPO_EDGES_SERIALIZED)
+        and dump_exists(LEGACY_SPO_TABLE_SERIALIZED)
+        and os.path.exists(SAMPLED_INSTANCES)
+    ):
+        convert_legacy_spo_table()
 
-    if all_satisfied(os.path.exists, SPO_TABLE_SERIALIZED, SAMPLED_INSTANCES):
+    if os.path.exists(SPO_EDGES_SERIALIZED) and os.path.exists(SAMPLED_INSTANCES):
         print(
-            f"Detected existing `spo_table.json` and `sampled_instances.txt`",
+            f"Detected existing `spo_edges` and `sampled_instances.txt`",
         )
 
-        print(f"Loading `spo_table` ... ", end="")
-        with open(SPO_TABLE_SERIALIZED, "r") as f:
-            spo_table = json.loads(f.read(), cls=SPODecoder)
-        print("Done!")
-
-        num_of_lines = int(
-            subprocess.check_output(["wc", "-l", SAMPLED_INSTANCES]).split()[0]
-        )
-        with tqdm(total=num_of_lines, desc="Loading `inst_set`") as bar:
+        with tqdm(
+            total=count_lines(SAMPLED_INSTANCES), desc="Loading `inst_set`"
+        ) as bar:
             with open(SAMPLED_INSTANCES, "r") as f:
                 f.seek(0)
                 for inst in f:
@@ -100,28 +151,37 @@ def build_spo_table_and_inst_set():
 
     pre_check()
 
-    with tqdm(total=UPPER_LIMIT, desc=f"Building spo_table from `{INST_SRC}`") as bar:
-        with open(INST_SRC, "r") as f:
-            for line in f:
-                if len(inst_set) >= UPPER_LIMIT:
+    dedup = EdgeDeduplicator(f"{SPO_EDGES_SERIALIZED}.tmp")
+    with tqdm(total=UPPER_LIMIT, desc=f"Building spo_edges from `{INST_SRC}`") as bar:
+        with open(INST_SRC, "rb") as f:
+            for lines in batched(f):
+                triples = list[tuple[str, str, str]]()
+                for line in lines:
+                    fields = line.split()[0:3]
+                    if TRIPLE_FILTER and not TRIPLE_FILTER.accept_triple(*fields):
+                        continue
+                    s, p, o = [compact(literal[1:-1].decode()) for literal in fields]
+                    triples.append((s, p, o))
+                kept = list[tuple[str, str, str]]()
+                full = False
+                for edge, is_new in zip(triples, dedup.find_new(triples)):
+                    if len(inst_set) >= UPPER_LIMIT:
+                        full = True
+                        break
+                    if not is_new:
+                        continue
+                    kept.append(edge)
+                    for inst in (edge[0], edge[2]):
+                        if inst not in inst_set:
+                            inst_set.add(inst)
+                            bar.update(1)
+                dedup.append(kept)
+                if full:
                     break
-                s, p, o = [literal[1:-1] for literal in line.strip().split()[0:3]]
-                if s not in spo_table:
-                    spo_table[s] = {}
-                    inst_set.add(s)
-                    bar.update(1)
-                if p not in spo_table[s]:
-                    spo_table[s][p] = set()
-                if o not in spo_table[s][p]:
-                    num_of_ii_relationships += 1
-                    spo_table[s][p].add(o)
-                    inst_set.add(o)
-                    bar.update(1)
-
-    print(f"Serializing spo_table to json ... ", end="")
-    with open(SPO_TABLE_SERIALIZED, "w") as f:
-        f.write(json.dumps(spo_table, cls=SPOEncoder, indent=2))
-    print("Done!")
+    dedup.close()
+    os.replace(f"{SPO_EDGES_SERIALIZED}.tmp", SPO_EDGES_SERIALIZED)
+    num_of_ii_relationships = dedup.num_of_edges
+    print(f"`spo_edges`: {dedup.report()}")
 
     with tqdm(total=len(inst_set), desc="Serializing inst_set to txt") as bar:
         with open(SAMPLED_INSTANCES, "w") as f:
@@ -130,28 +190,29 @@ def build_spo_table_and_inst_set():
                 bar.update(1)
 
 
-def sample_the_type_dict():
+def sample_the_type_dict(session: Optional[PipelineSession] = None):
     global original_type_dict, sampled_type_dict, inst_set, num_of_it_relationships
 
-    if all_satisfied(os.path.exists, SAMPLED_TYPE_DICT_SERIALIZED):
+    if all_satisfied(dump_exists, SAMPLED_TYPE_DICT_SERIALIZED):
         print(
-            f"Detected existing `sampled_type_dict.json`, loading from it instead of rebuilding ... ",
+            f"Detected existing `sampled_type_dict`, loading from it instead of rebuilding ... ",
             end="",
         )
-        with open(SAMPLED_TYPE_DICT_SERIALIZED, "r") as f:
-            sampled_type_dict = json.loads(f.read(), cls=TypeDictDecoder)
+        sampled_type_dict = load_type_dict(SAMPLED_TYPE_DICT_SERIALIZED)
         print("Done!")
         return
 
     pre_check()
 
-    print(
-        f"Building original_type_dict from `{TYPE_DICT_SRC}` ... ",
-        end="",
-    )
-    with open(TYPE_DICT_SRC, "r") as f:
-        original_type_dict = json.loads(f.read(), cls=TypeDictDecoder)
-    print("Done!")
+    if session:
+        original_type_dict = session.type_dict
+    else:
+        print(
+            f"Building original_type_dict from `{TYPE_DICT_SRC}` ... ",
+            end="",
+        )
+        original_type_dict = load_type_dict(TYPE_DICT_SRC)
+        print("Done!")
 
     with tqdm(total=len(inst_set), desc="Sampling type_dict") as bar:
         for inst in inst_set:
@@ -161,56 +222,30 @@ def sample_the_type_dict():
             bar.update(1)
 
     print(
-        f"Serializing sampled_type_dict to json ... ",
+        f"Serializing sampled_type_dict to ndjson ... ",
         end="",
     )
-    json_data = json.dumps(sampled_type_dict, cls=TypeDictEncoder, indent=2)
-    with open(SAMPLED_TYPE_DICT_SERIALIZED, "w") as f:
-        f.write(json_data)
+    dump_type_dict(sampled_type_dict, SAMPLED_TYPE_DICT_SERIALIZED)
     print("Done!")
 
 
-def load_type_node_name_id_dict():
+def load_type_node_name_id_dict(session: Optional[PipelineSession] = None):
     global type_node_name_id_dict
-    if os.path.exists(TYPE_ID_SERIALIZED):
-        with open(TYPE_ID_SERIALIZED, "r") as f:
-            lines = f.readlines()
-            with tqdm(
-                total=len(lines),
-                desc=f"Loading `type_node_name_id_dict` from `{TYPE_ID_SERIALIZED}`",
-            ) as bar:
-                for line in lines:
-                    name, id = line.strip().split()
-                    type_node_name_id_dict[name] = int(id)
-                    bar.update(1)
+    if session and session.type_node_name_id_dict is not None:
+        type_node_name_id_dict = session.type_node_name_id_dict
+        return
+    type_node_name_id_dict, _ = open_compact_id_map(TYPE_ID_SERIALIZED)
 
 
 def build_instance_node_name_id_dict():
     global instance_node_name_id_dict
 
-    if os.path.exists(INSTANCE_ID_SERIALIZED):
-        with open(INSTANCE_ID_SERIALIZED, "r") as f:
-            lines = f.readlines()
-            with tqdm(
-                total=len(lines),
-                desc=f"Loading `instance_node_name_id_dict` from `{INSTANCE_ID_SERIALIZED}`",
-            ) as bar:
-                for line in lines:
-                    name, id = line.strip().split()
-                    instance_node_name_id_dict[name] = int(id)
-                    bar.update(1)
-        return
-
-    with open(INSTANCE_ID_SERIALIZED, "w") as f:
-        with tqdm(
-            total=len(inst_set),
-            desc=f"Building `instance_node_name_id_dict` from `inst_set`",
-        ) as bar:
-            for cnt, name in enumerate(inst_set):
-                id = cnt
-                instance_node_name_id_dict[name] = id
-                f.write(f"{name} {id}\n")
-                bar.update(1)
+    instance_node_name_id_dict, new_names = open_compact_id_map(
+        INSTANCE_ID_SERIALIZED, inst_set
+    )
+    print(
+        f"`instance_node_name_id_dict`: {len(instance_node_name_id_dict)} ids, {len(new_names)} newly assigned"
+    )
 
 
 def i_nodes(append_types_into_label: bool = True):
@@ -219,25 +254,23 @@ def i_nodes(append_types_into_label: bool = True):
     used_inst_set = (
         sampled_type_dict.keys() if hasOption("USE_TYPE_LABEL") else inst_set
     )
-    with tqdm(
+    use_type_label = hasOption("USE_TYPE_LABEL")
+    with CsvWriter(
+        I_NODES_CSV_FILE,
+        headers,
         total=len(used_inst_set),
         desc=f"Building `{I_NODES_CSV_FILE}`"
-        + (" (with `type_labels`)" if hasOption("USE_TYPE_LABEL") else ""),
-    ) as bar:
-        with open(I_NODES_CSV_FILE, "w") as f:
-            f.write(",".join(headers) + "\n")
-            for inst in used_inst_set:
-                type_labels = (
-                    list(sampled_type_dict[inst])
-                    if hasOption("USE_TYPE_LABEL") and inst in sampled_type_dict
-                    else []
-                )
-                name = f'"{inst}"'
-                id = instance_node_name_id_dict[inst]
-                label_str = ";".join(["Instance"] + type_labels)
-                row = [str(id), name, label_str]
-                f.write(",".join(row) + "\n")
-                bar.update(1)
+        + (" (with `type_labels`)" if use_type_label else ""),
+    ) as writer:
+        for inst in used_inst_set:
+            type_labels = (
+                list(sampled_type_dict[inst])
+                if use_type_label and inst in sampled_type_dict
+                else []
+            )
+            id = instance_node_name_id_dict[inst]
+            label_str = escaped(";".join(["Instance"] + type_labels))
+            writer.write_row([str(id), quoted(inst), label_str])
     finished_task_name_list.append(f"See `instance_nodes` at: `{I_NODES_CSV_FILE}`")
 
 
@@ -247,15 +280,14 @@ def minimum_i_nodes():
         sampled_type_dict.keys() if hasOption("USE_TYPE_LABEL") else inst_set
     )
     headers = [f":ID({NAMESPACE})"]
-    with tqdm(
-        total=len(used_inst_set), desc=f"Building `{MIN_I_NODES_CSV_FILE}`"
-    ) as bar:
-        with open(MIN_I_NODES_CSV_FILE, "w") as f:
-            f.write(",".join(headers) + "\n")
-            for inst in used_inst_set:
-                row = [str(instance_node_name_id_dict[inst])]
-                f.write(",".join(row) + "\n")
-                bar.update(1)
+    with CsvWriter(
+        MIN_I_NODES_CSV_FILE,
+        headers,
+        total=len(used_inst_set),
+        desc=f"Building `{MIN_I_NODES_CSV_FILE}`",
+    ) as writer:
+        for inst in used_inst_set:
+            writer.write_row([str(instance_node_name_id_dict[inst])])
     finished_task_name_list.append(
         f"See `minimum_instance_nodes` at: `{MIN_I_NODES_CSV_FILE}`"
     )
@@ -264,37 +296,29 @@ def minimum_i_nodes():
 def it_nodes():
     global sampled_type_dict, type_node_name_id_dict, instance_node_name_id_dict, finished_task_name_list
     headers = [f":ID({NAMESPACE})", "Name", "TypeIdList"]
-    length = 0
-    for e in sampled_type_dict.values():
-        length += len(e)
-    with tqdm(
-        total=length,
+    with CsvWriter(
+        IT_NODES_CSV_FILE,
+        headers,
+        total=len(sampled_type_dict),
         desc=f"Building `{IT_NODES_CSV_FILE}`",
-    ) as bar:
-        with open(IT_NODES_CSV_FILE, "w") as f:
-            f.write(",".join(headers) + "\n")
-            for inst in sampled_type_dict.keys():
-                name = f'"{inst}"'
-                id = instance_node_name_id_dict[inst]
-                type_id_list = list[str]()
-                for ontology in sampled_type_dict[inst]:
-                    type_id_list.append(str(type_node_name_id_dict[ontology]))
-                    bar.update(1)
-                label_str = ";".join(type_id_list)
-                row = [str(id), name, label_str]
-                f.write(",".join(row) + "\n")
+    ) as writer:
+        for inst in sampled_type_dict.keys():
+            id = instance_node_name_id_dict[inst]
+            type_id_list = [
+                str(type_node_name_id_dict[ontology])
+                for ontology in sampled_type_dict[inst]
+            ]
+            writer.write_row([str(id), quoted(inst), ";".join(type_id_list)])
     finished_task_name_list.append(
         f"See `instance_type_nodes` at: `{IT_NODES_CSV_FILE}`"
     )
 
 
-def ii_relationships():
-    """
-    `(s: Instance)-[p]->(o: Instance)`'s csv builder.
-    """
-    global spo_table, instance_node_name_id_dict, finished_task_name_list
-    RELATION_TYPE = "InstInst"
-    headers = [
+II_RELATION_TYPE = "InstInst"
+
+
+def ii_headers() -> list[str]:
+    return [
         f":START_ID({NAMESPACE})",
         f":END_ID({NAMESPACE})",
         ":TYPE",
@@ -307,42 +331,94 @@ def ii_relationships():
             f"Predicate",  # option: 1. add namespace 2. change name (e.g. `predicate_between_instances`)
         ]
     )
-    with tqdm(
+
+
+def ii_relationships():
+    """
+    `(s: Instance)-[p]->(o: Instance)`'s csv builder.
+    """
+    global instance_node_name_id_dict, finished_task_name_list
+    RELATION_TYPE = II_RELATION_TYPE
+    headers = ii_headers()
+    csr_export = hasOption("INST_CSR_EXPORT")
+    csr_edges = list[np.ndarray](), list[np.ndarray](), list[np.ndarray]()
+    """ `(sources, targets, predicates)` chunks, one per batch of edges """
+    predicate_ids = dict[str, int]()
+    use_pred_type = hasOption("USE_PRED_TYPE")
+    predicate_fields = dict[str, tuple[str, list[str]]]()
+    """ `{p: (TYPE, [Predicate])}` """
+    edges = (
+        (s, p, o)
+        for s, p, o in iter_spooled_edges(spo_edges_file)
+        if not hasOption("PICK_SAMPLED_INST_ONLY") or s in sampled_type_dict.keys()
+    )
+    with CsvWriter(
+        II_RELATIONSHIPS_CSV_FILE,
+        headers,
         total=num_of_ii_relationships,
         desc=f"Building `{II_RELATIONSHIPS_CSV_FILE}`",
-    ) as bar:
-        with open(II_RELATIONSHIPS_CSV_FILE, "w") as f:
-            f.write(",".join(headers) + "\n")
-            for s in spo_table:
-                if hasOption("PICK_SAMPLED_INST_ONLY") and (
-                    s not in sampled_type_dict.keys()
-                ):
-                    continue
-                s_inst = f'"{s}"'
-                s_id = instance_node_name_id_dict[s]
-                for p in spo_table[s]:
-                    pred = f'"{p}"'
-                    TYPE = p if hasOption("USE_PRED_TYPE") else RELATION_TYPE
-                    for o in spo_table[s][p]:
-                        o_inst = f'"{o}"'
-                        o_id = instance_node_name_id_dict[o]
-                        f.write(
-                            ",".join(
-                                [
-                                    str(s_id),
-                                    str(o_id),
-                                    TYPE,
-                                    s_inst,
-                                    o_inst,
-                                ]
-                                + ([] if hasOption("USE_PRED_TYPE") else [pred])
-                            )
-                            + "\n"
-                        )
-                        bar.update(1)
+    ) as writer:
+        for batch in batched(edges):
+            s_ids = instance_node_name_id_dict.lookup_batch([s for s, _, _ in batch])
+            o_ids = instance_node_name_id_dict.lookup_batch([o for _, _, o in batch])
+            if csr_export:
+                csr_edges[0].append(s_ids.astype(np.int64))
+                csr_edges[1].append(o_ids)
+                csr_edges[2].append(
+                    np.fromiter(
+                        (
+                            predicate_ids.setdefault(p, len(predicate_ids))
+                            for _, p, _ in batch
+                        ),
+                        dtype=np.int32,
+                        count=len(batch),
+                    )
+                )
+            for (s, p, o), s_id, o_id in zip(batch, s_ids.tolist(), o_ids.tolist()):
+                if p not in predicate_fields:
+                    predicate_fields[p] = (
+                        (escaped(p), [])
+                        if use_pred_type
+                        else (RELATION_TYPE, [quoted(p)])
+                    )
+                TYPE, pred = predicate_fields[p]
+                writer.write_row(
+                    [str(s_id), str(o_id), TYPE, quoted(s), quoted(o)] + pred
+                )
     finished_task_name_list.append(
         f"See `instance_instance_relationships` at: `{II_RELATIONSHIPS_CSV_FILE}`"
     )
+    if csr_export:
+        dump_instance_csr(csr_edges, predicate_ids)
+
+
+def dump_instance_csr(
+    csr_edges: tuple[list[np.ndarray], list[np.ndarray], list[np.ndarray]],
+    predicate_ids: dict[str, int],
+):
+    """
+    `(s: Instance)-[p]->(o: Instance)` as CSR arrays (see `csr`), rows / targets are instance ids
+    of `INSTANCE_ID_SERIALIZED`, predicate ids are line numbers of `predicates.txt`.
+    """
+    global finished_task_name_list
+    os.makedirs(INSTANCE_CSR_PATH, exist_ok=True)
+    print(f"Building instance CSR into `{INSTANCE_CSR_PATH}` ... ", end="")
+    sources, targets, predicates = [
+        np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+        for chunks, dtype in zip(csr_edges, [np.int64, np.int64, np.int32])
+    ]
+    save_csr(
+        INSTANCE_CSR_PATH,
+        sources,
+        targets,
+        predicates,
+        instance_node_name_id_dict.max_id + 1,
+    )
+    save_predicates(INSTANCE_CSR_PATH, predicate_ids)
+    print("Done!")
+    finished_task_name_list.append(
+        f"See `instance_instance` CSR arrays at: `{INSTANCE_CSR_PATH}`"
+    )
 
 
 def it_relationships():
@@ -364,34 +440,56 @@ def it_relationships():
         "Start",
         "End",
     ]
-    with tqdm(
+    with CsvWriter(
+        IT_RELATIONSHIPS_CSV_FILE,
+        headers,
         total=num_of_it_relationships,
         desc=f"Building `{IT_RELATIONSHIPS_CSV_FILE}`",
-    ) as bar:
-        with open(IT_RELATIONSHIPS_CSV_FILE, "w") as f:
-            f.write(",".join(headers) + "\n")
-            for i in sampled_type_dict:
-                i_id = instance_node_name_id_dict[i]
-                for t in sampled_type_dict[i]:
-                    t_id = type_node_name_id_dict[t]
-                    inst, type = f'"{i}"', f'"{t}"'
-                    row = [str(i_id), str(t_id), RELATION_TYPE, inst, type]
-                    f.write(",".join(row) + "\n")
-                    bar.update(1)
+    ) as writer:
+        instances = list(sampled_type_dict)
+        i_ids = instance_node_name_id_dict.lookup_batch(instances)
+        for i, i_id in zip(instances, i_ids):
+            inst = quoted(i)
+            types = list(sampled_type_dict[i])
+            t_ids = type_node_name_id_dict.lookup_batch(types)
+            for t, t_id in zip(types, t_ids):
+                writer.write_row([str(i_id), str(t_id), RELATION_TYPE, inst, quoted(t)])
     finished_task_name_list.append(
         f"See `instance_instance_relationships` at: `{II_RELATIONSHIPS_CSV_FILE}`"
     )
 
 
+def il_properties(session: Optional[PipelineSession] = None):
+    """
+    `(s: Instance)-[p]->(o: Literal)`'s csv builder, see `literal_to_csv`.
+    """
+    if not hasOption("INST_LITERAL_PROPERTY"):
+        return
+
+    global inst_set, instance_node_name_id_dict, finished_task_name_list
+    if session:
+        type_dict = session.type_dict
+    elif dump_exists(TYPE_DICT_SRC):
+        type_dict = load_type_dict(TYPE_DICT_SRC)
+    else:
+        type_dict = None
+    literal_to_csv.inst_literal_properties(
+        inst_set, instance_node_name_id_dict, type_dict
+    )
+    finished_task_name_list.append(
+        f"See `instance_literal_properties` at: `{literal_to_csv.LITERAL_PROPERTIES_PATH}`"
+    )
+
+
 def notify_done():
     for info in finished_task_name_list:
         print(info)
 
 
-def exec():
-    build_spo_table_and_inst_set()
-    sample_the_type_dict()
-    load_type_node_name_id_dict()
+def exec(session: Optional[PipelineSession] = None):
+    build_spo_edges_and_inst_set()
+    sample_the_type_dict(session)
+    load_type_node_name_id_dict(session)
     build_instance_node_name_id_dict()
 
     i_nodes()
@@ -399,6 +497,8 @@ def exec():
     it_nodes()
     ii_relationships()
     it_relationships()
+    il_properties(session)
+    dump_prefixes(PREFIXES_FILE)
 
     notify_done()
 
@@ -0,0 +1,157 @@
+"""
+Threaded read -> parse -> write pipeline for line-oriented stages.
+
+- `read_line_chunks`: a reader thread fills `READ_BUFFER_SIZE` chunks (cut at line boundaries)
+- `BatchWriter`: a writer thread drains batches of rows, each batch joined into one string and written at once
+  (`batched` cuts an iterable into such batches)
+- `transform_lines`: both of them around a `parse` function running on the calling thread
+
+Stages are connected by bounded queues (`QUEUE_SIZE` chunks / batches), so disk I/O overlaps with parsing
+while memory stays bounded; exceptions raised by either thread are re-raised on the calling thread.
+"""
+
+from itertools import islice
+from queue import Queue
+from threading import Event, Thread
+from typing import Any, Callable, Iterable, Iterator, Optional
+from tqdm.auto import tqdm
+from env import CHUNK_SIZE
+import os
+
+READ_BUFFER_SIZE = 4 << 20
+QUEUE_SIZE = 8
+BATCH_SIZE = CHUNK_SIZE
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def read_line_chunks(
+    path: str, buffer_size: int = READ_BUFFER_SIZE, queue_size: int = QUEUE_SIZE
+) -> Iterator[tuple[list[str], int]]:
+    """
+    `(lines without "\\n", num_of_bytes)` chunks of `path`, read ahead by a reader thread.
+    The reader stops (and closes `path`) once the consumer is done, even if it stops early.
+    """
+    queue = Queue[Any](maxsize=queue_size)
+    stop = Event()
+
+    def put(item) -> bool:
+        if stop.is_set():
+            return False
+        queue.put(item)
+        return True
+
+    def read():
+        try:
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.readlines(buffer_size)
+                    if not chunk:
+                        break
+                    data = b"".join(chunk)
+                    lines = data.decode().split("\n")
+                    if lines[-1] == "":
+                        lines.pop()
+                    if not put((lines, len(data))):
+                        return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        put(_DONE)
+
+    reader = Thread(target=read, daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        """ frees a slot for a `put` that was already blocked, every later one sees `stop` """
+        while not queue.empty():
+            queue.get_nowait()
+        reader.join()
+
+
+class BatchWriter:
+    """
+    `with BatchWriter(path) as writer: writer.write_rows(rows)`, rows without `"\\n"`.
+    """
+
+    def __init__(
+        self, path: str, header: Optional[str] = None, queue_size: int = QUEUE_SIZE
+    ) -> None:
+        self.queue = Queue[Any](maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+        self.file = open(path, "w", newline="")
+        if header is not None:
+            self.file.write(header + "\n")
+        self.thread = Thread(target=self.drain, daemon=True)
+        self.thread.start()
+
+    def drain(self):
+        while True:
+            rows = self.queue.get()
+            if rows is _DONE:
+                return
+            if self.error:
+                continue  # keep draining so producers never block
+            try:
+                self.file.write("\n".join(rows) + "\n")
+            except BaseException as e:
+                self.error = e
+
+    def write_rows(self, rows: list[str]):
+        if self.error:
+            raise self.error
+        if rows:
+            self.queue.put(rows)
+
+    def close(self):
+        self.queue.put(_DONE)
+        self.thread.join()
+        self.file.close()
+        if self.error:
+            raise self.error
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def batched(items: Iterable[Any], size: int = BATCH_SIZE) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def transform_lines(
+    input_filename: str,
+    output_filename: str,
+    parse: Callable[[list[str]], Iterable[str]],
+    header: Optional[str] = None,
+    desc: Optional[str] = None,
+):
+    """
+    Write `parse(lines)` of every chunk of `input_filename` into `output_filename`.
+    """
+    with BatchWriter(output_filename, header) as writer, tqdm(
+        total=os.path.getsize(input_filename),
+        unit="B",
+        unit_scale=True,
+        desc=desc,
+    ) as bar:
+        for lines, num_of_bytes in read_line_chunks(input_filename):
+            writer.write_rows(list(parse(lines)))
+            bar.update(num_of_bytes)
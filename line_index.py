@@ -0,0 +1,151 @@
+"""
+Persistent line-offset sidecar index of (large) input files, instead of `wc -l` on every run.
+
+`line_index(file)` builds the index in one pass (newlines are found with NumPy, `READ_SIZE` bytes at a time)
+and stores it as `dump/line_index/{basename}.{path fingerprint}.npz`; later calls load it
+as long as the file's size and mtime are unchanged. An index holds:
+- `num_of_lines` (counted like `wc -l`, i.e. `"\\n"`s)
+- `offsets`: the byte offset of every `STRIDE`-th line, so any line is at most `STRIDE - 1` `readline`s away
+
+Used for progress totals (`count_lines`), line-aligned chunk boundaries (`LineIndex.byte_ranges`)
+and random line access (`LineIndex.read_lines`).
+"""
+
+from sketches import fingerprint64
+from typing import Optional
+import numpy as np
+import os
+
+LINE_INDEX_PATH = "dump/line_index"
+""" under `local_schema_extractor::DUMP_PATH`, which imports this module """
+STRIDE = 1 << 12
+READ_SIZE = 16 << 20
+
+
+class LineIndex:
+    def __init__(
+        self,
+        file: str,
+        size: int,
+        mtime_ns: int,
+        num_of_lines: int,
+        stride: int,
+        offsets: np.ndarray,
+    ) -> None:
+        self.file = file
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.num_of_lines = num_of_lines
+        self.stride = stride
+        self.offsets = offsets
+
+    def is_valid(self) -> bool:
+        if not os.path.exists(self.file):
+            return False
+        stat = os.stat(self.file)
+        return (stat.st_size, stat.st_mtime_ns) == (self.size, self.mtime_ns)
+
+    def line_offset(self, line: int) -> int:
+        """
+        Byte offset of the `line`-th (0-based) line, `line <= num_of_lines`
+        (`num_of_lines` is a last line without `"\\n"`, or the end of the file).
+        """
+        if not 0 <= line <= self.num_of_lines:
+            raise IndexError(
+                f"line {line} out of range, `{self.file}` has {self.num_of_lines} lines"
+            )
+        block = min(line // self.stride, len(self.offsets) - 1)
+        """ no indexed offset at the end of the file """
+        with open(self.file, "rb") as f:
+            f.seek(int(self.offsets[block]))
+            for _ in range(line - block * self.stride):
+                f.readline()
+            return f.tell()
+
+    def read_lines(self, start: int, count: int) -> list[bytes]:
+        """
+        Lines `[start, start + count)`, without rescanning the lines before `start`,
+        fewer (or none) past the end of the file.
+        """
+        if start > self.num_of_lines:
+            return []
+        with open(self.file, "rb") as f:
+            f.seek(self.line_offset(start))
+            return [line for line in (f.readline() for _ in range(count)) if line]
+
+    def byte_ranges(self, target_size: int) -> list[tuple[int, int]]:
+        """
+        `[(start, end)]` covering the file, about `target_size` bytes each, cut at indexed line starts
+        (so never fewer than `stride` lines per range).
+        """
+        boundaries = [0]
+        for target in range(target_size, self.size, target_size):
+            k = int(np.searchsorted(self.offsets, target))
+            if k < len(self.offsets) and self.offsets[k] > boundaries[-1]:
+                boundaries.append(int(self.offsets[k]))
+        boundaries.append(self.size)
+        return [
+            (start, end)
+            for start, end in zip(boundaries, boundaries[1:])
+            if end > start
+        ] or [(0, self.size)]
+
+
+def sidecar_path(file: str) -> str:
+    path = os.path.abspath(file)
+    return f"{LINE_INDEX_PATH}/{os.path.basename(path)}.{fingerprint64(path):016x}.npz"
+
+
+def build_line_index(file: str, stride: int = STRIDE) -> LineIndex:
+    stat = os.stat(file)
+    chunks = [np.zeros(1, dtype=np.int64)]
+    num_of_lines, base = 0, 0
+    with open(file, "rb") as f:
+        while chunk := f.read(READ_SIZE):
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+            first = -(num_of_lines + 1) % stride
+            """ `newlines[first]` ends the line before the next multiple of `stride` """
+            chunks.append(base + newlines[first::stride].astype(np.int64) + 1)
+            num_of_lines += len(newlines)
+            base += len(chunk)
+    offsets = np.concatenate(chunks)
+    offsets = offsets[offsets < max(stat.st_size, 1)]
+    return LineIndex(
+        file, stat.st_size, stat.st_mtime_ns, num_of_lines, stride, offsets
+    )
+
+
+def save_line_index(index: LineIndex, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "wb") as f:
+        np.savez(
+            f,
+            meta=np.array(
+                [index.size, index.mtime_ns, index.num_of_lines, index.stride],
+                dtype=np.int64,
+            ),
+            offsets=index.offsets,
+        )
+    os.replace(f"{path}.tmp", path)
+
+
+def load_line_index(file: str, path: str) -> Optional[LineIndex]:
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        size, mtime_ns, num_of_lines, stride = data["meta"].tolist()
+        index = LineIndex(file, size, mtime_ns, num_of_lines, stride, data["offsets"])
+    return index if index.is_valid() else None
+
+
+def line_index(file: str) -> LineIndex:
+    path = sidecar_path(file)
+    index = load_line_index(file, path)
+    if index is None:
+        index = build_line_index(file)
+        save_line_index(index, path)
+    return index
+
+
+def count_lines(file: str) -> int:
+    return line_index(file).num_of_lines
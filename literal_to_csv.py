@@ -0,0 +1,165 @@
+"""
+`(s: Instance)-[p]->(o: Literal)`, enabled by `INST_LITERAL_PROPERTY` in `options::OPTIONS`.
+
+One streaming pass over `literal_files()` (`mappingbased-literals`, `infobox-properties`):
+- typed literals of sampled instances are written as node properties,
+  sharded by instance id (`out/instance_literal_properties/part-*.csv`),
+  so all properties of one instance land in the same shard
+- `(s.type)-[p]->(datatype)` schema edges (with support) are derived from every instance in `type_dict`
+
+Nothing is held per edge in memory, only a bounded chunk of rows waiting for their ids.
+"""
+
+from local_schema_extractor import OUT_PATH, DUMP_PATH, OUTPUT_PREFIX, OUTPUT_ATTRIBUTE
+from local_schema_extractor import TypeDict
+from compact_id_map import CompactIdMap
+from curie import compact
+from triple_filter import TRIPLE_FILTER
+from csv_writer import CsvWriter, quoted
+from line_index import count_lines
+from typing import Optional
+from tqdm.auto import tqdm
+from env import DATASET, CHUNK_SIZE
+from glob import glob
+import os, re
+
+
+def literal_files() -> list[str]:
+    return glob(f"{DATASET}/mappingbased-literals*_lang=en.ttl") + glob(
+        f"{DATASET}/infobox-properties*_lang=en.ttl"
+    )
+
+
+LITERAL_PROPERTIES_PATH = f"{OUT_PATH}/instance_literal_properties"
+SCHEMA_LITERAL_EDGES_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_literal_edges.txt"
+)
+SCHEMA_LITERAL_EDGE_SUPPORT_FILE = f"{DUMP_PATH}/schema_literal_edge_support.txt"
+
+NAMESPACE = "Instance"
+NUM_OF_SHARDS = 16
+
+XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+RDF_LANG_STRING = "http://www.w3.org/1999/02/22-rdf-syntax-ns#langString"
+STRING, LANG_STRING = compact(XSD_STRING), compact(RDF_LANG_STRING)
+
+ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+ESCAPED_CHARS = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f"}
+
+
+def unescape(value: str) -> str:
+    if "\\" not in value:
+        return value
+
+    def replace(match: re.Match) -> str:
+        code = match.group(1) or match.group(2)
+        if code:
+            return chr(int(code, 16))
+        return ESCAPED_CHARS.get(match.group(3), match.group(3))
+
+    return ESCAPE.sub(replace, value)
+
+
+def parse_literal_triple(line: str) -> Optional[tuple[str, str, str, str, str]]:
+    """
+    `(s, p, value, datatype, lang)`, or `None` if the object is not a literal.
+    """
+    fields = line.split(" ", 2)
+    if len(fields) < 3:
+        return None
+    s, p, rest = compact(fields[0][1:-1]), compact(fields[1][1:-1]), fields[2].rstrip()
+    if rest.endswith("."):
+        rest = rest[:-1].rstrip()
+    if not rest.startswith('"'):
+        return None  # `<iri>` or blank node
+    if rest.endswith(">") and '"^^<' in rest:
+        value, datatype = rest[1:].rsplit('"^^<', 1)
+        return s, p, unescape(value), compact(datatype[:-1]), ""
+    quote = rest.rfind('"')
+    if quote > 0 and rest[quote + 1 : quote + 2] == "@":
+        return s, p, unescape(rest[1:quote]), LANG_STRING, rest[quote + 2 :]
+    return s, p, unescape(rest[1:quote]), STRING, ""
+
+
+class LiteralShardWriter:
+    """
+    One `CsvWriter` per shard; values are always `quoted`, since `unescape` can yield `,`, `"` and line breaks.
+    """
+
+    def __init__(self, num_of_shards: int = NUM_OF_SHARDS) -> None:
+        os.makedirs(LITERAL_PROPERTIES_PATH, exist_ok=True)
+        headers = [f":ID({NAMESPACE})", "Property", "Value", "Datatype", "Lang"]
+        self.shards = [
+            CsvWriter(
+                f"{LITERAL_PROPERTIES_PATH}/part-{shard:05d}.csv",
+                headers,
+                desc=f"Writing literal properties (shard {shard + 1}/{num_of_shards})",
+            )
+            for shard in range(num_of_shards)
+        ]
+
+    def write_chunk(
+        self,
+        rows: list[tuple[str, str, str, str, str]],
+        instance_node_name_id_dict: CompactIdMap,
+    ):
+        ids = instance_node_name_id_dict.lookup_batch(
+            [row[0] for row in rows], default=-1
+        )
+        for (_, p, value, datatype, lang), id in zip(rows, ids):
+            if id < 0:
+                continue
+            self.shards[id % len(self.shards)].write_row(
+                [str(id), quoted(p), quoted(value), quoted(datatype), quoted(lang)]
+            )
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+def inst_literal_properties(
+    inst_set: set[str],
+    instance_node_name_id_dict: CompactIdMap,
+    type_dict: Optional[TypeDict] = None,
+    files: Optional[list[str]] = None,
+):
+    files = files if files else literal_files()
+    writer = LiteralShardWriter()
+    support = dict[tuple[str, str, str], int]()
+    rows = list[tuple[str, str, str, str, str]]()
+    for cnt, file in enumerate(files):
+        with tqdm(
+            total=count_lines(file),
+            desc=f"Extracting literal properties from `{file}` ({cnt + 1}/{len(files)})",
+        ) as bar:
+            with open(file, "r") as f:
+                for line in f:
+                    bar.update(1)
+                    triple = parse_literal_triple(line)
+                    if not triple:
+                        continue
+                    if TRIPLE_FILTER and not TRIPLE_FILTER.accept_literal(
+                        *(field.encode() for field in line.split(" ", 2)[0:2])
+                    ):
+                        continue
+                    s, p, _, datatype, _ = triple
+                    if type_dict:
+                        for s_type in type_dict.get(s, ()):
+                            key = (s_type, p, datatype)
+                            support[key] = support.get(key, 0) + 1
+                    if s in inst_set:
+                        rows.append(triple)
+                        if len(rows) >= CHUNK_SIZE:
+                            writer.write_chunk(rows, instance_node_name_id_dict)
+                            rows.clear()
+    writer.write_chunk(rows, instance_node_name_id_dict)
+    writer.close()
+
+    if type_dict:
+        with open(SCHEMA_LITERAL_EDGES_FILE, "w") as edges_f, open(
+            SCHEMA_LITERAL_EDGE_SUPPORT_FILE, "w"
+        ) as support_f:
+            for (s_type, p, datatype), count in support.items():
+                edges_f.write(f"{s_type} {p} {datatype}\n")
+                support_f.write(f"{s_type} {p} {datatype} {count}\n")
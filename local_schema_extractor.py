@@ -1,6 +1,12 @@
-import json, os, subprocess
-from env import DATASET
-from typing import Any
+import json, os, sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from env import DATASET, NUM_OF_WORKERS
+from triple_filter import TRIPLE_FILTER
+from curie import compact
+from io_pipeline import BatchWriter, batched
+from checkpoint import ScanCheckpoint
+from line_index import count_lines
+from typing import Any, Optional
 from tqdm.asyncio import tqdm_asyncio
 from glob import glob
 
@@ -12,14 +18,7 @@ TypeDict = dict[str, set[str]]
 
 class LPVTableEncoder(json.JSONEncoder):
     def default(self, obj: Any) -> Any:
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if isinstance(value, dict):
-                    for k, v in value.items():
-                        if isinstance(v, set):
-                            value[k] = list(v)
-            return obj
-        elif isinstance(obj, set):
+        if isinstance(obj, set):
             return list(obj)
         return super().default(obj)
 
@@ -41,16 +40,7 @@ class LPVTableDecoder(json.JSONDecoder):
         return obj
 
 
-class TypeDictEncoder(json.JSONEncoder):
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if isinstance(value, set):
-                    obj[key] = list(value)
-            return obj
-        elif isinstance(obj, set):
-            return list(obj)
-        return super().default(obj)
+TypeDictEncoder = LPVTableEncoder
 
 
 class TypeDictDecoder(json.JSONDecoder):
@@ -68,15 +58,97 @@ class TypeDictDecoder(json.JSONDecoder):
         return obj
 
 
+"""
+Dumps are streamed as `NDJSON`, one `[key, value]` entry per line,
+so neither the table nor its sets are copied / converted as a whole.
+
+Legacy `.json` dumps (one indented object) are still accepted by the loaders.
+"""
+
+DUMP_BUFFER_SIZE = 1 << 20
+
+
+def legacy_json_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+def dump_exists(path: str) -> bool:
+    return os.path.exists(path) or os.path.exists(legacy_json_path(path))
+
+
+def dump_type_dict(type_dict: TypeDict, path: str):
+    encoder = json.JSONEncoder(default=list)
+    with open(path, "w", buffering=DUMP_BUFFER_SIZE) as f:
+        for label, types in type_dict.items():
+            f.write(encoder.encode([label, types]))
+            f.write("\n")
+
+
+def load_type_dict(path: str) -> TypeDict:
+    if not os.path.exists(path):
+        with open(legacy_json_path(path), "r") as f:
+            return json.load(f, cls=TypeDictDecoder)
+    type_dict = TypeDict()
+    with open(path, "r", buffering=DUMP_BUFFER_SIZE) as f:
+        for line in f:
+            label, types = json.loads(line)
+            type_dict[label] = set(map(sys.intern, types))
+    return type_dict
+
+
+def dump_lpv_table(table: LPVTable, path: str):
+    encoder = json.JSONEncoder(default=list)
+    with open(path, "w", buffering=DUMP_BUFFER_SIZE) as f:
+        for label, p_dict in table.items():
+            f.write(encoder.encode([label, p_dict]))
+            f.write("\n")
+
+
+def load_lpv_table(path: str) -> LPVTable:
+    if not os.path.exists(path):
+        with open(legacy_json_path(path), "r") as f:
+            return json.load(f, cls=LPVTableDecoder)
+    table = LPVTable()
+    with open(path, "r", buffering=DUMP_BUFFER_SIZE) as f:
+        for line in f:
+            label, p_dict = json.loads(line)
+            table[label] = {p: set(values) for p, values in p_dict.items()}
+    return table
+
+
 OUTPUT_PREFIX, OUTPUT_ATTRIBUTE = "dbpedia", "local"
 OUT_PATH, DUMP_PATH = f"out", f"dump"
 
-LINK_FILES = glob(f"{DATASET}/link*")
-SPO_MAPPING_FILES = glob(f"{DATASET}/mappingbased-objects*")
 USE_SPO_MAPPING_FILES = True
 
 SPECIFIC_TYPE_FILE = f"{DATASET}/instance-types_inference=specific_lang=en.ttl"
 TRANSITIVE_TYPE_FILE = f"{DATASET}/instance-types_inference=transitive_lang=en.ttl"
+SCHEMA_EDGES_FILE = f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_edges.txt"
+SCHEMA_VERTICES_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_vertices.txt"
+)
+
+TYPE_DICT_SERIALIZED = f"{DUMP_PATH}/type_dict.ndjson"
+LINK_PREDICATE_INDEX = f"{DUMP_PATH}/link_predicate_index.json"
+SCHEMA_EDGE_SUPPORT_FILE = f"{DUMP_PATH}/schema_edge_support.txt"
+PREFIXES_FILE = f"{OUT_PATH}/prefixes.csv"
+CHECKPOINT_PATH = f"{DUMP_PATH}/checkpoints"
+NUM_OF_SCAN_WORKERS = NUM_OF_WORKERS
+
+
+def link_files() -> list[str]:
+    return glob(f"{DATASET}/link*")
+
+
+def spo_mapping_files() -> list[str]:
+    return glob(f"{DATASET}/mappingbased-objects*")
+
+
+def resource_pool_files() -> list[str]:
+    """
+    Globbed when needed rather than at import time, so importing this module never touches `DATASET`.
+    """
+    return spo_mapping_files() if USE_SPO_MAPPING_FILES else link_files()
 
 
 def pre_check():
@@ -86,6 +158,37 @@ def pre_check():
             os.makedirs(path)
 
 
+def scan_link_file(file: str) -> tuple[str, bool, list[str]]:
+    """
+    Scan `file` until the first `rdf:type` predicate (early exit).
+
+    Returns `(file, has_type, predicates seen before exit)`.
+    """
+    predicates = set[bytes]()
+    has_type = False
+    with open(file, "rb") as f:
+        for line in f:
+            fields = line.split(maxsplit=2)
+            if len(fields) < 2:
+                continue
+            p = fields[1][1:-1]  # remove `<` and `>`
+            predicates.add(p)
+            if p.rsplit(b"#", 1)[-1] == b"type":
+                has_type = True
+                break
+    return file, has_type, [p.decode() for p in predicates]
+
+
+def load_link_predicate_index() -> dict[str, Any]:
+    """
+    `{"predicates": {predicate: [file]}, "partial_files": [file]}`
+
+    Files in `partial_files` have been scanned until their first `rdf:type` only.
+    """
+    with open(LINK_PREDICATE_INDEX, "r") as f:
+        return json.load(f)
+
+
 class LocalSchemaExtractor:
     def update_additional_type_files(self):
         if USE_SPO_MAPPING_FILES:
@@ -97,7 +200,7 @@ class LocalSchemaExtractor:
             """
             return self
 
-        DUMP_FILE = f"{DUMP_PATH}/additional_type_files.txt"
+        DUMP_FILE = f"{self.dump_path}/additional_type_files.txt"
 
         if os.path.exists(DUMP_FILE):
             print(
@@ -109,19 +212,23 @@ class LocalSchemaExtractor:
             print("Done!")
             return self
 
-        for file in LINK_FILES:
-            num_of_lines = int(subprocess.check_output(["wc", "-l", file]).split()[0])
-            with open(file, "r") as f:
-                f.seek(0)
-                with tqdm_asyncio(
-                    total=num_of_lines, desc=f"Parsing `{file}`'s pred for `type`"
-                ) as bar:
-                    for line in f:
-                        p = line.split()[1][1:-1]  # remove `<` and `>`
-                        if p.split("#")[-1] == "type":
-                            self.type_files.add(file)
-                            break
-                        bar.update(1)
+        predicate_index = dict[str, list[str]]()
+        partial_files = list[str]()
+        with ProcessPoolExecutor(max_workers=NUM_OF_SCAN_WORKERS) as executor:
+            futures = [
+                executor.submit(scan_link_file, file) for file in self.link_files
+            ]
+            with tqdm_asyncio(
+                total=len(futures), desc=f"Parsing `link_files`' pred for `type`"
+            ) as bar:
+                for future in as_completed(futures):
+                    file, has_type, predicates = future.result()
+                    if has_type:
+                        self.type_files.add(file)
+                        partial_files.append(file)
+                    for p in predicates:
+                        predicate_index.setdefault(p, []).append(file)
+                    bar.update(1)
 
         print(f"Serializing additional_type_files to txt ... ", end="")
         with open(DUMP_FILE, "w") as f:
@@ -129,55 +236,80 @@ class LocalSchemaExtractor:
                 f.write(f"{file}\n")
         print("Done!")
 
+        print(f"Serializing link_predicate_index to json ... ", end="")
+        with open(self.dumped(LINK_PREDICATE_INDEX), "w") as f:
+            json.dump(
+                {"predicates": predicate_index, "partial_files": partial_files},
+                f,
+                indent=2,
+            )
+        print("Done!")
+
+        return self
+
     def build_type_dict(self):
-        DUMP_FILE = f"{DUMP_PATH}/type_dict.json"
+        DUMP_FILE = self.dumped(TYPE_DICT_SERIALIZED)
 
-        if os.path.exists(DUMP_FILE):
+        if dump_exists(DUMP_FILE):
             print(f"Loading type_dict from `{DUMP_FILE}`(dumped) ... ", end="")
-            with open(DUMP_FILE, "r") as f:
-                self.type_dict = json.load(f, cls=TypeDictDecoder)
+            self.type_dict = load_type_dict(DUMP_FILE)
             print("Done!")
             return self
 
-        for cnt, type_file in enumerate(self.type_files):
-            num_of_lines = int(
-                subprocess.check_output(["wc", "-l", type_file]).split()[0]
-            )
-            with tqdm_asyncio(
-                total=num_of_lines,
-                desc=f"Building type_dict from `{type_file}` ({cnt + 1}/{len(self.type_files)})",
-            ) as bar:
-                with open(type_file, "r") as f:
-                    f.seek(0)
-                    for line in f:
-                        s, p, o = (
-                            line.split()[0][1:-1],
-                            line.split()[1][1:-1].split("#")[-1],
-                            line.split()[2][1:-1],
-                        )  # remove `<` and `>`
-                        if p == "type":
-                            if s not in self.type_dict:
-                                self.type_dict[s] = set[str]()
-                            self.type_dict[s].add(o)
-                        bar.update(1)
-
-        print(f"Serializing type_dict to json ... ", end="")
-        json_data = json.dumps(self.type_dict, cls=TypeDictEncoder, indent=2)
-        with open(DUMP_FILE, "w") as f:
-            f.write(json_data)
+        checkpoint = ScanCheckpoint(self.checkpointed("type_dict"))
+        self.type_dict = checkpoint.load() or self.type_dict
+        for line in checkpoint.lines(
+            list(self.type_files), "Building type_dict", lambda: self.type_dict
+        ):
+            fields = line.split()
+            if TRIPLE_FILTER and not TRIPLE_FILTER.accept_type(fields[0], fields[2]):
+                continue
+            s, p, o = (
+                compact(fields[0][1:-1].decode()),
+                fields[1][1:-1].split(b"#")[-1],
+                compact(fields[2][1:-1].decode()),
+            )  # remove `<` and `>`
+            if p == b"type":
+                if s not in self.type_dict:
+                    self.type_dict[s] = set[str]()
+                self.type_dict[s].add(sys.intern(o))
+
+        print(f"Serializing type_dict to ndjson ... ", end="")
+        dump_type_dict(self.type_dict, f"{DUMP_FILE}.tmp")
+        os.replace(f"{DUMP_FILE}.tmp", DUMP_FILE)
+        checkpoint.remove()
         print("Done!")
 
         return self
 
+    def add_triple(self, s: str, p: str, o: str):
+        """
+        Count `(s)-[p]->(o)` into every `(s.type)-[p]->(o.type)` schema edge.
+        """
+        if (s not in self.type_dict) or (o not in self.type_dict):
+            return
+        s_types, o_types = self.type_dict[s], self.type_dict[o]
+        for s_type in s_types:
+            for o_type in o_types:
+                key = (s_type, p, o_type)
+                self.schema_edge_support[key] = self.schema_edge_support.get(key, 0) + 1
+                if s_type not in self.schema_edge:
+                    self.schema_edge[s_type] = {}
+                    self.appeared_subject_types.add(s_type)
+                if p not in self.schema_edge[s_type]:
+                    self.schema_edge[s_type][p] = set[str]()
+                if o_type not in self.schema_edge[s_type][p]:
+                    self.schema_edge[s_type][p].add(o_type)
+                    self.appeared_object_types.add(o_type)
+                    self.num_of_schema_edges += 1
+
     def generate_schema_edge(self):
-        OUTPUT_FILE = f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_edges.txt"
+        OUTPUT_FILE = self.output(SCHEMA_EDGES_FILE)
+        SUPPORT_FILE = self.dumped(SCHEMA_EDGE_SUPPORT_FILE)
 
         if os.path.exists(OUTPUT_FILE):
-            num_of_lines = int(
-                subprocess.check_output(["wc", "-l", OUTPUT_FILE]).split()[0]
-            )
             with tqdm_asyncio(
-                total=num_of_lines,
+                total=count_lines(OUTPUT_FILE),
                 desc=f"Loading schema_edge from `{OUTPUT_FILE}`(generated)",
             ) as bar:
                 with open(OUTPUT_FILE, "r") as f:
@@ -200,57 +332,79 @@ class LocalSchemaExtractor:
                     bar.update(1)
             return self
 
-        RESOURCE_POOL_FILES = SPO_MAPPING_FILES if USE_SPO_MAPPING_FILES else LINK_FILES
-
-        for cnt, file in enumerate(RESOURCE_POOL_FILES):
-            num_of_lines = int(subprocess.check_output(["wc", "-l", file]).split()[0])
-            with tqdm_asyncio(
-                total=num_of_lines,
-                desc=f"Generating schema_edge from `{file}` ({cnt + 1}/{len(RESOURCE_POOL_FILES)})",
-            ) as bar:
-                with open(file, "r") as f:
-                    f.seek(0)
-                    for line in f:
-                        s, p, o = (
-                            line.split()[0][1:-1],
-                            line.split()[1][1:-1],
-                            line.split()[2][1:-1],
-                        )  # remove `<` and `>`
-                        if (s not in self.type_dict) or (o not in self.type_dict):
-                            bar.update(1)
-                            continue
-                        s_types, o_types = self.type_dict[s], self.type_dict[o]
-                        for s_type in s_types:
-                            for o_type in o_types:
-                                if s_type not in self.schema_edge:
-                                    self.schema_edge[s_type] = {}
-                                    self.appeared_subject_types.add(s_type)
-                                if p not in self.schema_edge[s_type]:
-                                    self.schema_edge[s_type][p] = set[str]()
-                                if o_type not in self.schema_edge[s_type][p]:
-                                    self.schema_edge[s_type][p].add(o_type)
-                                    self.appeared_object_types.add(o_type)
-                                    self.num_of_schema_edges += 1
-                        bar.update(1)
+        checkpoint = ScanCheckpoint(self.checkpointed("schema_edge"))
+        state = checkpoint.load()
+        if state:
+            self.restore_schema_edge_state(state)
+        for line in checkpoint.lines(
+            self.resource_pool_files,
+            "Generating schema_edge",
+            self.schema_edge_state,
+        ):
+            fields = line.split()
+            if TRIPLE_FILTER and not TRIPLE_FILTER.accept_triple(*fields[0:3]):
+                continue
+            s, p, o = (
+                compact(fields[0][1:-1].decode()),
+                compact(fields[1][1:-1].decode()),
+                compact(fields[2][1:-1].decode()),
+            )  # remove `<` and `>`
+            self.add_triple(s, p, o)
+
+        # support first: `OUTPUT_FILE` (moved into place last) marks the stage as done
+        with tqdm_asyncio(
+            total=len(self.schema_edge_support),
+            desc=f"Exporting schema_edge_support to `{SUPPORT_FILE}`",
+        ) as bar:
+            with BatchWriter(SUPPORT_FILE) as writer:
+                for batch in batched(self.schema_edge_support.items()):
+                    writer.write_rows(
+                        [
+                            f"{s_type} {p} {o_type} {support}"
+                            for (s_type, p, o_type), support in batch
+                        ]
+                    )
+                    bar.update(len(batch))
 
         with tqdm_asyncio(
             total=self.num_of_schema_edges,
             desc=f"Exporting schema_edge to `{OUTPUT_FILE}`",
         ) as bar:
-            with open(OUTPUT_FILE, "w") as f:
+            with BatchWriter(f"{OUTPUT_FILE}.tmp") as writer:
                 for s_type, p_dict in self.schema_edge.items():
-                    for p, o_types in p_dict.items():
-                        for o_type in o_types:
-                            f.write(f"{s_type} {p} {o_type}\n")
-                            bar.update(1)
+                    rows = [
+                        f"{s_type} {p} {o_type}"
+                        for p, o_types in p_dict.items()
+                        for o_type in o_types
+                    ]
+                    writer.write_rows(rows)
+                    bar.update(len(rows))
+        os.replace(f"{OUTPUT_FILE}.tmp", OUTPUT_FILE)
+        checkpoint.remove()
 
         return self
 
-    def generate_schema_vertex(self):
-        OUTPUT_FILE = (
-            f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_vertices.txt"
+    def schema_edge_state(self) -> tuple:
+        return (
+            self.schema_edge,
+            self.schema_edge_support,
+            self.appeared_subject_types,
+            self.appeared_object_types,
+            self.num_of_schema_edges,
         )
 
+    def restore_schema_edge_state(self, state: tuple):
+        (
+            self.schema_edge,
+            self.schema_edge_support,
+            self.appeared_subject_types,
+            self.appeared_object_types,
+            self.num_of_schema_edges,
+        ) = state
+
+    def generate_schema_vertex(self):
+        OUTPUT_FILE = self.output(SCHEMA_VERTICES_FILE)
+
         if os.path.exists(OUTPUT_FILE):
             print(f"`schema_vertex` has been generated, see {OUTPUT_FILE} ...")
             return self
@@ -279,21 +433,58 @@ class LocalSchemaExtractor:
 
     def notify_done(self):
         print("Successfully get `schema_edge` and `schema_vertex` ...")
-        print(
-            f"See `schema_edge` at `{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_edge.txt`"
-        )
-        print(
-            f"See `schema_vertex` at `{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_vertex.txt`"
-        )
-
-    def __init__(self) -> None:
+        print(f"See `schema_edge` at `{self.output(SCHEMA_EDGES_FILE)}`")
+        print(f"See `schema_vertex` at `{self.output(SCHEMA_VERTICES_FILE)}`")
+
+    @staticmethod
+    def type_files_of(lang: str) -> list[str]:
+        return [
+            f"{DATASET}/instance-types_inference=specific_lang={lang}.ttl",
+            f"{DATASET}/instance-types_inference=transitive_lang={lang}.ttl",
+        ]
+
+    def dumped(self, path: str) -> str:
+        return f"{self.dump_path}/{os.path.basename(path)}"
+
+    def output(self, path: str) -> str:
+        return f"{self.out_path}/{os.path.basename(path)}"
+
+    def checkpointed(self, stage: str) -> str:
+        return f"{self.dump_path}/{os.path.basename(CHECKPOINT_PATH)}/{stage}.pkl"
+
+    def __init__(self, lang: Optional[str] = None) -> None:
+        """
+        `lang = None` extracts the default (`lang=en`) files into `out/` and `dump/`,
+        otherwise `lang={lang}` files are extracted into `out/lang={lang}/` and `dump/lang={lang}/`.
+        """
         pre_check()
+        self.lang = lang
+        if lang is None:
+            self.out_path, self.dump_path = OUT_PATH, DUMP_PATH
+            self.link_files = link_files()
+            self.resource_pool_files = resource_pool_files()
+            self.type_files: set[str] = {SPECIFIC_TYPE_FILE, TRANSITIVE_TYPE_FILE}
+        else:
+            self.out_path, self.dump_path = (
+                f"{OUT_PATH}/lang={lang}",
+                f"{DUMP_PATH}/lang={lang}",
+            )
+            os.makedirs(self.out_path, exist_ok=True)
+            os.makedirs(self.dump_path, exist_ok=True)
+            self.link_files = glob(f"{DATASET}/link*_lang={lang}.ttl")
+            self.resource_pool_files = (
+                glob(f"{DATASET}/mappingbased-objects*_lang={lang}.ttl")
+                if USE_SPO_MAPPING_FILES
+                else self.link_files
+            )
+            self.type_files: set[str] = set(self.type_files_of(lang))
         self.type_dict = TypeDict()
         self.schema_edge = LPVTable()
+        self.schema_edge_support = dict[tuple[str, str, str], int]()
+        """ `{(label.type, property, value.type): num_of_supporting_triples}` """
         self.schema_vertex = set[str]()
         self.appeared_subject_types = set[str]()
         self.appeared_object_types = set[str]()
-        self.type_files: set[str] = {SPECIFIC_TYPE_FILE, TRANSITIVE_TYPE_FILE}
         self.num_of_schema_edges = 0
 
     def exec(self):
@@ -302,6 +493,7 @@ class LocalSchemaExtractor:
         self.generate_schema_edge()
         self.generate_schema_vertex()
         self.notify_done()
+        return self
 
 
 if __name__ == "__main__":
@@ -1,40 +1,201 @@
-from local_schema_extractor import LocalSchemaExtractor
-from typing import Any, Callable
-from options import hasOption
-import schema_to_csv_base, os, schema_statistics, schema_to_csv, instance_to_csv
+"""
+`python main.py [flags] [command]`
 
+Without a command, runs the pipeline selected by `options::OPTIONS` (`all`).
+Each command imports only the stages it runs, so small commands start fast.
 
-def all_satisfied(f: Callable[[Any], bool], *args):
-    satisfied = 0
-    for arg in args:
-        satisfied += 1 if f(arg) else 0
-    return satisfied == len(args)
+Flags are exported as the `DBPEDIA_*` environment variables read by `env` / `options`,
+so nothing importing them may be imported at module level here.
+Setting those variables directly works as well.
+"""
 
+import argparse, os
 
-def all_unsatisfied(f: Callable[[Any], bool], *args):
-    satisfied = 0
-    for arg in args:
-        satisfied += 1 if f(arg) else 0
-    return satisfied == 0
+FLAG_ENV_VARS = {
+    "dataset": "DBPEDIA_DATASET",
+    "workers": "DBPEDIA_WORKERS",
+    "chunk_size": "DBPEDIA_CHUNK_SIZE",
+    "memory_budget": "DBPEDIA_MEMORY_BUDGET",
+    "format": "DBPEDIA_OUTPUT_FORMAT",
+    "checkpoint_interval": "DBPEDIA_CHECKPOINT_INTERVAL",
+    "collision_policy": "DBPEDIA_COLLISION_POLICY",
+}
 
 
-if __name__ == "__main__":
+def run_delta(_):
+    from delta_extractor import DeltaSchemaExtractor
+
+    DeltaSchemaExtractor().exec()
+
+
+def run_multi_language(_):
+    import multi_language_extractor
+
+    multi_language_extractor.exec()
+
+
+def run_extract(_):
+    from local_schema_extractor import LocalSchemaExtractor
+
+    LocalSchemaExtractor().exec()
+
+
+def run_statistics(_):
+    import schema_statistics
+
+    schema_statistics.dump_predicates()
+    schema_statistics.dump_triple_statistics()
+
+
+def run_meta_paths(_):
+    import meta_paths
+
+    meta_paths.dump_meta_paths()
+
+
+def run_type_cooccurrence(_):
+    import type_cooccurrence
+
+    type_cooccurrence.dump_type_cooccurrence()
+
+
+def run_schema_csv(_):
+    import schema_to_csv
+
+    schema_to_csv.exec()
+
+
+def run_instance_csv(_):
+    import instance_to_csv
+
+    instance_to_csv.exec()
+
+
+def run_columnar(_):
+    import columnar_export
+
+    columnar_export.exec()
+
+
+def run_preview(args):
+    import preview_extractor
+
+    preview_extractor.exec(args.fraction, args.seed)
+
+
+def run_serve(args):
+    import schema_service
+
+    schema_service.web.run_app(
+        schema_service.create_app(), host=args.host, port=args.port
+    )
+
+
+def run_all(args):
+    from utils import all_unsatisfied
+    from options import hasOption
+    from env import OUTPUT_FORMAT
+
+    if hasOption("DELTA_EXTRACT"):
+        return run_delta(args)
+
+    if hasOption("MULTI_LANGUAGE_EXTRACT"):
+        return run_multi_language(args)
+
     if hasOption("LOCAL_EXTRACT"):
+        from local_schema_extractor import LocalSchemaExtractor
+        from pipeline_session import PipelineSession
+        import schema_to_csv_base, schema_statistics, schema_to_csv, instance_to_csv
+        import meta_paths, type_cooccurrence
+
         if all_unsatisfied(
             os.path.exists,
             schema_to_csv_base.SCHEMA_EDGES_GENERAL + ".txt",
             schema_to_csv_base.SCHEMA_VERTICES_GENERAL + ".txt",
         ):
-            LocalSchemaExtractor().exec()
+            session = PipelineSession(LocalSchemaExtractor().exec())
         else:
             print(
                 "Detected existing schema files(format=.txt), skipping schema extraction ..."
             )
-        schema_statistics.dump_predicates()
-        schema_to_csv.exec()
-        instance_to_csv.exec()
-        exit()
+            session = PipelineSession()
+        schema_statistics.dump_predicates(session)
+        schema_statistics.dump_triple_statistics(session=session)
+        meta_paths.dump_meta_paths(session=session)
+        type_cooccurrence.dump_type_cooccurrence(session)
+        schema_to_csv.exec(session)
+        instance_to_csv.exec(session)
+        if hasOption("COLUMNAR_EXPORT") or OUTPUT_FORMAT != "csv":
+            import columnar_export
+
+            columnar_export.exec(session)
+        return
 
     print(
         "`OnlineSchemaExtractor` has been deprecated, please use `LocalSchemaExtractor` instead."
     )
+
+
+COMMANDS = {
+    "all": (run_all, "run the pipeline selected by `options::OPTIONS`"),
+    "extract": (run_extract, "extract `schema_edge` / `schema_vertex`"),
+    "statistics": (run_statistics, "dump predicates and triple statistics"),
+    "meta-paths": (run_meta_paths, "enumerate frequent meta-paths"),
+    "type-cooccurrence": (run_type_cooccurrence, "count types sharing instances"),
+    "schema-csv": (run_schema_csv, "convert the schema to csv"),
+    "instance-csv": (run_instance_csv, "sample instances and convert them to csv"),
+    "columnar": (run_columnar, "write the Parquet / Arrow IPC export"),
+    "delta": (run_delta, "apply `PREV_DATASET` -> `DATASET` changes"),
+    "multi-language": (run_multi_language, "extract and merge every `lang=*`"),
+    "preview": (run_preview, "approximate schema from a random sample"),
+    "serve": (run_serve, "run the schema query service"),
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="DBpedia schema / instance extraction")
+    parser.add_argument("--dataset", help="DBpedia dataset directory")
+    parser.add_argument("--workers", type=int, help="worker processes")
+    parser.add_argument("--chunk-size", type=int, help="rows per batch")
+    parser.add_argument("--memory-budget", help="external sort buffer, e.g. `2G`")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"])
+    parser.add_argument(
+        "--checkpoint-interval", type=int, help="seconds between scan checkpoints"
+    )
+    parser.add_argument(
+        "--collision-policy",
+        choices=["trust", "verify"],
+        help="`trust` or `verify` instance edge fingerprint collisions",
+    )
+    parser.add_argument(
+        "--option", action="append", default=[], help="turn an option on, repeatable"
+    )
+    parser.add_argument(
+        "--disable-option",
+        action="append",
+        default=[],
+        help="turn an option off, repeatable",
+    )
+    commands = parser.add_subparsers(dest="command")
+    for name, (_, help) in COMMANDS.items():
+        command = commands.add_parser(name, help=help)
+        if name == "preview":
+            command.add_argument("--fraction", type=float, default=0.01)
+            command.add_argument("--seed", type=int, default=0)
+        if name == "serve":
+            command.add_argument("--host", default="127.0.0.1")
+            command.add_argument("--port", type=int, default=8080)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for flag, env_var in FLAG_ENV_VARS.items():
+        if getattr(args, flag) is not None:
+            os.environ[env_var] = str(getattr(args, flag))
+    toggled = args.option + [f"-{option}" for option in args.disable_option]
+    if toggled:
+        os.environ["DBPEDIA_OPTIONS"] = ",".join(
+            filter(None, [os.environ.get("DBPEDIA_OPTIONS", "")] + toggled)
+        )
+    COMMANDS[args.command if args.command else "all"][0](args)
@@ -0,0 +1,253 @@
+"""
+# Meta-paths
+
+Frequent length-2 / length-3 meta-paths `T0 -p1-> T1 -p2-> T2 (-p3-> T3)` of the extracted schema,
+enabled by `META_PATHS` in `options::OPTIONS`.
+
+Schema edges below `MIN_SUPPORT` (instance-level support, see `dump/schema_edge_support.txt`) are pruned first,
+the remaining ones form one sparse `types x types` adjacency matrix `A_p` per predicate (values: support),
+stacked side by side into `A = [A_p1 | A_p2 | ...]` (`types x (predicates * types)`).
+Paths are then grown at the type level instead of with nested loops over `schema_edge`:
+- `F` (`paths x types`): one-hot end type of every kept path
+- `F @ A` (`paths x (predicates * types)`): every `-p-> T` extension of every path, i.e. `A_p1 @ A_p2 ...`
+  with the intermediate types and predicates kept
+
+The support of a path is its bottleneck, i.e. the minimum support of its edges,
+so it never grows when a path is extended, and pruning a path prunes all of its extensions.
+`A` is pruned to `MIN_SUPPORT` once. `F` holds the top `MAX_PATHS` paths of the previous length
+(every edge of `A` for length 2) and is multiplied in row chunks of about `EXTENSION_BUDGET` extensions
+(by the out-degree of their end types); each chunk's extensions are cut to `MIN_SUPPORT` and merged
+into the running top `MAX_PATHS`, so at most `MAX_PATHS + EXTENSION_BUDGET` paths (plus the out-degree of one
+type) are held at once, however many paths there are through hub types.
+"""
+
+from local_schema_extractor import (
+    OUT_PATH,
+    OUTPUT_PREFIX,
+    OUTPUT_ATTRIBUTE,
+    SCHEMA_EDGE_SUPPORT_FILE,
+)
+from pipeline_session import PipelineSession
+from csv_writer import CsvWriter, quoted
+from options import hasOption
+from scipy.sparse import csr_matrix
+from typing import Iterator, Optional
+import numpy as np
+import os
+
+META_PATHS_CSV_FILE = f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_meta_paths.csv"
+
+MIN_SUPPORT = 10
+MAX_PATHS = int(1e5)
+""" paths kept (by support) per length, both for output and for extension """
+MAX_LENGTH = 3
+EXTENSION_BUDGET = 1 << 20
+""" extensions materialized per `F @ A` chunk """
+
+
+class SchemaAdjacency:
+    """
+    Per-predicate type adjacency `A = [A_p1 | A_p2 | ...]`, column `p * len(types) + t` being `-p-> t`.
+    """
+
+    def __init__(self, support: dict[tuple[str, str, str], int], min_support: int):
+        kept = [(key, count) for key, count in support.items() if count >= min_support]
+        self.types = sorted(set(t for (s, _, o), _ in kept for t in (s, o)))
+        self.predicates = sorted(set(p for (_, p, _), _ in kept))
+        type_ids = {t: id for id, t in enumerate(self.types)}
+        predicate_ids = {p: id for id, p in enumerate(self.predicates)}
+
+        num_of_types = len(self.types)
+        self.matrix = csr_matrix(
+            (
+                np.fromiter((count for _, count in kept), dtype=np.int64),
+                (
+                    np.fromiter((type_ids[s] for (s, _, _), _ in kept), dtype=np.int64),
+                    np.fromiter(
+                        (
+                            predicate_ids[p] * num_of_types + type_ids[o]
+                            for (_, p, o), _ in kept
+                        ),
+                        dtype=np.int64,
+                    ),
+                ),
+            ),
+            shape=(num_of_types, len(self.predicates) * num_of_types),
+        )
+
+    def __len__(self) -> int:
+        return self.matrix.nnz
+
+    def hop(self, column: int) -> tuple[str, str]:
+        """
+        `(predicate, type)` of column `column` of `A`.
+        """
+        p, t = divmod(column, len(self.types))
+        return self.predicates[p], self.types[t]
+
+    def end_types(self, columns: np.ndarray) -> np.ndarray:
+        return columns % len(self.types)
+
+
+def load_schema_edge_support(
+    session: Optional[PipelineSession] = None,
+) -> dict[tuple[str, str, str], int]:
+    if session and session.extractor.schema_edge_support:
+        return session.extractor.schema_edge_support
+    if not os.path.exists(SCHEMA_EDGE_SUPPORT_FILE):
+        raise FileNotFoundError(
+            f"File `{SCHEMA_EDGE_SUPPORT_FILE}` does not exist, please run `LocalSchemaExtractor.exec()` first."
+        )
+    support = dict[tuple[str, str, str], int]()
+    with open(SCHEMA_EDGE_SUPPORT_FILE, "r") as f:
+        for line in f:
+            s_type, p, o_type, count = line.split()
+            support[(s_type, p, o_type)] = int(count)
+    return support
+
+
+def top(paths: np.ndarray, support: np.ndarray, max_paths: int):
+    if len(support) > max_paths:
+        kept = np.argpartition(-support, max_paths - 1)[:max_paths]
+        paths, support = paths[kept], support[kept]
+    order = np.argsort(-support, kind="stable")
+    return paths[order], support[order]
+
+
+def extensions_of(
+    paths: np.ndarray,
+    support: np.ndarray,
+    adjacency: SchemaAdjacency,
+    min_support: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    `paths` (`paths x (1 + length)`: start type, then columns of `A`) extended by every edge of `A`
+    starting at their end type, as `F @ A`.
+
+    Every row of `F` has a single non-zero, so every entry of `F @ A` comes from a single edge:
+    its value is that edge's support.
+    """
+    frontier = csr_matrix(
+        (
+            np.ones(len(paths), dtype=np.int64),
+            (np.arange(len(paths)), adjacency.end_types(paths[:, -1])),
+        ),
+        shape=(len(paths), len(adjacency.types)),
+    )
+    extensions = (frontier @ adjacency.matrix).tocoo()
+    rows, cols = extensions.row, extensions.col
+    extended_support = np.minimum(support[rows], extensions.data)
+    kept = extended_support >= min_support
+    rows, cols = rows[kept], cols[kept]
+    return np.column_stack([paths[rows], cols]), extended_support[kept]
+
+
+def extend(
+    paths: np.ndarray,
+    support: np.ndarray,
+    adjacency: SchemaAdjacency,
+    min_support: int,
+    max_paths: int,
+    extension_budget: int = EXTENSION_BUDGET,
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """
+    `(top max_paths extensions, their support, number of extensions)`, joined in row chunks
+    of about `extension_budget` extensions each.
+    """
+    out_degrees = np.diff(adjacency.matrix.indptr)[adjacency.end_types(paths[:, -1])]
+    chunk_of = np.cumsum(out_degrees) // extension_budget
+    bounds = [0] + (np.flatnonzero(np.diff(chunk_of)) + 1).tolist() + [len(paths)]
+    kept_paths = np.zeros((0, paths.shape[1] + 1), dtype=np.int64)
+    kept_support = np.zeros(0, dtype=np.int64)
+    num_of_extensions = 0
+    for start, end in zip(bounds, bounds[1:]):
+        chunk_paths, chunk_support = extensions_of(
+            paths[start:end], support[start:end], adjacency, min_support
+        )
+        num_of_extensions += len(chunk_support)
+        kept_paths, kept_support = top(
+            np.concatenate([kept_paths, chunk_paths]),
+            np.concatenate([kept_support, chunk_support]),
+            max_paths,
+        )
+    return kept_paths, kept_support, num_of_extensions
+
+
+def enumerate_meta_paths(
+    support: dict[tuple[str, str, str], int],
+    min_support: int = MIN_SUPPORT,
+    max_paths: int = MAX_PATHS,
+    max_length: int = MAX_LENGTH,
+) -> tuple[SchemaAdjacency, list[tuple[np.ndarray, np.ndarray]]]:
+    """
+    `[(paths, support)]` for length `2..max_length`, at most `max_paths` each, by descending support.
+    """
+    print(
+        f"Building per-predicate type adjacency with support >= {min_support} ... ",
+        end="",
+    )
+    adjacency = SchemaAdjacency(support, min_support)
+    print("Done!")
+    print(
+        f"`{len(adjacency)}` schema edges over `{len(adjacency.predicates)}` predicates"
+    )
+
+    edges = adjacency.matrix.tocoo()
+    paths = np.column_stack([edges.row, edges.col]).astype(np.int64)
+    path_support = edges.data
+    results = list[tuple[np.ndarray, np.ndarray]]()
+    for length in range(2, max_length + 1):
+        paths, path_support, num_of_paths = extend(
+            paths, path_support, adjacency, min_support, max_paths
+        )
+        print(f"Found `{num_of_paths}` meta-paths of length {length}")
+        results.append((paths, path_support))
+    return adjacency, results
+
+
+def meta_path_rows(
+    adjacency: SchemaAdjacency, paths: np.ndarray
+) -> Iterator[list[str]]:
+    """
+    `[T0, P1, T1, ...]` of every path.
+    """
+    for path in paths.tolist():
+        row = [adjacency.types[path[0]]]
+        for column in path[1:]:
+            row += adjacency.hop(column)
+        yield row
+
+
+def dump_meta_paths(
+    output_filename: str = META_PATHS_CSV_FILE,
+    min_support: int = MIN_SUPPORT,
+    max_paths: int = MAX_PATHS,
+    session: Optional[PipelineSession] = None,
+):
+    if not hasOption("META_PATHS"):
+        print("META_PATHS is not set to True, skipping meta-path enumeration ...")
+        return
+
+    adjacency, results = enumerate_meta_paths(
+        load_schema_edge_support(session), min_support, max_paths
+    )
+    headers = ["Length", "Support", "T0"]
+    for hop in range(1, MAX_LENGTH + 1):
+        headers += [f"P{hop}", f"T{hop}"]
+    with CsvWriter(
+        output_filename,
+        headers,
+        total=sum(len(paths) for paths, _ in results),
+        desc=f"Exporting meta-paths to `{output_filename}`",
+    ) as writer:
+        for paths, path_support in results:
+            for row, count in zip(
+                meta_path_rows(adjacency, paths), path_support.tolist()
+            ):
+                fields = [str(len(row) // 2), str(count)] + [quoted(x) for x in row]
+                writer.write_row(fields + [""] * (len(headers) - len(fields)))
+    print(f"See meta-paths at `{output_filename}`")
+
+
+if __name__ == "__main__":
+    dump_meta_paths()
@@ -0,0 +1,122 @@
+"""
+# Multi-language extraction
+
+Discovers every `lang=*` edition under `DATASET` (with `mappingbased-objects` and both type files),
+extracts them concurrently (one `LocalSchemaExtractor(lang)` per worker process,
+outputs in `out/lang={lang}/`), then merges them into one cross-language schema:
+
+- `out/dbpedia_multilang_schema_edges.txt` / `out/dbpedia_multilang_schema_vertices.txt`
+- `out/dbpedia_multilang_schema_edge_languages.txt`: `{s_type} {p} {o_type} {lang;lang;...}`
+- `dump/multilang_schema_edge_support.txt`: support summed over all languages
+
+Types are interned once per worker (`sys.intern`), and the merged vertices extend the shared,
+append-only `out/type_node_name_id_map.txt`, so every language uses the same type ids.
+"""
+
+from local_schema_extractor import (
+    LocalSchemaExtractor,
+    OUT_PATH,
+    DUMP_PATH,
+    OUTPUT_PREFIX,
+    SCHEMA_EDGE_SUPPORT_FILE,
+)
+from id_map import DictIdMap, load_id_map, extend_id_map
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+from tqdm.auto import tqdm
+from env import DATASET, NUM_OF_WORKERS
+from glob import glob
+import os, re
+
+MULTILANG_ATTRIBUTE = "multilang"
+MERGED_SCHEMA_EDGES = f"{OUT_PATH}/{OUTPUT_PREFIX}_{MULTILANG_ATTRIBUTE}_schema_edges"
+MERGED_SCHEMA_VERTICES = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{MULTILANG_ATTRIBUTE}_schema_vertices"
+)
+MERGED_EDGE_LANGUAGES = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{MULTILANG_ATTRIBUTE}_schema_edge_languages"
+)
+MERGED_SCHEMA_EDGE_SUPPORT = f"{DUMP_PATH}/{MULTILANG_ATTRIBUTE}_schema_edge_support"
+TYPE_ID_SERIALIZED = f"{OUT_PATH}/type_node_name_id_map.txt"
+
+NUM_OF_LANGUAGE_WORKERS = min(4, NUM_OF_WORKERS)
+""" each worker holds a whole `type_dict`, so this is bounded by memory rather than cores """
+
+LANG_PATTERN = re.compile(r"_lang=([A-Za-z_-]+)\.ttl$")
+
+
+def discover_languages() -> list[str]:
+    languages = list[str]()
+    for file in glob(f"{DATASET}/mappingbased-objects*_lang=*.ttl"):
+        match = LANG_PATTERN.search(file)
+        if not match:
+            continue
+        lang = match.group(1)
+        if all(
+            os.path.exists(type_file)
+            for type_file in LocalSchemaExtractor.type_files_of(lang)
+        ):
+            languages.append(lang)
+    return sorted(set(languages))
+
+
+def extract_language(lang: str) -> tuple[str, str]:
+    extractor = LocalSchemaExtractor(lang).exec()
+    return lang, extractor.dumped(SCHEMA_EDGE_SUPPORT_FILE)
+
+
+def merge_languages(support_files: dict[str, str]):
+    support = dict[tuple[str, str, str], int]()
+    languages = dict[tuple[str, str, str], list[str]]()
+    for lang, support_file in sorted(support_files.items()):
+        with open(support_file, "r") as f:
+            for line in tqdm(f, desc=f"Merging schema_edge of `lang={lang}`"):
+                s_type, p, o_type, count = line.split()
+                key = (s_type, p, o_type)
+                support[key] = support.get(key, 0) + int(count)
+                languages.setdefault(key, []).append(lang)
+
+    vertices = set[str]()
+    with open(f"{MERGED_SCHEMA_EDGES}.txt", "w") as edges_f, open(
+        f"{MERGED_EDGE_LANGUAGES}.txt", "w"
+    ) as languages_f, open(f"{MERGED_SCHEMA_EDGE_SUPPORT}.txt", "w") as support_f:
+        for key in sorted(support):
+            edge = " ".join(key)
+            vertices.update((key[0], key[2]))
+            edges_f.write(f"{edge}\n")
+            languages_f.write(f"{edge} {';'.join(languages[key])}\n")
+            support_f.write(f"{edge} {support[key]}\n")
+
+    with open(f"{MERGED_SCHEMA_VERTICES}.txt", "w") as f:
+        for v in sorted(vertices):
+            f.write(f"{v}\n")
+
+    type_node_name_id_dict = load_id_map(TYPE_ID_SERIALIZED, DictIdMap())
+    new_names = extend_id_map(TYPE_ID_SERIALIZED, type_node_name_id_dict, vertices)
+    print(
+        f"Shared type vocabulary: {len(type_node_name_id_dict)} types, {len(new_names)} newly assigned"
+    )
+
+
+def exec(
+    languages: Optional[list[str]] = None,
+    num_of_workers: int = NUM_OF_LANGUAGE_WORKERS,
+):
+    languages = languages if languages else discover_languages()
+    print(f"Extracting `{len(languages)}` languages: {', '.join(languages)}")
+
+    support_files = dict[str, str]()
+    with ProcessPoolExecutor(max_workers=num_of_workers) as executor:
+        futures = [executor.submit(extract_language, lang) for lang in languages]
+        for future in as_completed(futures):
+            lang, support_file = future.result()
+            support_files[lang] = support_file
+            print(f"Extracted `lang={lang}` ({len(support_files)}/{len(languages)})")
+
+    merge_languages(support_files)
+    print(f"See merged `schema_edge` at `{MERGED_SCHEMA_EDGES}.txt`")
+    print(f"See merged `schema_vertex` at `{MERGED_SCHEMA_VERTICES}.txt`")
+
+
+if __name__ == "__main__":
+    exec()
@@ -1,5 +1,6 @@
-import json, os, subprocess, asyncio, aiohttp
+import json, os, asyncio, aiohttp
 from env import DATASET
+from line_index import count_lines
 from rdflib import Graph
 from SPARQLWrapper import SPARQLWrapper, JSON
 from typing import Optional, Any
@@ -245,9 +246,7 @@ class OnlineSchemaExtractor:
             )
         else:
             queried = set[str]()
-            num_of_lines = int(
-                subprocess.check_output(f"wc -l {self.labels}", shell=True).split()[0]
-            )
+            num_of_lines = count_lines(self.labels)
             print(
                 f"Total number of lines (approximately equals to labels): {num_of_lines}"
             )
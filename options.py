@@ -1,3 +1,5 @@
+import os
+
 OPTIONS = {
     "LOCAL_EXTRACT",
     "SCHEMA_STATISTICS",
@@ -9,9 +11,44 @@ OPTIONS = {
 
 """
 Advanced options (default = off):
-- INST_LITERAL_PROPERTY
+- INST_LITERAL_PROPERTY (instance literal properties + `(type)-[p]->(datatype)` schema edges, see `literal_to_csv`)
+- MULTI_LANGUAGE_EXTRACT (extract every `lang=*` edition concurrently and merge them, see `multi_language_extractor`)
+- DELTA_EXTRACT (apply `env::PREV_DATASET` -> `env::DATASET` changes to existing outputs, see `delta_extractor`)
+- TRIPLE_STATISTICS (per-predicate statistics over the raw triple stream, see `schema_statistics::dump_triple_statistics`)
+- META_PATHS (frequent length-2 / length-3 type-level meta-paths, see `meta_paths`)
+- TYPE_COOCCURRENCE (type support, type-pair co-occurrence counts and implied types, see `type_cooccurrence`)
+- COMPACT_IRI (hold and export IRIs as CURIEs, e.g. `dbo:Person`, see `curie`)
+- COLUMNAR_EXPORT (also write nodes / relationships / schema edges as Parquet or Arrow IPC, requires `pyarrow`, see `columnar_export`)
+- INST_CSR_EXPORT (also write the `instance_instance` graph as `.npy` CSR arrays into `out/instance_csr/`, see `instance_to_csv::dump_instance_csr`)
+"""
+
+
+FILTERS: dict[str, list[str]] = {
+    "include_types": [],
+    "exclude_types": [
+        # "http://www.w3.org/2002/07/owl#Thing",
+        # "http://www.wikidata.org/entity/*",
+    ],
+    "include_predicates": [
+        # "http://dbpedia.org/ontology/*",
+    ],
+    "exclude_predicates": [],
+    "include_resources": [],
+    "exclude_resources": [],
+}
+"""
+Parse-time include / exclude filters (IRI, or IRI prefix ending with `*`), see `triple_filter`.
 """
 
 
+# `DBPEDIA_OPTIONS="META_PATHS,-USE_PRED_TYPE"` turns options on / off (`-`)
+for option in os.environ.get("DBPEDIA_OPTIONS", "").split(","):
+    option = option.strip()
+    if option.startswith("-"):
+        OPTIONS.discard(option[1:])
+    elif option:
+        OPTIONS.add(option.lstrip("+"))
+
+
 def hasOption(option: str) -> bool:
     return option in OPTIONS
@@ -0,0 +1,62 @@
+"""
+In-process artifacts shared between the stages of one pipeline run (`main.py`).
+
+Each artifact is either handed over from the stage that built it,
+or lazily loaded from its dumped / generated file, at most once per run.
+"""
+
+from local_schema_extractor import (
+    LocalSchemaExtractor,
+    TypeDict,
+    LPVTable,
+    OUT_PATH,
+    OUTPUT_PREFIX,
+    OUTPUT_ATTRIBUTE,
+)
+from id_map import DictIdMap
+from typing import Iterator, Optional
+import os
+
+
+class PipelineSession:
+    def __init__(self, extractor: Optional[LocalSchemaExtractor] = None) -> None:
+        self.extractor = extractor if extractor else LocalSchemaExtractor()
+        self.type_node_name_id_dict: Optional[DictIdMap] = None
+        """ built by `schema_to_csv.build_type_node_name_id_dict` """
+
+    @property
+    def type_dict(self) -> TypeDict:
+        if not self.extractor.type_dict:
+            self.extractor.build_type_dict()
+        return self.extractor.type_dict
+
+    @property
+    def schema_edge(self) -> LPVTable:
+        if not self.extractor.schema_edge:
+            self.extractor.generate_schema_edge()
+        return self.extractor.schema_edge
+
+    @property
+    def num_of_schema_edges(self) -> int:
+        self.schema_edge
+        return self.extractor.num_of_schema_edges
+
+    @property
+    def schema_vertex(self) -> set[str]:
+        if not self.extractor.schema_vertex:
+            input_file = (
+                f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_vertices.txt"
+            )
+            if os.path.exists(input_file):
+                with open(input_file, "r") as f:
+                    self.extractor.schema_vertex.update(line.strip() for line in f)
+            else:
+                self.schema_edge
+                self.extractor.generate_schema_vertex()
+        return self.extractor.schema_vertex
+
+    def iter_schema_edges(self) -> Iterator[tuple[str, str, str]]:
+        for s_type, p_dict in self.schema_edge.items():
+            for p, o_types in p_dict.items():
+                for o_type in o_types:
+                    yield s_type, p, o_type
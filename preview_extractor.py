@@ -0,0 +1,157 @@
+"""
+# Fast-preview (approximate) schema extraction
+
+`python preview_extractor.py [--fraction 0.01] [--seed 0]`
+
+Instead of a full pass over `resource_pool_files()`, reads a random `fraction` of fixed-size blocks
+(seek to the block offset, realign to the next line boundary), so every triple is sampled with probability `fraction`.
+The `type_dict` is restricted to the resources appearing in the sampled triples (one byte-level pass over the type files).
+
+Outputs:
+- `out/dbpedia_preview_schema_edges.txt`: `{s_type} {p} {o_type} {sampled_support} {estimated_support}`
+- `out/dbpedia_preview_coverage.json`: sample size and how many schema edges were likely missed,
+  using Good-Turing sample coverage (`1 - f1 / n`) and the Chao1 richness estimate (`f1^2 / 2f2` unseen edges)
+"""
+
+from local_schema_extractor import (
+    LocalSchemaExtractor,
+    OUT_PATH,
+    OUTPUT_PREFIX,
+    TypeDict,
+)
+from sharded_extractor import read_byte_range
+from curie import compact, expand
+from triple_filter import TRIPLE_FILTER
+from tqdm.auto import tqdm
+import argparse, json, os, random, sys
+
+PREVIEW_ATTRIBUTE = "preview"
+PREVIEW_SCHEMA_EDGES_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{PREVIEW_ATTRIBUTE}_schema_edges.txt"
+)
+PREVIEW_COVERAGE_FILE = f"{OUT_PATH}/{OUTPUT_PREFIX}_{PREVIEW_ATTRIBUTE}_coverage.json"
+
+SAMPLE_FRACTION = 0.01
+BLOCK_SIZE = 64 << 10
+
+
+def sample_blocks(
+    files: list[str], fraction: float, seed: int
+) -> list[tuple[str, int, int]]:
+    """
+    `(file, start, end)` of `fraction` of all `BLOCK_SIZE` blocks, in file order.
+    """
+    blocks = [
+        (file, start, min(start + BLOCK_SIZE, os.path.getsize(file)))
+        for file in files
+        for start in range(0, os.path.getsize(file), BLOCK_SIZE)
+    ]
+    num_of_samples = max(1, round(len(blocks) * fraction)) if blocks else 0
+    sampled = random.Random(seed).sample(range(len(blocks)), num_of_samples)
+    return [blocks[i] for i in sorted(sampled)]
+
+
+def sample_triples(
+    blocks: list[tuple[str, int, int]],
+) -> list[tuple[str, str, str]]:
+    triples = list[tuple[str, str, str]]()
+    with tqdm(
+        total=sum(end - start for _, start, end in blocks),
+        unit="B",
+        unit_scale=True,
+        desc=f"Sampling `{len(blocks)}` blocks of `resource_pool_files`",
+    ) as bar:
+        for file, start, end in blocks:
+            for line in read_byte_range(file, start, end):
+                fields = line.split()
+                if len(fields) < 3 or (
+                    TRIPLE_FILTER and not TRIPLE_FILTER.accept_triple(*fields[0:3])
+                ):
+                    continue
+                triples.append(
+                    tuple(sys.intern(compact(f[1:-1].decode())) for f in fields[0:3])
+                )
+            bar.update(end - start)
+    return triples
+
+
+def build_sampled_type_dict(type_files: set[str], resources: set[str]) -> TypeDict:
+    """
+    Types of `resources` only, lines of other subjects are rejected before being decoded.
+    """
+    wanted = set(expand(r).encode() for r in resources)
+    type_dict = TypeDict()
+    for cnt, type_file in enumerate(sorted(type_files)):
+        with open(type_file, "rb") as f:
+            for line in tqdm(
+                f,
+                desc=f"Building sampled type_dict from `{type_file}` ({cnt + 1}/{len(type_files)})",
+            ):
+                s = line[1 : line.find(b">")]
+                if s not in wanted:
+                    continue
+                fields = line.split()
+                if TRIPLE_FILTER and not TRIPLE_FILTER.accept_type(
+                    fields[0], fields[2]
+                ):
+                    continue
+                if fields[1][1:-1].split(b"#")[-1] == b"type":
+                    type_dict.setdefault(compact(s.decode()), set[str]()).add(
+                        sys.intern(compact(fields[2][1:-1].decode()))
+                    )
+    return type_dict
+
+
+def coverage(support: dict[tuple[str, str, str], int]) -> dict[str, float]:
+    observations = sum(support.values())
+    f1 = sum(1 for count in support.values() if count == 1)
+    f2 = sum(1 for count in support.values() if count == 2)
+    unseen = f1 * f1 / (2 * f2) if f2 else f1 * (f1 - 1) / 2
+    return {
+        "observed_edges": len(support),
+        "observations": observations,
+        "singletons": f1,
+        "doubletons": f2,
+        "sample_coverage": 1 - f1 / observations if observations else 0.0,
+        "estimated_missed_edges": unseen,
+        "estimated_total_edges": len(support) + unseen,
+    }
+
+
+def exec(fraction: float = SAMPLE_FRACTION, seed: int = 0):
+    extractor = LocalSchemaExtractor()
+    blocks = sample_blocks(extractor.resource_pool_files, fraction, seed)
+    triples = sample_triples(blocks)
+    extractor.type_dict = build_sampled_type_dict(
+        extractor.type_files, set(r for s, _, o in triples for r in (s, o))
+    )
+    for s, p, o in tqdm(triples, desc="Generating preview schema_edge"):
+        extractor.add_triple(s, p, o)
+
+    support = extractor.schema_edge_support
+    with open(PREVIEW_SCHEMA_EDGES_FILE, "w") as f:
+        for (s_type, p, o_type), count in sorted(
+            support.items(), key=lambda item: -item[1]
+        ):
+            f.write(f"{s_type} {p} {o_type} {count} {round(count / fraction)}\n")
+
+    report = {"fraction": fraction, "seed": seed, "sampled_triples": len(triples)}
+    report.update(coverage(support))
+    with open(PREVIEW_COVERAGE_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"Preview: {report['observed_edges']} schema edges from {len(triples)} sampled triples, "
+        f"~{round(report['estimated_missed_edges'])} more likely missed "
+        f"(sample coverage {report['sample_coverage']:.2%})"
+    )
+    print(f"See preview `schema_edge` at `{PREVIEW_SCHEMA_EDGES_FILE}`")
+    print(f"See coverage estimate at `{PREVIEW_COVERAGE_FILE}`")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fast-preview schema extraction")
+    parser.add_argument("--fraction", type=float, default=SAMPLE_FRACTION)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    exec(args.fraction, args.seed)
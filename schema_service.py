@@ -0,0 +1,245 @@
+"""
+# Schema query service
+
+`python schema_service.py [--host 127.0.0.1] [--port 8080]`
+
+Loads the extracted schema (`schema_edges.txt`, with `schema_edge_support.txt` if present),
+the type id map and the predicate statistics once into dict indexes, and answers (JSON):
+
+- `GET /predicates?from={s_type}&to={o_type}`: predicates connecting `s_type` to `o_type`
+- `GET /object-types?predicate={p}` / `GET /subject-types?predicate={p}`
+- `GET /out-edges?type={s_type}` / `GET /in-edges?type={o_type}`
+- `GET /type-id?name={type}`
+- `GET /predicate-statistics?predicate={p}`
+- `POST /batch`: `[{"query": "predicates", "from": ..., "to": ...}, ...]`, one result per query
+- `GET /health`
+
+Source files are polled every `RELOAD_INTERVAL` seconds; when the pipeline rewrites any of them,
+a new index is built off the event loop and swapped in, queries keep being served by the old one meanwhile.
+"""
+
+from local_schema_extractor import (
+    OUT_PATH,
+    SCHEMA_EDGES_FILE,
+    SCHEMA_EDGE_SUPPORT_FILE,
+)
+from schema_statistics import PREDICATE_STATISTICS_FILE
+from id_map import DictIdMap, load_id_map
+from curie import compact
+from typing import Any, Callable, Optional
+from aiohttp import web
+import argparse, asyncio, csv, os, time
+
+TYPE_ID_SERIALIZED = f"{OUT_PATH}/type_node_name_id_map.txt"
+RELOAD_INTERVAL = 5.0
+SOURCE_FILES = [
+    SCHEMA_EDGES_FILE,
+    SCHEMA_EDGE_SUPPORT_FILE,
+    TYPE_ID_SERIALIZED,
+    PREDICATE_STATISTICS_FILE,
+]
+
+
+def source_versions() -> dict[str, Optional[tuple[int, int]]]:
+    versions = dict[str, Optional[tuple[int, int]]]()
+    for file in SOURCE_FILES:
+        if os.path.exists(file):
+            stat = os.stat(file)
+            versions[file] = (stat.st_size, stat.st_mtime_ns)
+        else:
+            versions[file] = None
+    return versions
+
+
+class SchemaIndex:
+    def __init__(self) -> None:
+        if not os.path.exists(SCHEMA_EDGES_FILE):
+            raise FileNotFoundError(
+                f"File `{SCHEMA_EDGES_FILE}` does not exist, please run `LocalSchemaExtractor.exec()` first."
+            )
+        self.versions = source_versions()
+        self.loaded_at = time.time()
+
+        support = dict[tuple[str, str, str], int]()
+        if os.path.exists(SCHEMA_EDGE_SUPPORT_FILE):
+            with open(SCHEMA_EDGE_SUPPORT_FILE, "r") as f:
+                for line in f:
+                    s_type, p, o_type, count = line.split()
+                    support[(s_type, p, o_type)] = int(count)
+
+        self.by_pair = dict[tuple[str, str], list[dict[str, Any]]]()
+        self.subject_types = dict[str, set[str]]()
+        self.object_types = dict[str, set[str]]()
+        self.out_edges = dict[str, list[dict[str, Any]]]()
+        self.in_edges = dict[str, list[dict[str, Any]]]()
+        self.num_of_edges = 0
+        with open(SCHEMA_EDGES_FILE, "r") as f:
+            for line in f:
+                s_type, p, o_type = line.split()[0:3]
+                count = support.get((s_type, p, o_type))
+                self.by_pair.setdefault((s_type, o_type), []).append(
+                    {"predicate": p, "support": count}
+                )
+                self.subject_types.setdefault(p, set()).add(s_type)
+                self.object_types.setdefault(p, set()).add(o_type)
+                self.out_edges.setdefault(s_type, []).append(
+                    {"predicate": p, "type": o_type, "support": count}
+                )
+                self.in_edges.setdefault(o_type, []).append(
+                    {"predicate": p, "type": s_type, "support": count}
+                )
+                self.num_of_edges += 1
+
+        self.type_ids = load_id_map(TYPE_ID_SERIALIZED, DictIdMap())
+
+        self.predicate_statistics = dict[str, dict[str, str]]()
+        if os.path.exists(PREDICATE_STATISTICS_FILE):
+            with open(PREDICATE_STATISTICS_FILE, "r", newline="") as f:
+                for row in csv.DictReader(f):
+                    self.predicate_statistics[row["Predicate"]] = row
+
+    def is_stale(self) -> bool:
+        return source_versions() != self.versions
+
+    def predicates(self, s_type: str, o_type: str) -> list[dict[str, Any]]:
+        return self.by_pair.get((compact(s_type), compact(o_type)), [])
+
+    def object_types_of(self, p: str) -> list[str]:
+        return sorted(self.object_types.get(compact(p), ()))
+
+    def subject_types_of(self, p: str) -> list[str]:
+        return sorted(self.subject_types.get(compact(p), ()))
+
+    def out_edges_of(self, s_type: str) -> list[dict[str, Any]]:
+        return self.out_edges.get(compact(s_type), [])
+
+    def in_edges_of(self, o_type: str) -> list[dict[str, Any]]:
+        return self.in_edges.get(compact(o_type), [])
+
+    def type_id(self, name: str) -> Optional[int]:
+        return self.type_ids.get(compact(name))
+
+    def statistics_of(self, p: str) -> Optional[dict[str, str]]:
+        return self.predicate_statistics.get(compact(p))
+
+
+class ServiceState:
+    def __init__(self) -> None:
+        self.index = SchemaIndex()
+        self.reloader: Optional[asyncio.Task] = None
+
+
+STATE = web.AppKey("state", ServiceState)
+
+
+QUERIES: dict[str, tuple[Callable[..., Any], list[str]]] = {
+    "predicates": (SchemaIndex.predicates, ["from", "to"]),
+    "object-types": (SchemaIndex.object_types_of, ["predicate"]),
+    "subject-types": (SchemaIndex.subject_types_of, ["predicate"]),
+    "out-edges": (SchemaIndex.out_edges_of, ["type"]),
+    "in-edges": (SchemaIndex.in_edges_of, ["type"]),
+    "type-id": (SchemaIndex.type_id, ["name"]),
+    "predicate-statistics": (SchemaIndex.statistics_of, ["predicate"]),
+}
+""" `{query: (lookup, required parameters)}` """
+
+
+def run_query(index: SchemaIndex, query: Any, params: dict[str, Any]) -> Any:
+    if not isinstance(query, str) or query not in QUERIES:
+        raise KeyError(f"Unknown query `{query}`")
+    lookup, names = QUERIES[query]
+    missing = [name for name in names if name not in params]
+    if missing:
+        raise KeyError(f"Missing parameters {missing} for `{query}`")
+    invalid = [name for name in names if not isinstance(params[name], str)]
+    if invalid:
+        raise ValueError(f"Parameters {invalid} of `{query}` must be strings")
+    return lookup(index, *[params[name] for name in names])
+
+
+def query_handler(query: str):
+    async def handle(request: web.Request) -> web.Response:
+        try:
+            result = run_query(request.app[STATE].index, query, request.query)
+        except (KeyError, ValueError) as e:
+            raise web.HTTPBadRequest(text=str(e.args[0]))
+        return web.json_response(result)
+
+    return handle
+
+
+async def handle_batch(request: web.Request) -> web.Response:
+    index = request.app[STATE].index
+    try:
+        queries = await request.json()
+    except ValueError as e:  # `json.JSONDecodeError`, or a body that is not utf-8
+        raise web.HTTPBadRequest(text=f"Invalid JSON body: {e}")
+    if not isinstance(queries, list):
+        raise web.HTTPBadRequest(text="Expected a list of queries")
+    results = list[Any]()
+    for params in queries:
+        if not isinstance(params, dict):
+            results.append({"error": f"Expected a query object, got `{params}`"})
+            continue
+        try:
+            results.append({"result": run_query(index, params.get("query"), params)})
+        except (KeyError, ValueError) as e:
+            results.append({"error": str(e.args[0])})
+    return web.json_response(results)
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    index: SchemaIndex = request.app[STATE].index
+    return web.json_response(
+        {
+            "schema_edges": index.num_of_edges,
+            "types": len(index.type_ids),
+            "predicates": len(index.object_types),
+            "loaded_at": index.loaded_at,
+        }
+    )
+
+
+async def reload_periodically(app: web.Application):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL)
+        state = app[STATE]
+        try:
+            if not state.index.is_stale():
+                continue
+            state.index = await loop.run_in_executor(None, SchemaIndex)
+            print(f"Reloaded schema index ({state.index.num_of_edges} schema edges)")
+        except Exception as e:
+            # outputs may be half-written / unreadable, keep serving the old index and retry on the next poll
+            print(f"Failed to reload schema index: {e!r}")
+
+
+async def start_reloader(app: web.Application):
+    app[STATE].reloader = asyncio.create_task(reload_periodically(app))
+
+
+async def stop_reloader(app: web.Application):
+    app[STATE].reloader.cancel()
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    print("Loading schema index ... ", end="")
+    app[STATE] = ServiceState()
+    print("Done!")
+    for query in QUERIES:
+        app.router.add_get(f"/{query}", query_handler(query))
+    app.router.add_post("/batch", handle_batch)
+    app.router.add_get("/health", handle_health)
+    app.on_startup.append(start_reloader)
+    app.on_cleanup.append(stop_reloader)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schema query service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
@@ -1,11 +1,55 @@
-from local_schema_extractor import DUMP_PATH
+from local_schema_extractor import (
+    DUMP_PATH,
+    OUT_PATH,
+    OUTPUT_PREFIX,
+    OUTPUT_ATTRIBUTE,
+    resource_pool_files,
+    TypeDict,
+    TYPE_DICT_SERIALIZED,
+    dump_exists,
+    load_type_dict,
+)
 from schema_to_csv_base import SCHEMA_EDGES_GENERAL
-import os, subprocess
+from sketches import HyperLogLog, SpaceSaving
+from csv_writer import CsvWriter, quoted
+from line_index import count_lines
+from pipeline_session import PipelineSession
+from typing import Optional
+import os
 from tqdm.auto import tqdm
 from options import hasOption
-
+from curie import compact
+from triple_filter import TRIPLE_FILTER
 
 DUMPED_PREDICATES_FILE = f"{DUMP_PATH}/predicates.txt"
+PREDICATE_STATISTICS_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_predicate_statistics.csv"
+)
+
+TOP_K_TYPES = 10
+SPACE_SAVING_CAPACITY = 4 * TOP_K_TYPES
+HLL_PRECISION = 12
+
+
+class PredicateStatistics:
+    """
+    Bounded-memory statistics of one predicate, over the raw triple stream.
+    """
+
+    def __init__(self) -> None:
+        self.num_of_triples = 0
+        self.distinct_subjects = HyperLogLog(HLL_PRECISION)
+        self.distinct_objects = HyperLogLog(HLL_PRECISION)
+        self.top_subject_types = SpaceSaving(SPACE_SAVING_CAPACITY)
+        self.top_object_types = SpaceSaving(SPACE_SAVING_CAPACITY)
+
+    def merge(self, other: "PredicateStatistics"):
+        self.num_of_triples += other.num_of_triples
+        self.distinct_subjects.merge(other.distinct_subjects)
+        self.distinct_objects.merge(other.distinct_objects)
+        self.top_subject_types.merge(other.top_subject_types)
+        self.top_object_types.merge(other.top_object_types)
+        return self
 
 
 def pre_check():
@@ -17,22 +61,22 @@ def pre_check():
         )
 
 
-def dump_predicates():
+def dump_predicates(session: Optional[PipelineSession] = None):
     if hasOption("SCHEMA_STATISTICS"):
         pre_check()
         predicates = set[str]()
-        with open(SCHEMA_EDGES_GENERAL + ".txt", "r") as f:
-            num_of_lines = int(
-                subprocess.check_output(["wc", "-l"], stdin=f).split()[0]
-            )
-            f.seek(0)
-            with tqdm(
-                total=num_of_lines,
-                desc=f"Extracting predicates from `{SCHEMA_EDGES_GENERAL}.txt`",
-            ) as bar:
-                for line in f:
-                    predicates.add(line.strip().split()[1])
-                    bar.update(1)
+        if session:
+            for p_dict in session.schema_edge.values():
+                predicates.update(p_dict.keys())
+        else:
+            with open(SCHEMA_EDGES_GENERAL + ".txt", "r") as f:
+                with tqdm(
+                    total=count_lines(SCHEMA_EDGES_GENERAL + ".txt"),
+                    desc=f"Extracting predicates from `{SCHEMA_EDGES_GENERAL}.txt`",
+                ) as bar:
+                    for line in f:
+                        predicates.add(line.strip().split()[1])
+                        bar.update(1)
         with open(DUMPED_PREDICATES_FILE, "w") as f:
             with tqdm(
                 total=len(predicates),
@@ -47,5 +91,109 @@ def dump_predicates():
         )
 
 
+def load_type_dict_if_dumped() -> TypeDict:
+    if not dump_exists(TYPE_DICT_SERIALIZED):
+        print(
+            f"`{TYPE_DICT_SERIALIZED}` does not exist, `top types per predicate` will be left empty ..."
+        )
+        return TypeDict()
+    print(f"Loading type_dict from `{TYPE_DICT_SERIALIZED}`(dumped) ... ", end="")
+    type_dict = load_type_dict(TYPE_DICT_SERIALIZED)
+    print("Done!")
+    return type_dict
+
+
+def collect_triple_statistics(
+    files: list[str], type_dict: TypeDict
+) -> dict[str, PredicateStatistics]:
+    """
+    One streaming pass over raw `<s> <p> <o>` triples, memory is bounded by `num_of_predicates`.
+    """
+    statistics = dict[str, PredicateStatistics]()
+    for cnt, file in enumerate(files):
+        with tqdm(
+            total=count_lines(file),
+            desc=f"Collecting triple statistics from `{file}` ({cnt + 1}/{len(files)})",
+        ) as bar:
+            with open(file, "r") as f:
+                for line in f:
+                    fields = line.split()[0:3]
+                    if TRIPLE_FILTER and not TRIPLE_FILTER.accept_triple(
+                        *(field.encode() for field in fields)
+                    ):
+                        bar.update(1)
+                        continue
+                    s, p, o = [compact(literal[1:-1]) for literal in fields]
+                    if p not in statistics:
+                        statistics[p] = PredicateStatistics()
+                    stat = statistics[p]
+                    stat.num_of_triples += 1
+                    stat.distinct_subjects.add(s)
+                    stat.distinct_objects.add(o)
+                    for s_type in type_dict.get(s, ()):
+                        stat.top_subject_types.update(s_type)
+                    for o_type in type_dict.get(o, ()):
+                        stat.top_object_types.update(o_type)
+                    bar.update(1)
+    return statistics
+
+
+def dump_triple_statistics(
+    files: Optional[list[str]] = None,
+    output_filename: str = PREDICATE_STATISTICS_FILE,
+    session: Optional[PipelineSession] = None,
+):
+    if not hasOption("TRIPLE_STATISTICS"):
+        print(
+            "TRIPLE_STATISTICS is not set to True, skipping triple statistics extraction ..."
+        )
+        return
+
+    statistics = collect_triple_statistics(
+        files if files else resource_pool_files(),
+        session.type_dict if session else load_type_dict_if_dumped(),
+    )
+
+    def top_types(sketch: SpaceSaving) -> list[str]:
+        """
+        `[types, counts]`, each joined by `|` (cannot appear in an IRI, unlike `:` / `;`).
+        """
+        top = sketch.top(TOP_K_TYPES)
+        return [
+            quoted("|".join(t for t, _, _ in top)),
+            quoted("|".join(str(c) for _, c, _ in top)),
+        ]
+
+    with CsvWriter(
+        output_filename,
+        [
+            "Predicate",
+            "Triples",
+            "DistinctSubjects",
+            "DistinctObjects",
+            "TopSubjectTypes",
+            "TopSubjectTypeCounts",
+            "TopObjectTypes",
+            "TopObjectTypeCounts",
+        ],
+        total=len(statistics),
+        desc=f"Dumping triple statistics to `{output_filename}`",
+    ) as writer:
+        for p, stat in sorted(
+            statistics.items(), key=lambda kv: kv[1].num_of_triples, reverse=True
+        ):
+            writer.write_row(
+                [
+                    quoted(p),
+                    str(stat.num_of_triples),
+                    str(stat.distinct_subjects.count()),
+                    str(stat.distinct_objects.count()),
+                ]
+                + top_types(stat.top_subject_types)
+                + top_types(stat.top_object_types)
+            )
+
+
 if __name__ == "__main__":
     dump_predicates()
+    dump_triple_statistics()
@@ -1,6 +1,11 @@
 import os
-from tqdm.auto import tqdm
+from csv_writer import CsvWriter, quoted, escaped
 from options import hasOption
+from id_map import DictIdMap, load_id_map, extend_id_map
+from typing import Optional
+from pipeline_session import PipelineSession
+from local_schema_extractor import PREFIXES_FILE
+from curie import dump_prefixes
 from schema_to_csv_base import SCHEMA_EDGES_GENERAL, SCHEMA_VERTICES_GENERAL
 
 OUT_PATH = "out"
@@ -9,119 +14,108 @@ NODES = f"{OUT_PATH}/type_nodes"
 
 NAMESPACE = "Type"
 
-type_node_name_id_dict = dict[str, int]()
+type_node_name_id_dict = DictIdMap()
 
 
 def tt_relationships(
     input_filename: str = f"{SCHEMA_EDGES_GENERAL}.txt",
     output_filename: str = f"{RELATIONSHIP}.csv",
     detailed: bool = True,
+    session: Optional[PipelineSession] = None,
 ):
     global type_node_name_id_dict
-    if not os.path.exists(input_filename):
-        raise FileNotFoundError(
-            f"File `{input_filename}` does not exist, please run `LocalSchemaExtractor.exec()` first."
-        )
-    with open(input_filename, "r") as f:
-        lines = f.readlines()
-    with open(output_filename, "w", newline="") as f:
-        RELATION_TYPE = "TypeType"
-        headers = [
-            f":START_ID({NAMESPACE})",
-            f":END_ID({NAMESPACE})",
-            ":TYPE",
-            "Start",
-            "End",
-        ] + (
-            []
-            if hasOption("USE_PRED_TYPE")
-            else [
-                f"Predicate",  # option: 1. add namespace 2. change name (e.g. `predicate_between_types`)
-            ]
-        )
-        f.write(",".join(headers) + "\n")
-        with tqdm(
-            total=len(lines),
-            desc=f"Converting `schema_edges.txt` to `type_type_relationships.csv`",
-        ) as bar:
-            for line in lines:
-                s, p, o = line.strip().split()[0:3]
-                s_id, o_id = (
-                    type_node_name_id_dict[s],
-                    type_node_name_id_dict[o],
-                )
-                s_type, pred, o_type = (
-                    f'"{s}"',
-                    f'"{p}"',
-                    f'"{o}"',
-                )
-                TYPE = p if hasOption("USE_PRED_TYPE") else RELATION_TYPE
-                row = [str(s_id), str(o_id), TYPE, s_type, o_type] + (
-                    [] if hasOption("USE_PRED_TYPE") else [pred]
-                )
-                f.write(",".join(row) + "\n")
-                bar.update(1)
+    if session:
+        edges, num_of_edges = session.iter_schema_edges(), session.num_of_schema_edges
+    else:
+        if not os.path.exists(input_filename):
+            raise FileNotFoundError(
+                f"File `{input_filename}` does not exist, please run `LocalSchemaExtractor.exec()` first."
+            )
+        with open(input_filename, "r") as f:
+            lines = f.readlines()
+        edges, num_of_edges = (line.strip().split()[0:3] for line in lines), len(lines)
+    RELATION_TYPE = "TypeType"
+    headers = [
+        f":START_ID({NAMESPACE})",
+        f":END_ID({NAMESPACE})",
+        ":TYPE",
+        "Start",
+        "End",
+    ] + (
+        []
+        if hasOption("USE_PRED_TYPE")
+        else [
+            f"Predicate",  # option: 1. add namespace 2. change name (e.g. `predicate_between_types`)
+        ]
+    )
+    use_pred_type = hasOption("USE_PRED_TYPE")
+    with CsvWriter(
+        output_filename,
+        headers,
+        total=num_of_edges,
+        desc=f"Converting `schema_edges.txt` to `type_type_relationships.csv`",
+    ) as writer:
+        for s, p, o in edges:
+            s_id, o_id = (
+                type_node_name_id_dict[s],
+                type_node_name_id_dict[o],
+            )
+            TYPE = escaped(p) if use_pred_type else RELATION_TYPE
+            row = [str(s_id), str(o_id), TYPE, quoted(s), quoted(o)] + (
+                [] if use_pred_type else [quoted(p)]
+            )
+            writer.write_row(row)
 
 
 def type_nodes(
     input_filename: str = f"{SCHEMA_VERTICES_GENERAL}.txt",
     output_filename: str = f"{NODES}.csv",
+    session: Optional[PipelineSession] = None,
 ):
     global type_node_name_id_dict
-    if not os.path.exists(input_filename):
-        raise FileNotFoundError(
-            f"File `{input_filename}` does not exist, please run `LocalSchemaExtractor.exec()` first."
-        )
-    with open(input_filename, "r") as f:
-        lines = f.readlines()
-    with open(output_filename, "w", newline="") as f:
-        headers = [f":ID({NAMESPACE})", ":LABEL", "Name"]
-        f.write(",".join(headers) + "\n")
-        with tqdm(
-            total=len(lines),
-            desc=f"Converting `schema_vertices.txt` to `type_nodes.csv`",
-        ) as bar:
-            for line in lines:
-                raw = line.strip()
-                type_id = type_node_name_id_dict[raw]
-                type_info = f'"{raw}"'
-                row = [str(type_id), "Type", type_info]
-                f.write(",".join(row) + "\n")
-                bar.update(1)
-
-
-def build_type_node_name_id_dict():
+    if session:
+        lines = list(session.schema_vertex)
+    else:
+        if not os.path.exists(input_filename):
+            raise FileNotFoundError(
+                f"File `{input_filename}` does not exist, please run `LocalSchemaExtractor.exec()` first."
+            )
+        with open(input_filename, "r") as f:
+            lines = f.readlines()
+    headers = [f":ID({NAMESPACE})", ":LABEL", "Name"]
+    with CsvWriter(
+        output_filename,
+        headers,
+        total=len(lines),
+        desc=f"Converting `schema_vertices.txt` to `type_nodes.csv`",
+    ) as writer:
+        for line in lines:
+            raw = line.strip()
+            type_id = type_node_name_id_dict[raw]
+            writer.write_row([str(type_id), "Type", quoted(raw)])
+
+
+def build_type_node_name_id_dict(session: Optional[PipelineSession] = None):
     global type_node_name_id_dict
 
     raw_type_vertices = f"{SCHEMA_VERTICES_GENERAL}.txt"
     type_node_name_id_serialized = f"{OUT_PATH}/type_node_name_id_map.txt"
 
-    if os.path.exists(type_node_name_id_serialized):
-        with open(type_node_name_id_serialized, "r") as f:
-            lines = f.readlines()
-            with tqdm(
-                total=len(lines),
-                desc=f"Loading `type_node_name_id_dict` from `{type_node_name_id_serialized}`",
-            ) as bar:
-                for line in lines:
-                    name, id = line.strip().split()
-                    type_node_name_id_dict[name] = int(id)
-                    bar.update(1)
-        return
-
-    with open(raw_type_vertices, "r") as f:
-        with open(type_node_name_id_serialized, "w") as f2:
-            lines = f.readlines()
-            with tqdm(
-                total=len(lines),
-                desc=f"Building `type_node_name_id_dict` from `{raw_type_vertices}`",
-            ) as bar:
-                for cnt, line in enumerate(lines):
-                    name = line.strip()
-                    id = cnt
-                    type_node_name_id_dict[name] = id
-                    f2.write(f"{name} {id}\n")
-                    bar.update(1)
+    load_id_map(type_node_name_id_serialized, type_node_name_id_dict)
+
+    if session:
+        names = session.schema_vertex
+    else:
+        with open(raw_type_vertices, "r") as f:
+            names = [line.strip() for line in f]
+    new_names = extend_id_map(
+        type_node_name_id_serialized, type_node_name_id_dict, names
+    )
+    print(
+        f"`type_node_name_id_dict`: {len(type_node_name_id_dict)} ids, {len(new_names)} newly assigned"
+    )
+    if session:
+        session.type_node_name_id_dict = type_node_name_id_dict
 
 
 def notify_done():
@@ -130,10 +124,11 @@ def notify_done():
     print(f"See `type_type_relationships` at: `{RELATIONSHIP}.csv`")
 
 
-def exec():
-    build_type_node_name_id_dict()
-    type_nodes()
-    tt_relationships()
+def exec(session: Optional[PipelineSession] = None):
+    build_type_node_name_id_dict(session)
+    type_nodes(session=session)
+    tt_relationships(session=session)
+    dump_prefixes(PREFIXES_FILE)
     notify_done()
 
 
@@ -1,6 +1,7 @@
 import os
 from local_schema_extractor import OUTPUT_PREFIX, OUTPUT_ATTRIBUTE
-from tqdm.auto import tqdm
+from io_pipeline import transform_lines
+from csv_writer import quoted
 
 OUT_PATH = "out"
 SCHEMA_EDGES_GENERAL = f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_schema_edges"
@@ -17,19 +18,16 @@ def convert_edges_to_csv(
         raise FileNotFoundError(
             f"File `{input_filename}` does not exist, please run `LocalSchemaExtractor.exec()` first."
         )
-    with open(input_filename, "r") as f:
-        lines = f.readlines()
-    with open(output_filename, "w", newline="") as f:
-        headers = ["START_TYPE", "PROPERTY_TYPE", "END_TYPE"]
-        f.write(",".join(headers) + "\n")
-        with tqdm(
-            total=len(lines),
-            desc=f"Converting `schema_edges.txt` to `schema_edges.csv`",
-        ) as bar:
-            for line in lines:
-                spo = [f'"{e}"' for e in line.strip().split()][0:3]
-                f.write(",".join(spo) + "\n")
-                bar.update(1)
+    headers = ["START_TYPE", "PROPERTY_TYPE", "END_TYPE"]
+    transform_lines(
+        input_filename,
+        output_filename,
+        lambda lines: (
+            ",".join([quoted(e) for e in line.split()[0:3]]) for line in lines
+        ),
+        header=",".join(headers),
+        desc=f"Converting `schema_edges.txt` to `schema_edges.csv`",
+    )
 
 
 def convert_vertices_to_csv(
@@ -40,19 +38,14 @@ def convert_vertices_to_csv(
         raise FileNotFoundError(
             f"File `{input_filename}` does not exist, please run `LocalSchemaExtractor.exec()` first."
         )
-    with open(input_filename, "r") as f:
-        lines = f.readlines()
-    with open(output_filename, "w", newline="") as f:
-        headers = ["LABEL_TYPE"]
-        f.write(",".join(headers) + "\n")
-        with tqdm(
-            total=len(lines),
-            desc=f"Converting `schema_vertices.txt` to `schema_vertices.csv`",
-        ) as bar:
-            for line in lines:
-                label = f'"{line.strip()}"'
-                f.write(label + "\n")
-                bar.update(1)
+    headers = ["LABEL_TYPE"]
+    transform_lines(
+        input_filename,
+        output_filename,
+        lambda lines: (quoted(line.strip()) for line in lines),
+        header=",".join(headers),
+        desc=f"Converting `schema_vertices.txt` to `schema_vertices.csv`",
+    )
 
 
 def exec():
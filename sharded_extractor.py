@@ -0,0 +1,196 @@
+"""
+# Sharded (map-reduce) schema extraction
+
+Each phase is a separate process invocation over a shared filesystem,
+so shards can be spread across a cluster scheduler:
+
+1. `python sharded_extractor.py plan [--shard-size BYTES]`
+   splits `resource_pool_files()` into byte ranges cut at line starts of their `line_index` (`dump/shards/manifest.json`).
+2. `python sharded_extractor.py map SHARD_ID` (one per shard)
+   emits a partial, sorted `schema_edge` (with support) and predicate statistics file.
+3. `python sharded_extractor.py reduce`
+   merges all partials into `schema_edges.txt` / `schema_vertices.txt` (and `schema_edge_support.txt`).
+
+`dump/type_dict.ndjson` must have been built (`LocalSchemaExtractor().build_type_dict()`) before `map`.
+"""
+
+from local_schema_extractor import (
+    LocalSchemaExtractor,
+    DUMP_PATH,
+    resource_pool_files,
+    SCHEMA_EDGE_SUPPORT_FILE,
+    TYPE_DICT_SERIALIZED,
+    dump_exists,
+)
+from schema_to_csv_base import SCHEMA_EDGES_GENERAL, SCHEMA_VERTICES_GENERAL
+from typing import Any, Iterator
+from curie import compact
+from triple_filter import TRIPLE_FILTER
+from line_index import line_index
+from tqdm.auto import tqdm
+import argparse, heapq, json, os
+
+SHARD_PATH = f"{DUMP_PATH}/shards"
+MANIFEST = f"{SHARD_PATH}/manifest.json"
+SHARD_SIZE = 256 << 20
+PREDICATE_TRIPLE_COUNTS_FILE = f"{DUMP_PATH}/predicate_triple_counts.txt"
+
+
+def part_file(shard_id: int, kind: str) -> str:
+    return f"{SHARD_PATH}/part-{shard_id:05d}.{kind}"
+
+
+def read_byte_range(file: str, start: int, end: int) -> Iterator[bytes]:
+    """
+    Lines whose first byte lies in `[start, end)`.
+    """
+    with open(file, "rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            pos = start - 1 + len(f.readline())  # belongs to the previous range
+        else:
+            pos = 0
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+
+def plan(shard_size: int = SHARD_SIZE):
+    os.makedirs(SHARD_PATH, exist_ok=True)
+    shards = list[dict[str, Any]]()
+    for file in resource_pool_files():
+        for start, end in line_index(file).byte_ranges(shard_size):
+            shards.append({"id": len(shards), "file": file, "start": start, "end": end})
+    with open(MANIFEST, "w") as f:
+        json.dump({"shard_size": shard_size, "shards": shards}, f, indent=2)
+    print(f"Planned `{len(shards)}` shards, see `{MANIFEST}`")
+
+
+def load_manifest() -> dict[str, Any]:
+    if not os.path.exists(MANIFEST):
+        raise FileNotFoundError(
+            f"File `{MANIFEST}` does not exist, please run `sharded_extractor.py plan` first."
+        )
+    with open(MANIFEST, "r") as f:
+        return json.load(f)
+
+
+def map_shard(shard_id: int):
+    shard = load_manifest()["shards"][shard_id]
+    if not dump_exists(TYPE_DICT_SERIALIZED):
+        raise FileNotFoundError(
+            f"File `{TYPE_DICT_SERIALIZED}` does not exist, please run `LocalSchemaExtractor().build_type_dict()` first."
+        )
+    extractor = LocalSchemaExtractor().build_type_dict()
+    predicate_triple_counts = dict[str, int]()
+
+    with tqdm(
+        total=shard["end"] - shard["start"],
+        unit="B",
+        unit_scale=True,
+        desc=f"Mapping shard `{shard_id}` of `{shard['file']}`",
+    ) as bar:
+        for line in read_byte_range(shard["file"], shard["start"], shard["end"]):
+            fields = line.split()
+            if len(fields) < 3 or (
+                TRIPLE_FILTER and not TRIPLE_FILTER.accept_triple(*fields[0:3])
+            ):
+                bar.update(len(line))
+                continue
+            s, p, o = [compact(literal[1:-1].decode()) for literal in fields[0:3]]
+            predicate_triple_counts[p] = predicate_triple_counts.get(p, 0) + 1
+            extractor.add_triple(s, p, o)
+            bar.update(len(line))
+
+    # write then rename, so `reduce` never sees a half-written partial
+    for kind, rows in [
+        ("edges", sorted(extractor.schema_edge_support.items())),
+        ("stats", sorted(predicate_triple_counts.items())),
+    ]:
+        with open(part_file(shard_id, kind) + ".tmp", "w") as f:
+            for key, count in rows:
+                key = " ".join(key) if isinstance(key, tuple) else key
+                f.write(f"{key} {count}\n")
+        os.replace(part_file(shard_id, kind) + ".tmp", part_file(shard_id, kind))
+
+
+def merge_counted(files: list[str]) -> Iterator[tuple[str, int]]:
+    """
+    Merge sorted `{key} {count}` files, summing the counts of equal keys.
+    """
+
+    def parse(file: str) -> Iterator[tuple[str, int]]:
+        with open(file, "r") as f:
+            for line in f:
+                key, count = line.rstrip("\n").rsplit(" ", 1)
+                yield key, int(count)
+
+    prev_key, total = None, 0
+    for key, count in heapq.merge(*[parse(file) for file in files]):
+        if key != prev_key:
+            if prev_key is not None:
+                yield prev_key, total
+            prev_key, total = key, 0
+        total += count
+    if prev_key is not None:
+        yield prev_key, total
+
+
+def reduce():
+    shards = load_manifest()["shards"]
+    missing = [
+        shard["id"]
+        for shard in shards
+        if not os.path.exists(part_file(shard["id"], "edges"))
+        or not os.path.exists(part_file(shard["id"], "stats"))
+    ]
+    if missing:
+        raise FileNotFoundError(f"Shards `{missing}` have not been mapped yet.")
+
+    vertices = set[str]()
+    with open(f"{SCHEMA_EDGES_GENERAL}.txt", "w") as edges_f, open(
+        SCHEMA_EDGE_SUPPORT_FILE, "w"
+    ) as support_f:
+        for edge, support in tqdm(
+            merge_counted([part_file(shard["id"], "edges") for shard in shards]),
+            desc=f"Reducing schema_edge into `{SCHEMA_EDGES_GENERAL}.txt`",
+        ):
+            s_type, _, o_type = edge.split()
+            vertices.update((s_type, o_type))
+            edges_f.write(f"{edge}\n")
+            support_f.write(f"{edge} {support}\n")
+
+    with open(f"{SCHEMA_VERTICES_GENERAL}.txt", "w") as f:
+        for v in sorted(vertices):
+            f.write(f"{v}\n")
+
+    with open(PREDICATE_TRIPLE_COUNTS_FILE, "w") as f:
+        for p, count in merge_counted(
+            [part_file(shard["id"], "stats") for shard in shards]
+        ):
+            f.write(f"{p} {count}\n")
+
+    print("Successfully reduced `schema_edge` and `schema_vertex` ...")
+    print(f"See `schema_edge` at `{SCHEMA_EDGES_GENERAL}.txt`")
+    print(f"See `schema_vertex` at `{SCHEMA_VERTICES_GENERAL}.txt`")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded schema extraction")
+    commands = parser.add_subparsers(dest="command", required=True)
+    plan_parser = commands.add_parser("plan", help="split input files into shards")
+    plan_parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    map_parser = commands.add_parser("map", help="process one shard")
+    map_parser.add_argument("shard_id", type=int)
+    commands.add_parser("reduce", help="merge all mapped shards")
+    args = parser.parse_args()
+
+    if args.command == "plan":
+        plan(args.shard_size)
+    elif args.command == "map":
+        map_shard(args.shard_id)
+    else:
+        reduce()
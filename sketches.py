@@ -0,0 +1,86 @@
+import math
+from hashlib import blake2b
+from typing import Hashable, Optional
+
+
+def fingerprint64(value: str) -> int:
+    """
+    Stable `64-bit` fingerprint of `value` (unlike `hash()`, it does not change between processes).
+    """
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "little")
+
+
+class SpaceSaving:
+    """
+    `Space-Saving` heavy hitters, keeps at most `capacity` counters.
+
+    Each reported count over-estimates the true count by at most its `error`.
+    """
+
+    def __init__(self, capacity: int = 32) -> None:
+        self.capacity = capacity
+        self.counters = dict[Hashable, int]()
+        self.errors = dict[Hashable, int]()
+
+    def update(self, item: Hashable, count: int = 1):
+        if item in self.counters:
+            self.counters[item] += count
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[item] = count
+            self.errors[item] = 0
+            return
+        victim = min(self.counters, key=self.counters.__getitem__)
+        min_count = self.counters.pop(victim)
+        del self.errors[victim]
+        self.counters[item] = min_count + count
+        self.errors[item] = min_count
+
+    def merge(self, other: "SpaceSaving"):
+        for item, count in other.counters.items():
+            self.update(item, count)
+        return self
+
+    def top(self, n: Optional[int] = None) -> list[tuple[Hashable, int, int]]:
+        """
+        `[(item, count, error)]`, sorted by `count` (descending).
+        """
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1], reverse=True)
+        return [(item, count, self.errors[item]) for item, count in ranked[:n]]
+
+
+class HyperLogLog:
+    """
+    `HyperLogLog` distinct counter, uses `2 ** precision` bytes.
+
+    Standard error is about `1.04 / sqrt(2 ** precision)` (`~1.6%` for `precision = 12`).
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, value: str):
+        self.add_hash(fingerprint64(value))
+
+    def add_hash(self, h: int):
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge `HyperLogLog`s with different precision.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0**-r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)  # linear counting
+        return round(estimate)
@@ -0,0 +1,272 @@
+"""
+# k-hop subgraph extraction
+
+1. `python subgraph_extractor.py index` (once)
+   builds a CSR adjacency index (forward and reverse) of `spo_mapping_files()` into `dump/adjacency/`:
+   - `nodes.txt` (`{name} {id}`, sorted) + its compact id map, `nodes.offsets.npy` (`id -> byte offset`)
+   - `predicates.txt` (line number = predicate id)
+   - `{fwd|rev}_offsets.npy`, `{fwd|rev}_targets.npy`, `{fwd|rev}_predicates.npy`
+2. `python subgraph_extractor.py extract -k 2 SEED ...`
+   runs a bounded BFS (both directions) from seed resources / types over the `mmap`-ed index,
+   then writes the induced subgraph through `instance_to_csv`'s csv builders
+   into `out/subgraph/` (`--out`), with its own instance id map.
+"""
+
+from local_schema_extractor import (
+    OUT_PATH,
+    DUMP_PATH,
+    spo_mapping_files,
+    TYPE_DICT_SERIALIZED,
+    TypeDict,
+    dump_exists,
+    load_type_dict,
+)
+from compact_id_map import CompactIdMap, build_compact_id_map
+from csr import save_csr, load_csr, save_predicates, load_predicates
+from typing import Iterator, Optional
+from curie import compact
+from tqdm.auto import tqdm
+from utils import external_sort
+from edge_dedup import dump_spooled_edges
+from io_pipeline import batched
+import numpy as np
+import argparse, mmap, os
+import instance_to_csv
+
+ADJACENCY_PATH = f"{DUMP_PATH}/adjacency"
+NODES = f"{ADJACENCY_PATH}/nodes.txt"
+NODE_OFFSETS = f"{ADJACENCY_PATH}/nodes.offsets.npy"
+SUBGRAPH_EDGES = f"{ADJACENCY_PATH}/subgraph_edges.tsv"
+SUBGRAPH_OUT_PATH = f"{OUT_PATH}/subgraph"
+
+MAX_NODES = int(1e5)
+MAX_SEEDS_PER_TYPE = 1000
+
+
+def iter_triples(files: list[str]) -> Iterator[tuple[str, str, str]]:
+    for cnt, file in enumerate(files):
+        with open(file, "r") as f:
+            for line in tqdm(f, desc=f"Reading `{file}` ({cnt + 1}/{len(files)})"):
+                fields = line.split()
+                if len(fields) >= 3:
+                    yield compact(fields[0][1:-1]), compact(fields[1][1:-1]), compact(
+                        fields[2][1:-1]
+                    )
+
+
+def build_index(files: Optional[list[str]] = None):
+    files = files if files else spo_mapping_files()
+    os.makedirs(ADJACENCY_PATH, exist_ok=True)
+
+    names_tmp = f"{ADJACENCY_PATH}/names.tmp"
+    with open(names_tmp, "w") as f:
+        for s, _, o in iter_triples(files):
+            f.write(f"{s}\n{o}\n")
+    external_sort(names_tmp, names_tmp, "-u")
+    offsets = list[int]()
+    with open(names_tmp, "rb") as src, open(NODES, "wb") as dst:
+        for id, name in enumerate(src):
+            offsets.append(dst.tell())
+            dst.write(name.rstrip(b"\n") + f" {id}\n".encode())
+    os.remove(names_tmp)
+    np.save(NODE_OFFSETS, np.asarray(offsets, dtype=np.int64))
+    build_compact_id_map(NODES)
+    num_of_nodes = len(offsets)
+
+    node_ids = CompactIdMap(NODES)
+    predicate_ids = dict[str, int]()
+    edges = {kind: open(f"{ADJACENCY_PATH}/{kind}.bin", "wb") for kind in "spo"}
+
+    def flush(chunk: list[tuple[str, str, str]]):
+        s_ids = node_ids.lookup_batch([s for s, _, _ in chunk]).astype(np.int32)
+        o_ids = node_ids.lookup_batch([o for _, _, o in chunk]).astype(np.int32)
+        p_ids = np.fromiter(
+            (predicate_ids.setdefault(p, len(predicate_ids)) for _, p, _ in chunk),
+            dtype=np.int32,
+        )
+        s_ids.tofile(edges["s"])
+        p_ids.tofile(edges["p"])
+        o_ids.tofile(edges["o"])
+
+    for chunk in batched(iter_triples(files)):
+        flush(chunk)
+    for f in edges.values():
+        f.close()
+    node_ids.close()
+
+    save_predicates(ADJACENCY_PATH, predicate_ids)
+
+    s, p, o = [np.fromfile(f"{ADJACENCY_PATH}/{kind}.bin", np.int32) for kind in "spo"]
+    for direction, src, dst in [("fwd", s, o), ("rev", o, s)]:
+        print(f"Building `{direction}` CSR ({len(src)} edges) ... ", end="")
+        save_csr(ADJACENCY_PATH, src, dst, p, num_of_nodes, prefix=f"{direction}_")
+        print("Done!")
+    for kind in "spo":
+        os.remove(f"{ADJACENCY_PATH}/{kind}.bin")
+
+
+class AdjacencyIndex:
+    def __init__(self) -> None:
+        if not os.path.exists(f"{ADJACENCY_PATH}/rev_predicates.npy"):
+            raise FileNotFoundError(
+                f"Adjacency index in `{ADJACENCY_PATH}` does not exist, please run `subgraph_extractor.py index` first."
+            )
+
+        self.node_ids = CompactIdMap(NODES)
+        self.node_offsets = np.load(NODE_OFFSETS, mmap_mode="r")
+        self.csr = {
+            direction: load_csr(ADJACENCY_PATH, prefix=f"{direction}_")
+            for direction in ["fwd", "rev"]
+        }
+        self.predicates = load_predicates(ADJACENCY_PATH)
+        self.nodes_file = open(NODES, "rb")
+        self.nodes_mm = mmap.mmap(self.nodes_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def num_of_nodes(self) -> int:
+        return len(self.node_offsets)
+
+    def name_of(self, id: int) -> str:
+        start = int(self.node_offsets[id])
+        end = self.nodes_mm.find(b" ", start)
+        return self.nodes_mm[start:end].decode()
+
+    def neighbors(
+        self, nodes: np.ndarray, direction: str
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All `(source, target, predicate)` edges leaving `nodes`, gathered without a Python loop.
+        """
+        offsets, targets, predicates = self.csr[direction]
+        starts, ends = offsets[nodes], offsets[nodes + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        positions += np.arange(total)
+        return np.repeat(nodes, lengths), targets[positions], predicates[positions]
+
+
+def resolve_seeds(
+    index: AdjacencyIndex, seeds: list[str], type_dict: Optional[TypeDict]
+) -> np.ndarray:
+    """
+    Seeds are resources (by IRI), or types (every instance of the type, at most `MAX_SEEDS_PER_TYPE`).
+    """
+    seeds = [compact(seed) for seed in seeds]
+    ids = list(index.node_ids.lookup_batch(seeds, default=-1))
+    type_seeds = set(seed for seed, id in zip(seeds, ids) if id < 0)
+    if type_seeds and type_dict:
+        instances = {t: list[str]() for t in type_seeds}
+        for inst, types in type_dict.items():
+            for t in types & type_seeds:
+                if len(instances[t]) < MAX_SEEDS_PER_TYPE:
+                    instances[t].append(inst)
+        for t in type_seeds:
+            ids += list(index.node_ids.lookup_batch(instances[t], default=-1))
+    ids = np.asarray(ids, dtype=np.int64)
+    return np.unique(ids[ids >= 0])
+
+
+def bfs(index: AdjacencyIndex, seeds: np.ndarray, k: int, max_nodes: int) -> np.ndarray:
+    visited = np.zeros(index.num_of_nodes, dtype=bool)
+    visited[seeds[:max_nodes]] = True
+    frontier = seeds[:max_nodes]
+    for hop in range(k):
+        budget = max_nodes - int(visited.sum())
+        if budget <= 0 or len(frontier) == 0:
+            break
+        reached = np.concatenate(
+            [index.neighbors(frontier, direction)[1] for direction in ["fwd", "rev"]]
+        )
+        reached = np.unique(reached)
+        frontier = reached[~visited[reached]][:budget]
+        visited[frontier] = True
+        print(f"Hop `{hop + 1}`: reached `{len(frontier)}` new instances")
+    return np.flatnonzero(visited)
+
+
+def export(
+    index: AdjacencyIndex,
+    nodes: np.ndarray,
+    type_dict: Optional[TypeDict],
+    out_path: str = SUBGRAPH_OUT_PATH,
+):
+    """
+    Write the subgraph induced by `nodes` through `instance_to_csv`'s csv builders into `out_path`.
+    """
+    sources, targets, predicates = index.neighbors(nodes, "fwd")
+    inside = np.isin(targets, nodes)
+    sources, targets, predicates = sources[inside], targets[inside], predicates[inside]
+
+    names = {int(id): index.name_of(int(id)) for id in nodes}
+    dump_spooled_edges(
+        (
+            (names[s], index.predicates[p], names[o])
+            for s, o, p in zip(sources.tolist(), targets.tolist(), predicates.tolist())
+        ),
+        SUBGRAPH_EDGES,
+    )
+
+    instance_to_csv.use_output_path(out_path)
+    instance_to_csv.spo_edges_file = SUBGRAPH_EDGES
+    instance_to_csv.inst_set = set(names.values())
+    instance_to_csv.num_of_ii_relationships = len(sources)
+    instance_to_csv.sampled_type_dict = (
+        {
+            inst: type_dict[inst]
+            for inst in instance_to_csv.inst_set
+            if inst in type_dict
+        }
+        if type_dict
+        else TypeDict()
+    )
+    instance_to_csv.num_of_it_relationships = sum(
+        len(types) for types in instance_to_csv.sampled_type_dict.values()
+    )
+
+    instance_to_csv.load_type_node_name_id_dict()
+    instance_to_csv.build_instance_node_name_id_dict()
+    instance_to_csv.i_nodes()
+    instance_to_csv.it_nodes()
+    instance_to_csv.ii_relationships()
+    instance_to_csv.it_relationships()
+    instance_to_csv.notify_done()
+
+
+def extract(
+    seeds: list[str],
+    k: int = 2,
+    max_nodes: int = MAX_NODES,
+    out_path: str = SUBGRAPH_OUT_PATH,
+):
+    if not os.path.exists(instance_to_csv.TYPE_ID_SERIALIZED):
+        raise FileNotFoundError(
+            f"File `{instance_to_csv.TYPE_ID_SERIALIZED}` does not exist, please run `schema_to_csv.py` first."
+        )
+    index = AdjacencyIndex()
+    type_dict = (
+        load_type_dict(TYPE_DICT_SERIALIZED)
+        if dump_exists(TYPE_DICT_SERIALIZED)
+        else None
+    )
+    seed_ids = resolve_seeds(index, seeds, type_dict)
+    print(f"Resolved `{len(seed_ids)}` seed instances")
+    nodes = bfs(index, seed_ids, k, max_nodes)
+    export(index, nodes, type_dict, out_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="k-hop subgraph extraction")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("index", help="build the CSR adjacency index")
+    extract_parser = commands.add_parser("extract", help="extract a k-hop subgraph")
+    extract_parser.add_argument("seeds", nargs="+", help="resource or type IRIs")
+    extract_parser.add_argument("-k", type=int, default=2)
+    extract_parser.add_argument("--max-nodes", type=int, default=MAX_NODES)
+    extract_parser.add_argument("--out", default=SUBGRAPH_OUT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "index":
+        build_index()
+    else:
+        extract(args.seeds, args.k, args.max_nodes, args.out)
@@ -0,0 +1,86 @@
+from checkpoint import ScanCheckpoint
+import checkpoint, itertools, os, pytest
+
+
+@pytest.fixture
+def files(tmp_path) -> list[str]:
+    """
+    Two files, an empty one, and a last line without `\\n`.
+    """
+    contents = [b"a 1\nbb 2\nccc 3\n", b"", b"d 4\ne 5\nlast"]
+    paths = list[str]()
+    for cnt, content in enumerate(contents):
+        path = tmp_path / f"part-{cnt}.ttl"
+        path.write_bytes(content)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def save_every_line(monkeypatch):
+    """
+    Check the clock after every line, and let `interval` seconds pass between two reads.
+    """
+    clock = itertools.count()
+    monkeypatch.setattr(checkpoint, "CHECK_EVERY_LINES", 1)
+    monkeypatch.setattr(checkpoint.time, "monotonic", lambda: next(clock))
+
+
+def all_lines(files: list[str]) -> list[bytes]:
+    lines = list[bytes]()
+    for file in files:
+        with open(file, "rb") as f:
+            lines += f.readlines()
+    return lines
+
+
+def test_no_checkpoint(tmp_path, files):
+    scan = ScanCheckpoint(str(tmp_path / "ckpt" / "scan.pkl"), interval=0)
+    assert scan.load() is None
+    assert list(scan.lines(files, "Scanning", lambda: None)) == all_lines(files)
+    assert not os.path.exists(scan.path)
+
+
+@pytest.mark.parametrize("killed_at", range(7))
+def test_resume_after_kill(tmp_path, files, killed_at):
+    """
+    Killed right after the `killed_at`-th line was handed out, at every position
+    (mid-file, last line of a file, across the empty file), nothing is lost or repeated.
+    """
+    path = str(tmp_path / "ckpt" / "scan.pkl")
+    seen = list[bytes]()
+    scan = ScanCheckpoint(path, interval=1)
+    for cnt, line in enumerate(scan.lines(files, "Scanning", lambda: list(seen))):
+        seen.append(line)
+        if cnt == killed_at:
+            break  # the generator is never resumed, as if the process was killed
+
+    resumed = ScanCheckpoint(path, interval=1)
+    state = resumed.load()
+    if killed_at == 0:
+        assert state is None  # killed before the first save
+        state = []
+    assert state == seen[:killed_at]
+    state += resumed.lines(files, "Resuming", lambda: list(state))
+    assert state == all_lines(files)
+
+
+def test_changed_file_invalidates(tmp_path, files):
+    path = str(tmp_path / "ckpt" / "scan.pkl")
+    scan = ScanCheckpoint(path, interval=1)
+    lines = scan.lines(files, "Scanning", lambda: "partial")
+    next(lines), next(lines)
+    assert ScanCheckpoint(path).load() == "partial"
+
+    with open(files[0], "ab") as f:
+        f.write(b"new 6\n")
+    assert ScanCheckpoint(path).load() is None
+
+
+def test_remove(tmp_path, files):
+    scan = ScanCheckpoint(str(tmp_path / "ckpt" / "scan.pkl"), interval=1)
+    scan.save({"partial": True})
+    assert os.path.exists(scan.path) and not os.path.exists(f"{scan.path}.tmp")
+    scan.remove()
+    assert not os.path.exists(scan.path)
+    scan.remove()
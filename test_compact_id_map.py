@@ -0,0 +1,96 @@
+from compact_id_map import (
+    BLOCK_SIZE,
+    CompactIdMap,
+    build_compact_id_map,
+    is_fresh,
+    open_compact_id_map,
+)
+import pytest, random
+
+
+def write_name_id_map(path, names: list[str]) -> dict[str, int]:
+    ids = {name: id for id, name in enumerate(names)}
+    with open(path, "w") as f:
+        for name, id in ids.items():
+            f.write(f"{name} {id}\n")
+    return ids
+
+
+@pytest.fixture
+def names() -> list[str]:
+    """
+    Shared prefixes (front coding), a unicode key, several blocks and a partial last block.
+    """
+    names = [f"dbr:Item_{i:04d}" for i in range(5 * BLOCK_SIZE + 3)]
+    names += ["dbr:Item", "dbr:Ité", "dbo:Thing", "a", "z" * 300]
+    random.Random(0).shuffle(names)
+    return names
+
+
+@pytest.fixture
+def id_map(tmp_path, names):
+    path = tmp_path / "node_name_id_map.txt"
+    ids = write_name_id_map(path, names)
+    build_compact_id_map(str(path))
+    id_map = CompactIdMap(str(path))
+    yield id_map, ids
+    id_map.close()
+
+
+def test_round_trip(id_map):
+    id_map, ids = id_map
+    assert len(id_map) == len(ids)
+    for name, id in ids.items():
+        assert name in id_map
+        assert id_map[name] == id
+    names = list(ids)
+    assert id_map.lookup_batch(names).tolist() == [ids[name] for name in names]
+
+
+def test_block_edges(id_map):
+    """
+    First / last key of every block, where `_find_block` and the front-coded decode switch blocks.
+    """
+    id_map, ids = id_map
+    keys = sorted(ids, key=str.encode)
+    edges = [keys[0], keys[-1]]
+    for start in range(0, len(keys), BLOCK_SIZE):
+        edges += [keys[start], keys[min(start + BLOCK_SIZE, len(keys)) - 1]]
+    assert id_map.lookup_batch(edges).tolist() == [ids[key] for key in edges]
+    assert [id_map[key] for key in edges] == [ids[key] for key in edges]
+
+
+def test_misses(id_map):
+    id_map, ids = id_map
+    misses = ["", "0", "dbr:Item_", "dbr:Item_0000x", "dbr:Item_9999", "zz" * 200]
+    for name in misses:
+        assert name not in id_map
+        with pytest.raises(KeyError):
+            id_map[name]
+    some = list(ids)[:3]
+    assert id_map.lookup_batch(misses + some, default=-1).tolist() == [-1] * len(
+        misses
+    ) + [ids[name] for name in some]
+    with pytest.raises(KeyError):
+        id_map.lookup_batch(some + misses[:1])
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "empty.txt"
+    id_map, new_names = open_compact_id_map(str(path))
+    assert len(id_map) == 0 and new_names == []
+    assert id_map.lookup_batch(["a"], default=-1).tolist() == [-1]
+    with pytest.raises(KeyError):
+        id_map.lookup_batch(["a"])
+    id_map.close()
+
+
+def test_append_keeps_ids(tmp_path, names):
+    path = tmp_path / "node_name_id_map.txt"
+    ids = write_name_id_map(path, names)
+    id_map, new_names = open_compact_id_map(str(path), names[:10] + ["new_b", "new_a"])
+    assert new_names == ["new_a", "new_b"]
+    assert is_fresh(str(path))
+    assert id_map["new_a"] == len(names) and id_map["new_b"] == len(names) + 1
+    assert id_map.lookup_batch(names).tolist() == [ids[name] for name in names]
+    id_map.close()
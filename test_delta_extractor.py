@@ -0,0 +1,82 @@
+from local_schema_extractor import (
+    SPECIFIC_TYPE_FILE,
+    TRANSITIVE_TYPE_FILE,
+    TYPE_DICT_SERIALIZED,
+    SCHEMA_EDGE_SUPPORT_FILE,
+    TypeDict,
+    dump_type_dict,
+)
+from schema_to_csv_base import SCHEMA_EDGES_GENERAL, SCHEMA_VERTICES_GENERAL
+from delta_extractor import DeltaSchemaExtractor
+import curie, delta_extractor, os, pytest
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+DBR, DBO = "http://dbpedia.org/resource/", "http://dbpedia.org/ontology/"
+OBJECTS_FILE = "mappingbased-objects_lang=en.ttl"
+
+
+def write_release(path, types: dict[str, str], triples: list[tuple[str, str, str]]):
+    os.makedirs(path)
+    with open(f"{path}/{os.path.basename(SPECIFIC_TYPE_FILE)}", "w") as f:
+        for inst, t in types.items():
+            f.write(f"<{DBR}{inst}> <{RDF_TYPE}> <{DBO}{t}> .\n")
+    open(f"{path}/{os.path.basename(TRANSITIVE_TYPE_FILE)}", "w").close()
+    with open(f"{path}/{OBJECTS_FILE}", "w") as f:
+        for s, p, o in triples:
+            f.write(f"<{DBR}{s}> <{DBO}{p}> <{DBR}{o}> .\n")
+
+
+@pytest.fixture(params=[True, False], ids=["compact_iri", "full_iri"])
+def releases(request, tmp_path, monkeypatch):
+    """
+    `E1` changes from `Person` to `Agent`, its only triple stays as it is,
+    so the schema edge moves with the type change alone.
+    """
+    monkeypatch.setattr(curie, "COMPACT_IRI", request.param)
+    monkeypatch.chdir(tmp_path)
+    triples = [("E1", "birthPlace", "E2")]
+    write_release("prev", {"E1": "Person", "E2": "Place"}, triples)
+    write_release("new", {"E1": "Agent", "E2": "Place"}, triples)
+    monkeypatch.setattr(
+        delta_extractor, "resource_pool_files", lambda: [f"new/{OBJECTS_FILE}"]
+    )
+
+    dbr, dbo = (lambda name: curie.compact(DBR + name)), (
+        lambda name: curie.compact(DBO + name)
+    )
+    os.makedirs("out"), os.makedirs("dump")
+    dump_type_dict(
+        TypeDict({dbr("E1"): {dbo("Person")}, dbr("E2"): {dbo("Place")}}),
+        TYPE_DICT_SERIALIZED,
+    )
+    edge = f"{dbo('Person')} {dbo('birthPlace')} {dbo('Place')}"
+    with open(SCHEMA_EDGE_SUPPORT_FILE, "w") as f:
+        f.write(f"{edge} 1\n")
+    with open(f"{SCHEMA_EDGES_GENERAL}.txt", "w") as f:
+        f.write(f"{edge}\n")
+    with open(f"{SCHEMA_VERTICES_GENERAL}.txt", "w") as f:
+        f.write(f"{dbo('Person')}\n{dbo('Place')}\n")
+    return dbr, dbo
+
+
+def read_lines(path: str) -> list[str]:
+    with open(path, "r") as f:
+        return f.read().splitlines()
+
+
+def test_type_change_moves_schema_edges(releases):
+    dbr, dbo = releases
+    extractor = DeltaSchemaExtractor("prev", "new").load_previous_state()
+    extractor.apply_type_delta()
+    assert set(extractor.old_types) == {dbr("E1")}
+    assert extractor.type_dict[dbr("E1")] == {dbo("Agent")}
+    assert extractor.type_dict[dbr("E2")] == {dbo("Place")}
+
+    extractor.apply_triple_delta().export_schema()
+    added = f"{dbo('Agent')} {dbo('birthPlace')} {dbo('Place')}"
+    removed = f"{dbo('Person')} {dbo('birthPlace')} {dbo('Place')}"
+    assert read_lines(f"{SCHEMA_EDGES_GENERAL}.added.txt") == [added]
+    assert read_lines(f"{SCHEMA_EDGES_GENERAL}.removed.txt") == [removed]
+    assert read_lines(f"{SCHEMA_EDGES_GENERAL}.txt") == [added]
+    assert read_lines(f"{SCHEMA_VERTICES_GENERAL}.added.txt") == [dbo("Agent")]
+    assert read_lines(f"{SCHEMA_VERTICES_GENERAL}.removed.txt") == [dbo("Person")]
@@ -0,0 +1,95 @@
+from edge_dedup import EdgeDeduplicator, FingerprintSet, iter_spooled_edges
+import edge_dedup, pytest
+import numpy as np
+
+MAX_FINGERPRINT = np.iinfo(np.uint64).max
+
+
+def test_fingerprint_set_merges_runs():
+    """
+    Batches of every size, so runs get merged at every power of two.
+    """
+    rng = np.random.default_rng(0)
+    fingerprints = rng.choice(1 << 40, size=600, replace=False).astype(np.uint64)
+    fingerprints[:2] = [0, MAX_FINGERPRINT]
+    fps = FingerprintSet(with_values=True)
+    added = 0
+    for size in [1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 1, 7]:
+        batch = fingerprints[added : added + size]
+        fps.add(batch, np.arange(added, added + size))
+        added += size
+        assert len(fps) == added
+        sizes = [len(keys) for keys, _ in fps.runs]
+        assert sizes == sorted(sizes, reverse=True)
+        for keys, _ in fps.runs:
+            assert (np.diff(keys.astype(np.float64)) >= 0).all()
+        assert fps.find(fingerprints[:added]).tolist() == list(range(added))
+    assert fps.nbytes == 16 * added
+
+
+def test_fingerprint_set_misses():
+    fps = FingerprintSet()
+    assert fps.find(np.array([0, 1], dtype=np.uint64)).tolist() == [-1, -1]
+    fps.add(np.array([10, 20, 30], dtype=np.uint64))
+    queries = np.array([0, 10, 15, 30, 31, MAX_FINGERPRINT], dtype=np.uint64)
+    assert fps.find(queries).tolist() == [-1, 0, -1, 0, -1, -1]
+
+
+@pytest.fixture
+def colliding(monkeypatch):
+    """
+    Only 4 distinct fingerprints, so distinct edges collide all the time.
+    """
+    monkeypatch.setattr(
+        edge_dedup,
+        "fingerprints_of",
+        lambda lines: np.array([len(line) % 4 for line in lines], dtype=np.uint64),
+    )
+
+
+def dedup_all(path: str, policy: str, batches: list[list[tuple[str, str, str]]]):
+    dedup = EdgeDeduplicator(path, policy)
+    for batch in batches:
+        dedup.append([edge for edge, new in zip(batch, dedup.find_new(batch)) if new])
+    dedup.close()
+    return dedup, list(iter_spooled_edges(path))
+
+
+EDGES = [(f"dbr:S{i}", "dbo:p", f"dbr:O{i * 7 % 13}") for i in range(40)]
+BATCHES = [EDGES[:10] + EDGES[:3], EDGES[5:25], EDGES[20:] + EDGES[:40:3]]
+
+
+@pytest.mark.parametrize("policy", ["trust", "verify"])
+def test_exact_without_collisions(tmp_path, policy):
+    dedup, spooled = dedup_all(str(tmp_path / "edges.tsv"), policy, BATCHES)
+    assert spooled == EDGES
+    assert dedup.num_of_edges == len(EDGES)
+
+
+def test_verify_keeps_colliding_edges(tmp_path, colliding):
+    dedup, spooled = dedup_all(str(tmp_path / "edges.tsv"), "verify", BATCHES)
+    assert spooled == EDGES
+    assert len(dedup.collided) > 0
+
+
+def test_trust_drops_colliding_edges(tmp_path, colliding):
+    """
+    Exact within a batch, by fingerprint only against earlier batches.
+    """
+    expected, taken = list[tuple[str, str, str]](), set[int]()
+    for batch in BATCHES:
+        kept = [
+            edge
+            for edge in dict.fromkeys(batch)
+            if len("\t".join(edge)) % 4 not in taken
+        ]
+        expected += kept
+        taken.update(len("\t".join(edge)) % 4 for edge in kept)
+    _, spooled = dedup_all(str(tmp_path / "edges.tsv"), "trust", BATCHES)
+    assert spooled == expected
+    assert len(spooled) < len(EDGES)
+
+
+def test_unknown_policy(tmp_path):
+    with pytest.raises(ValueError):
+        EdgeDeduplicator(str(tmp_path / "edges.tsv"), "ignore")
@@ -0,0 +1,35 @@
+from io_pipeline import read_line_chunks
+import pytest, threading
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    path = tmp_path / "lines.ttl"
+    path.write_text("".join(f"line {i}\n" for i in range(1000)) + "last")
+    return str(path)
+
+
+def test_reads_every_line(path):
+    chunks = list(read_line_chunks(path, buffer_size=64, queue_size=2))
+    assert len(chunks) > 2
+    assert sum((lines for lines, _ in chunks), []) == [
+        f"line {i}" for i in range(1000)
+    ] + ["last"]
+    assert sum(size for _, size in chunks) == len(open(path, "rb").read())
+
+
+def test_early_stop_releases_reader(path):
+    """
+    The reader is blocked on a full queue when the consumer stops.
+    """
+    before = set(threading.enumerate())
+    chunks = read_line_chunks(path, buffer_size=64, queue_size=1)
+    lines, _ = next(chunks)
+    assert lines[0] == "line 0"
+    chunks.close()
+    assert set(threading.enumerate()) == before
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        list(read_line_chunks(str(tmp_path / "missing.ttl")))
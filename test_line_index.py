@@ -0,0 +1,40 @@
+from line_index import build_line_index
+import pytest
+
+STRIDE = 4
+
+
+def naive_offsets(content: bytes) -> list[int]:
+    """
+    Start of every line, then the end of the file.
+    """
+    lines = content.splitlines(keepends=True)
+    return [sum(map(len, lines[:k])) for k in range(len(lines) + 1)]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"".join(b"line %d\n" % i for i in range(2 * STRIDE)),
+        b"".join(b"line %d\n" % i for i in range(2 * STRIDE)) + b"last",
+        b"\n" * (3 * STRIDE + 1),
+    ],
+    ids=["empty", "full_blocks", "no_trailing_newline", "blank_lines"],
+)
+def test_line_offsets(tmp_path, content):
+    path = tmp_path / "lines.ttl"
+    path.write_bytes(content)
+    index = build_line_index(str(path), stride=STRIDE)
+    assert index.num_of_lines == content.count(b"\n")
+
+    expected = naive_offsets(content)
+    for line in range(index.num_of_lines + 1):
+        assert index.line_offset(line) == expected[min(line, len(expected) - 1)]
+    lines = content.splitlines(keepends=True)
+    for start in range(index.num_of_lines + 3):
+        assert index.read_lines(start, 3) == lines[start : start + 3]
+
+    for line in [-1, index.num_of_lines + 1]:
+        with pytest.raises(IndexError):
+            index.line_offset(line)
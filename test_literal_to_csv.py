@@ -0,0 +1,51 @@
+from compact_id_map import CompactIdMap, build_compact_id_map
+from literal_to_csv import (
+    LITERAL_PROPERTIES_PATH,
+    LANG_STRING,
+    STRING,
+    inst_literal_properties,
+)
+from curie import compact
+import csv, glob, pytest
+
+DBR, DBO = "http://dbpedia.org/resource/", "http://dbpedia.org/ontology/"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+@pytest.fixture
+def id_map(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("node_name_id_map.txt", "w") as f:
+        for id, name in enumerate(["E0", "E1", "E2"]):
+            f.write(f"{compact(DBR + name)} {id}\n")
+    build_compact_id_map("node_name_id_map.txt")
+    id_map = CompactIdMap("node_name_id_map.txt")
+    yield id_map
+    id_map.close()
+
+
+def test_shards_round_trip(id_map):
+    """
+    Escaped line breaks, quotes and commas in values survive as one csv field.
+    """
+    with open("literals.ttl", "w") as f:
+        f.write(f'<{DBR}E0> <{DBO}motto> "one\\ntwo, \\"three\\"\\r"@en .\n')
+        f.write(f'<{DBR}E1> <{DBO}height> "1.5"^^<{XSD}double> .\n')
+        f.write(f'<{DBR}E2> <{DBO}name> "plain" .\n')
+        f.write(f'<{DBR}E3> <{DBO}name> "not sampled" .\n')
+        f.write(f"<{DBR}E0> <{DBO}birthPlace> <{DBR}E1> .\n")
+    inst_literal_properties(
+        {compact(f"{DBR}E{i}") for i in range(3)}, id_map, files=["literals.ttl"]
+    )
+
+    rows = list[list[str]]()
+    for path in sorted(glob.glob(f"{LITERAL_PROPERTIES_PATH}/part-*.csv")):
+        with open(path, newline="") as f:
+            header, *shard = list(csv.reader(f))
+        assert header == [":ID(Instance)", "Property", "Value", "Datatype", "Lang"]
+        rows += shard
+    assert sorted(rows) == [
+        ["0", compact(f"{DBO}motto"), 'one\ntwo, "three"\r', LANG_STRING, "en"],
+        ["1", compact(f"{DBO}height"), "1.5", compact(f"{XSD}double"), ""],
+        ["2", compact(f"{DBO}name"), "plain", STRING, ""],
+    ]
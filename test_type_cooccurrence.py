@@ -0,0 +1,51 @@
+from type_cooccurrence import IMPLIED_TYPES_CSV_FILE, cooccurrence
+from types import SimpleNamespace
+import type_cooccurrence, csv, os
+
+TYPE_DICT = {
+    "i1": {"A", "B"},
+    "i2": {"A", "B", "C"},
+    "i3": {"B"},
+    "i4": {"C"},
+}
+""" support: A 2, B 3, C 2; co-occurrence: A-B 2, A-C 1, B-C 1 """
+
+
+def test_cooccurrence():
+    types, support, rows, cols, counts = cooccurrence(TYPE_DICT)
+    assert types == ["A", "B", "C"]
+    assert support.tolist() == [2, 3, 2]
+    pairs = {
+        (types[a], types[b]): count
+        for a, b, count in zip(rows.tolist(), cols.tolist(), counts.tolist())
+    }
+    assert pairs == {
+        ("A", "B"): 2,
+        ("B", "A"): 2,
+        ("A", "C"): 1,
+        ("C", "A"): 1,
+        ("B", "C"): 1,
+        ("C", "B"): 1,
+    }
+
+
+def test_implied_types(tmp_path, monkeypatch):
+    """
+    `B => A` holds `Count` 2, while `B` has support 3.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(type_cooccurrence, "hasOption", lambda _: True)
+    os.makedirs(os.path.dirname(IMPLIED_TYPES_CSV_FILE))
+    type_cooccurrence.dump_type_cooccurrence(
+        SimpleNamespace(type_dict=TYPE_DICT), min_support=1, min_confidence=0.5
+    )
+    with open(IMPLIED_TYPES_CSV_FILE, newline="") as f:
+        header, *rows = list(csv.reader(f))
+    assert header == ["Type", "ImpliedType", "Count", "Confidence"]
+    assert sorted(rows) == [
+        ["A", "B", "2", "1.0000"],
+        ["A", "C", "1", "0.5000"],
+        ["B", "A", "2", "0.6667"],
+        ["C", "A", "1", "0.5000"],
+        ["C", "B", "1", "0.5000"],
+    ]
@@ -0,0 +1,89 @@
+"""
+Parse-time filter pushdown, configured by `options::FILTERS`.
+
+Each entry is an IRI (exact match, checked by hashing) or an IRI prefix ending with `*`;
+both are compiled into their `<...>`-bracketed bytes form, so raw N-Triples fields are
+checked before being sliced, decoded or put into any dict.
+
+- `types`: objects of `rdf:type` triples (`build_type_dict`), so excluded types never enter
+  the type cross product of `generate_schema_edge`
+- `predicates`: predicates of `(s)-[p]->(o)` triples
+- `resources`: subjects of `rdf:type` triples, subjects and objects of `(s)-[p]->(o)` triples,
+  subjects of literal triples (`literal_to_csv`, whose predicates are checked as well)
+
+Dumps (`type_dict`, `spo_edges`, ...) are built with the filters active at the time,
+remove them after changing `options::FILTERS`.
+"""
+
+from options import FILTERS
+from typing import Optional
+
+
+class FieldFilter:
+    def __init__(self, include: list[str], exclude: list[str]) -> None:
+        self.include_exact, self.include_prefixes = self.compile(include)
+        self.exclude_exact, self.exclude_prefixes = self.compile(exclude)
+        self.has_include = bool(self.include_exact or self.include_prefixes)
+
+    @staticmethod
+    def compile(iris: list[str]) -> tuple[frozenset[bytes], tuple[bytes, ...]]:
+        exact = frozenset(f"<{iri}>".encode() for iri in iris if not iri.endswith("*"))
+        prefixes = tuple(f"<{iri[:-1]}".encode() for iri in iris if iri.endswith("*"))
+        return exact, prefixes
+
+    def __call__(self, field: bytes) -> bool:
+        if field in self.exclude_exact or field.startswith(self.exclude_prefixes):
+            return False
+        if self.has_include:
+            return field in self.include_exact or field.startswith(
+                self.include_prefixes
+            )
+        return True
+
+
+class TripleFilter:
+    def __init__(self, config: dict[str, list[str]]) -> None:
+        self.types, self.predicates, self.resources = [
+            (
+                FieldFilter(
+                    config.get(f"include_{kind}", []), config.get(f"exclude_{kind}", [])
+                )
+                if config.get(f"include_{kind}") or config.get(f"exclude_{kind}")
+                else None
+            )
+            for kind in ["types", "predicates", "resources"]
+        ]
+
+    def accept_type(self, s: bytes, o: bytes) -> bool:
+        """
+        `(s)-[rdf:type]->(o)`, fields still `<...>`-bracketed.
+        """
+        if self.resources and not self.resources(s):
+            return False
+        return not self.types or self.types(o)
+
+    def accept_triple(self, s: bytes, p: bytes, o: bytes) -> bool:
+        """
+        `(s)-[p]->(o)`, fields still `<...>`-bracketed.
+        """
+        if self.predicates and not self.predicates(p):
+            return False
+        return not self.resources or (self.resources(s) and self.resources(o))
+
+    def accept_literal(self, s: bytes, p: bytes) -> bool:
+        """
+        `(s)-[p]->("literal")`, fields still `<...>`-bracketed.
+        """
+        if self.predicates and not self.predicates(p):
+            return False
+        return not self.resources or self.resources(s)
+
+
+def compile_filters(config: dict[str, list[str]]) -> Optional[TripleFilter]:
+    """
+    `None` if nothing is configured, so callers skip the check entirely.
+    """
+    return TripleFilter(config) if any(config.values()) else None
+
+
+TRIPLE_FILTER = compile_filters(FILTERS)
@@ -0,0 +1,153 @@
+"""
+# Type co-occurrence
+
+Which types label the same instances, and how often, enabled by `TYPE_COOCCURRENCE` in `options::OPTIONS`.
+
+`type_dict` becomes a sparse incidence matrix `M` (`instances x types`, one row per instance),
+and every count comes out of one sparse product `C = M.T @ M` (`types x types`):
+- `C[a, a]`: support of type `a` (instances labeled `a`)
+- `C[a, b]`: instances labeled both `a` and `b`
+- `a => b` is implied when `C[a, b] / C[a, a] >= MIN_CONFIDENCE`, i.e. (almost) every `a` is also a `b`
+
+Writes `out/{prefix}_type_support.csv`, `out/{prefix}_type_cooccurrence.csv` (`a < b`, at least `MIN_COOCCURRENCE`)
+and `out/{prefix}_implied_types.csv` (`a => b` with `Count` `C[a, b]`, for types with at least `MIN_SUPPORT` instances).
+"""
+
+from local_schema_extractor import OUT_PATH, OUTPUT_PREFIX, OUTPUT_ATTRIBUTE, TypeDict
+from pipeline_session import PipelineSession
+from csv_writer import CsvWriter, quoted
+from options import hasOption
+from scipy.sparse import csr_matrix
+from typing import Optional
+import numpy as np
+
+TYPE_SUPPORT_CSV_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_type_support.csv"
+)
+TYPE_COOCCURRENCE_CSV_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_type_cooccurrence.csv"
+)
+IMPLIED_TYPES_CSV_FILE = (
+    f"{OUT_PATH}/{OUTPUT_PREFIX}_{OUTPUT_ATTRIBUTE}_implied_types.csv"
+)
+
+MIN_COOCCURRENCE = 1
+MIN_SUPPORT = 10
+MIN_CONFIDENCE = 1.0
+
+
+def incidence_matrix(type_dict: TypeDict) -> tuple[csr_matrix, list[str]]:
+    """
+    `(M, types)`, `M[i, j] == 1` iff the `i`-th instance of `type_dict` is labeled `types[j]`.
+    """
+    types = sorted(set(t for labels in type_dict.values() for t in labels))
+    type_ids = {t: id for id, t in enumerate(types)}
+    indptr = np.zeros(len(type_dict) + 1, dtype=np.int64)
+    np.cumsum(
+        np.fromiter(
+            (len(labels) for labels in type_dict.values()),
+            dtype=np.int64,
+            count=len(type_dict),
+        ),
+        out=indptr[1:],
+    )
+    indices = np.fromiter(
+        (type_ids[t] for labels in type_dict.values() for t in labels),
+        dtype=np.int32,
+        count=int(indptr[-1]),
+    )
+    data = np.ones(len(indices), dtype=np.int64)
+    return (
+        csr_matrix((data, indices, indptr), shape=(len(type_dict), len(types))),
+        types,
+    )
+
+
+def cooccurrence(
+    type_dict: TypeDict,
+) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    `(types, support, rows, cols, counts)`: `types[rows[k]]` and `types[cols[k]]` co-occur on `counts[k]` instances,
+    every `rows[k] != cols[k]` pair in both directions.
+    """
+    print(f"Building the incidence matrix of `{len(type_dict)}` instances ... ", end="")
+    m, types = incidence_matrix(type_dict)
+    print("Done!")
+    print(f"Computing `M.T @ M` over `{len(types)}` types ... ", end="")
+    c = (m.T @ m).tocoo()
+    print("Done!")
+    support = c.diagonal()
+    off_diagonal = c.row != c.col
+    return (
+        types,
+        support,
+        c.row[off_diagonal],
+        c.col[off_diagonal],
+        c.data[off_diagonal],
+    )
+
+
+def dump_type_cooccurrence(
+    session: Optional[PipelineSession] = None,
+    min_cooccurrence: int = MIN_COOCCURRENCE,
+    min_support: int = MIN_SUPPORT,
+    min_confidence: float = MIN_CONFIDENCE,
+):
+    if not hasOption("TYPE_COOCCURRENCE"):
+        print("TYPE_COOCCURRENCE is not set to True, skipping type co-occurrence ...")
+        return
+
+    session = session if session else PipelineSession()
+    types, support, rows, cols, counts = cooccurrence(session.type_dict)
+
+    order = np.argsort(-support, kind="stable")
+    with CsvWriter(
+        TYPE_SUPPORT_CSV_FILE,
+        ["Type", "Support"],
+        total=len(types),
+        desc=f"Exporting type support to `{TYPE_SUPPORT_CSV_FILE}`",
+    ) as writer:
+        for id in order.tolist():
+            writer.write_row([quoted(types[id]), str(support[id])])
+
+    pairs = np.flatnonzero((rows < cols) & (counts >= min_cooccurrence))
+    pairs = pairs[np.argsort(-counts[pairs], kind="stable")]
+    with CsvWriter(
+        TYPE_COOCCURRENCE_CSV_FILE,
+        ["Type1", "Type2", "Count"],
+        total=len(pairs),
+        desc=f"Exporting type co-occurrence to `{TYPE_COOCCURRENCE_CSV_FILE}`",
+    ) as writer:
+        for a, b, count in zip(
+            rows[pairs].tolist(), cols[pairs].tolist(), counts[pairs].tolist()
+        ):
+            writer.write_row([quoted(types[a]), quoted(types[b]), str(count)])
+
+    confidence = counts / support[rows]
+    implied = np.flatnonzero(
+        (confidence >= min_confidence) & (support[rows] >= min_support)
+    )
+    implied = implied[np.argsort(-support[rows[implied]], kind="stable")]
+    with CsvWriter(
+        IMPLIED_TYPES_CSV_FILE,
+        ["Type", "ImpliedType", "Count", "Confidence"],
+        total=len(implied),
+        desc=f"Exporting implied types to `{IMPLIED_TYPES_CSV_FILE}`",
+    ) as writer:
+        for a, b, count, ratio in zip(
+            rows[implied].tolist(),
+            cols[implied].tolist(),
+            counts[implied].tolist(),
+            confidence[implied].tolist(),
+        ):
+            writer.write_row(
+                [quoted(types[a]), quoted(types[b]), str(count), f"{ratio:.4f}"]
+            )
+
+    print(f"See type support at `{TYPE_SUPPORT_CSV_FILE}`")
+    print(f"See type co-occurrence at `{TYPE_COOCCURRENCE_CSV_FILE}`")
+    print(f"See implied types at `{IMPLIED_TYPES_CSV_FILE}`")
+
+
+if __name__ == "__main__":
+    dump_type_cooccurrence()
@@ -0,0 +1,28 @@
+from env import MEMORY_BUDGET
+from typing import Any, Callable
+import os, subprocess
+
+
+def all_satisfied(f: Callable[[Any], bool], *args):
+    satisfied = 0
+    for arg in args:
+        satisfied += 1 if f(arg) else 0
+    return satisfied == len(args)
+
+
+def all_unsatisfied(f: Callable[[Any], bool], *args):
+    satisfied = 0
+    for arg in args:
+        satisfied += 1 if f(arg) else 0
+    return satisfied == 0
+
+
+def external_sort(input_file: str, output_file: str, *flags: str):
+    """
+    Bytewise (`LC_ALL=C`) `sort`, with `env::MEMORY_BUDGET` as its buffer size if set.
+    """
+    buffer_size = ["-S", MEMORY_BUDGET] if MEMORY_BUDGET else []
+    subprocess.check_call(
+        ["sort", *flags, *buffer_size, "-o", output_file, input_file],
+        env={**os.environ, "LC_ALL": "C"},
+    )